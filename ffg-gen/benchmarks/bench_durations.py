@@ -0,0 +1,53 @@
+import random
+import re
+from argparse import ArgumentParser
+from bisect import bisect
+
+import configs
+from benchmarks import synthetic
+from durations import Durations
+
+'''Compares the duration lookups against the old bisect-per-line version.
+
+Run from the ffg-gen folder:
+    python -m benchmarks.bench_durations --texts 100000
+'''
+
+
+def bisect_calc_duration(durs: Durations, text: str):
+    '''How calc_duration used to work, for comparison
+    '''
+    count = len(text) if durs.mode == 'char' else len(re.findall(r'\w+', text))
+    index = bisect(durs.thresholds, count, key=lambda threshold: threshold.count)
+    return durs.thresholds[index-1].duration
+
+
+def main():
+    parser = ArgumentParser(description='Benchmarks duration calculation')
+    parser.add_argument('--texts', type=int, default=100_000, help='number of texts to calculate durations for')
+    parser.add_argument('--repeat', type=int, default=5, help='take the best time out of this many runs')
+    args = parser.parse_args()
+
+    configs.load_into_globals(synthetic.dialogue_config())
+
+    rng = random.Random(0)
+    texts = [synthetic.sentence(rng, 3, 40) for _ in range(args.texts)]
+
+    print(f'{args.texts} texts')
+    print(f'{"mode":<6}{"method":<16}{"seconds":>10}{"texts/s":>14}')
+
+    for config in (synthetic.dialogue_config(), synthetic.bio_config()):
+        durs = Durations(**config['durations'])
+
+        methods = (
+            ('bisect', lambda: [bisect_calc_duration(durs, text) for text in texts]),
+            ('calc_duration', lambda: [durs.calc_duration(text) for text in texts]),
+        )
+
+        for name, func in methods:
+            seconds = synthetic.best_time(func, args.repeat)
+            print(f'{durs.mode:<6}{name:<16}{seconds:>10.3f}{args.texts / seconds:>14.0f}')
+
+
+if __name__ == '__main__':
+    main()
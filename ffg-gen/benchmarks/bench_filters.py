@@ -0,0 +1,94 @@
+import gc
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+
+import cli_args
+import configs
+import filters
+from benchmarks import synthetic
+
+'''Compares the interned filter args and compiled html template against plain dicts.
+
+Generates the text and character components for one chapter, then serializes them into melt args.
+Reports the time and the memory held by the clips afterwards.
+
+Run from the ffg-gen folder:
+    python -m benchmarks.bench_filters --lines 10000
+'''
+
+
+def legacy_generate_html(text: str, font: str, fontSize: int, color: str = '#ffffff', align: str = "left") -> str:
+    '''How generateHtml used to work, for comparison
+    '''
+    text = text.replace('\n', '<br/>')
+
+    return filters.HTML.replace("{FONT}", font) \
+        .replace("{SIZE}", str(fontSize)) \
+        .replace("{COLOR}", color) \
+        .replace("{TEXT}", text) \
+        .replace("{ALIGN}", str(align))
+
+
+def measure(func) -> tuple[float, float, float]:
+    '''Runs the function and returns (seconds, MB held by the result, peak MB)
+    '''
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return seconds, current / 1e6, peak / 1e6
+
+
+def main():
+    parser = ArgumentParser(description='Benchmarks interned filter args against plain dicts')
+    parser.add_argument('--lines', type=int, default=10_000, help='number of lines in the synthetic chapter')
+    args = parser.parse_args()
+
+    cli_args.ARGS = Namespace(fill_blanks=False, bg_color='black')
+
+    from dialogue_gen import dconfigs, line_parse
+    from dialogue_gen.generation import char_gen, text_gen
+
+    config = synthetic.dialogue_config()
+    configs.load_into_globals(config)
+    dconfigs.load_into_globals(config)
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = Path(folder) / 'dialogue.txt'
+        synthetic.write_script(path, synthetic.dialogue_script(args.lines))
+        with open(path) as input_file:
+            common_lines, chapters = line_parse.parseDialogueFile(input_file)
+    lines = common_lines + next(iter(chapters.values()))
+    names = synthetic.char_names(4)
+
+    def generate():
+        compositions = [text_gen.generate(lines)] + [char_gen.generate(lines, name) for name in names]
+        melt_args = [composition.single_track_args() for composition in compositions]
+        return compositions, melt_args
+
+    interned = (filters.intern_args, filters.generateHtml)
+    legacy = (filters.FilterArgs, legacy_generate_html)
+
+    print(f'{args.lines} lines')
+    print(f'{"mode":<10}{"seconds":>10}{"held MB":>10}{"peak MB":>10}')
+    for name, (intern_args, generate_html) in (('plain', legacy), ('interned', interned)):
+        filters.intern_args, filters.generateHtml = intern_args, generate_html
+        filters.generateHtmlHead.cache_clear()
+        char_gen.determine_movement_rect.cache_clear()
+        char_gen.determine_brightness_levels.cache_clear()
+        seconds, held, peak = measure(generate)
+        print(f'{name:<10}{seconds:>10.2f}{held:>10.1f}{peak:>10.1f}')
+
+    filters.intern_args, filters.generateHtml = interned
+
+
+if __name__ == '__main__':
+    main()
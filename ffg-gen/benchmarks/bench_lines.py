@@ -0,0 +1,122 @@
+import gc
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from pathlib import Path
+
+import configs
+from benchmarks import synthetic
+
+'''Measures how much memory each parsed line takes, and how fast scripts get parsed.
+
+Run from the ffg-gen folder:
+    python -m benchmarks.bench_lines --lines 100000
+'''
+
+
+def load_scene(scene: str, config: dict):
+    '''Loads the config into the globals for the scene, and returns the parse function
+    '''
+    configs.load_into_globals(config)
+
+    match scene:
+        case 'dialogue':
+            from dialogue_gen import dconfigs, line_parse
+            dconfigs.load_into_globals(config)
+            return line_parse.parseDialogueFile
+        case 'bio':
+            from bio_gen import bconfigs, line_parse
+            bconfigs.load_into_globals(config)
+            return line_parse.parse_bio_file
+        case 'ending':
+            from ending_gen import econfigs, line_parse
+            econfigs.load_into_globals(config)
+            return line_parse.parse_ending_file
+
+
+def write_scene(scene: str, folder: Path, num_lines: int, num_chapters: int) -> tuple[dict, Path]:
+    path = folder / f'{scene}.txt'
+
+    match scene:
+        case 'dialogue':
+            config = synthetic.dialogue_config()
+            synthetic.write_script(path, synthetic.dialogue_script(num_lines, num_chapters))
+        case 'bio':
+            config = synthetic.bio_config()
+            synthetic.write_script(path, synthetic.bio_script(num_lines, num_chapters))
+        case 'ending':
+            config = synthetic.ending_config()
+            synthetic.write_script(path, synthetic.ending_script(num_lines))
+
+    return config, path
+
+
+def count_lines(parsed) -> int:
+    '''Counts the parsed lines, no matter how the scene groups them
+    '''
+    if isinstance(parsed, list):
+        return len(parsed)
+
+    common_lines, chapters = parsed
+    return len(common_lines) + sum(len(lines) for lines in chapters.values())
+
+
+def bench_scene(scene: str, num_lines: int, num_chapters: int, repeat: int) -> dict:
+    with tempfile.TemporaryDirectory() as folder:
+        config, path = write_scene(scene, Path(folder), num_lines, num_chapters)
+        parse = load_scene(scene, config)
+        size = path.stat().st_size
+
+        # throughput, best of a few runs
+        best = float('inf')
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            with open(path) as input_file:
+                parsed = parse(input_file)
+            best = min(best, time.perf_counter() - start)
+            del parsed
+
+        # memory that the parsed lines are holding on to
+        gc.collect()
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        with open(path) as input_file:
+            parsed = parse(input_file)
+        gc.collect()
+        after, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        parsed_lines = count_lines(parsed)
+
+    return {
+        'scene': scene,
+        'script_lines': num_lines,
+        'parsed_lines': parsed_lines,
+        'bytes_per_line': (after - before) / max(1, parsed_lines),
+        'peak_mb': (peak - before) / 1e6,
+        'seconds': best,
+        'lines_per_sec': num_lines / best,
+        'mb_per_sec': size / 1e6 / best,
+    }
+
+
+def main():
+    parser = ArgumentParser(description='Benchmarks line parsing memory and throughput')
+    parser.add_argument('--lines', type=int, default=100_000, help='number of lines in each synthetic script')
+    parser.add_argument('--chapters', type=int, default=10, help='number of chapters in each synthetic script')
+    parser.add_argument('--repeat', type=int, default=3, help='take the best time out of this many runs')
+    parser.add_argument('scenes', nargs='*', default=['dialogue', 'bio', 'ending'])
+    args = parser.parse_args()
+
+    print(f'{"scene":<10}{"parsed":>10}{"bytes/line":>12}{"peak MB":>10}{"seconds":>10}{"lines/s":>12}{"MB/s":>8}')
+    for scene in args.scenes:
+        result = bench_scene(scene, args.lines, args.chapters, args.repeat)
+        print(f'{result["scene"]:<10}{result["parsed_lines"]:>10}{result["bytes_per_line"]:>12.0f}'
+              f'{result["peak_mb"]:>10.1f}{result["seconds"]:>10.3f}{result["lines_per_sec"]:>12.0f}'
+              f'{result["mb_per_sec"]:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,390 @@
+import copy
+import json
+import platform
+import random
+import subprocess
+import time
+from argparse import ArgumentParser
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+import configs
+from benchmarks import synthetic
+
+'''Micro-benchmarks for the functions that get called for every line or clip.
+
+Everything runs offline on synthetic input; melt doesn't need to be installed.
+Each benchmark reports operations per second, where an operation is one call on one input.
+
+Save the results as a baseline, then compare against it after making changes:
+    python -m benchmarks.bench_micro --save before.json
+    python -m benchmarks.bench_micro --compare before.json
+
+Run from the ffg-gen folder.
+'''
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Callable[[int], Any]     # builds the input of the given size. Not timed.
+    run: Callable[[Any], Any]       # the timed part
+    ops: Callable[[Any], int]       # how many operations a single run does on the input
+    copy_input: bool = False        # whether the run modifies the input, so it needs a fresh copy every time
+
+
+# ======
+# Inputs
+# ======
+
+PARSE_CHAPTERS = 10
+'''How many chapters the scripts for the parsing benchmarks get split into
+'''
+
+PARSE_JOBS = 2
+'''How many processes the parallel parsing benchmarks use
+'''
+
+
+def load_dialogue_config():
+    from dialogue_gen import dconfigs
+
+    config = synthetic.dialogue_config()
+    configs.load_into_globals(config)
+    dconfigs.load_into_globals(config)
+
+
+def sentences(size: int) -> list[str]:
+    rng = random.Random(0)
+    return [synthetic.sentence(rng) for _ in range(size)]
+
+
+def dialogue_script(size: int) -> tuple[dict, list[str]]:
+    from dialogue_gen import dconfigs
+
+    config = synthetic.dialogue_config()
+    configs.load_into_globals(config)
+    dconfigs.load_into_globals(config)
+    return config, [f'{line}\n' for line in synthetic.dialogue_script(size, PARSE_CHAPTERS)]
+
+
+def bio_script(size: int) -> tuple[dict, list[str]]:
+    from bio_gen import bconfigs
+
+    config = synthetic.bio_config()
+    configs.load_into_globals(config)
+    bconfigs.load_into_globals(config)
+    return config, [f'{line}\n' for line in synthetic.bio_script(size, PARSE_CHAPTERS)]
+
+
+def load_durations(size: int) -> list[str]:
+    load_dialogue_config()
+    return sentences(size)
+
+
+def word_durations(size: int) -> tuple[Any, list[str]]:
+    '''Durations counted in words, like the bio scenes use, along with some texts
+    '''
+    from durations import Durations
+    return Durations(**synthetic.bio_config()['durations']), sentences(size)
+
+
+def geometry_strings(size: int) -> list[str]:
+    load_dialogue_config()  # for the video mode
+    rng = random.Random(0)
+    return [' '.join(str(rng.randint(-500, 1500)) for _ in range(rng.choice((2, 4)))) for _ in range(size)]
+
+
+def geometries(size: int) -> list:
+    from geometry import Geometry
+    return [Geometry.parse(geometry) for geometry in geometry_strings(size)]
+
+
+def resources(size: int) -> list[str]:
+    '''A mix of plain resources and named resources that are up to 3 names deep
+    '''
+    load_dialogue_config()
+    rng = random.Random(0)
+    names = ('textbox', 'frame', 'portraits', 'common')
+    return [rng.choice((f'!{rng.choice(names)}!/file{i}.png', f'plain/file{i}.png')) for i in range(size)]
+
+
+def info_jsons(size: int) -> list[tuple[str, dict]]:
+    from dialogue_gen.characterinfo import merge_down_chain
+
+    load_dialogue_config()
+    names = synthetic.char_names(4)
+    return [(name, merge_down_chain(name)) for name in (names * (size // len(names) + 1))[:size]]
+
+
+def infos(size: int) -> list:
+    from dialogue_gen.characterinfo import CharacterInfo
+    return [CharacterInfo(name=name, **info_json) for name, info_json in info_jsons(size)]
+
+
+def alias_lookups(size: int) -> tuple[Any, list[str]]:
+    '''A context with some local aliases and some global aliases, some of them chained
+    '''
+    from configcontext import ConfigContext
+    from dialogue_gen.characterinfo import CharacterInfo
+
+    load_dialogue_config()
+    names = synthetic.char_names(4)
+    configs.GLOBAL_ALIASES = {f'global_{name}': name for name in names}
+
+    context = ConfigContext(CharacterInfo)
+    for name in names:
+        context.add_local_alias(f'global_{name}', f'local_{name}')
+
+    rng = random.Random(0)
+    prefixes = ('', 'global_', 'local_')
+    return context, [f'{rng.choice(prefixes)}{rng.choice(names)}' for _ in range(size)]
+
+
+def speaker_lines(size: int) -> tuple[Any, list[str]]:
+    '''An ending context and lines like the synthetic ending script, where most lines don't name a speaker
+    '''
+    from configcontext import ConfigContext
+    from ending_gen import econfigs
+    from ending_gen.endinginfo import EndingInfo
+
+    config = synthetic.ending_config()
+    configs.load_into_globals(config)
+    econfigs.load_into_globals(config)
+
+    rng = random.Random(0)
+    names = synthetic.char_names(4) + ['nobody']
+    texts = [f'{rng.choice(names)}: {synthetic.sentence(rng)}' if rng.random() < 0.25 else synthetic.sentence(rng)
+             for _ in range(size)]
+    return ConfigContext(EndingInfo), texts
+
+
+def ending_page(size: int) -> list:
+    return synthetic.ending_page(size)
+
+
+def mlt_tree(size: int):
+    return synthetic.mlt_tree(size)
+
+
+def clip_stacks(size: int) -> tuple[list[list], list[str]]:
+    '''Per-character ClipInfo tracks, with a random character coming to the front now and then
+    '''
+    from dialogue_gen.characterinfo import CharacterInfo
+    from dialogue_gen.generation.char_gen import ClipInfo, Transition
+    from frame import Frame
+
+    rng = random.Random(0)
+    names = synthetic.char_names(4)
+    char_infos = [CharacterInfo(name=name) for name in names]
+
+    tracks = [[] for _ in names]
+    for _ in range(size):
+        front = rng.randrange(len(names)) if rng.random() < 0.3 else None
+        for index, (track, char_info) in enumerate(zip(tracks, char_infos)):
+            track.append(ClipInfo(char_info, Transition.STAY_IN, '1', Frame(10), bring_to_front=index == front))
+
+    return tracks, names
+
+
+# ==========
+# Benchmarks
+# ==========
+
+def calc_durations(texts: list[str]):
+    from dialogue_gen import dconfigs
+    calc_duration = dconfigs.DURATIONS.calc_duration
+    for text in texts:
+        calc_duration(text)
+
+
+def calc_word_durations(durations: tuple[Any, list[str]]):
+    durs, texts = durations
+    for text in texts:
+        durs.calc_duration(text)
+
+
+def parse_dialogue(script: tuple[dict, list[str]]):
+    from dialogue_gen import line_parse
+    line_parse.parseDialogueFile(script[1])
+
+
+def parse_dialogue_parallel(script: tuple[dict, list[str]]):
+    from dialogue_gen import line_parse
+    line_parse.parseDialogueFileParallel(script[1], script[0], PARSE_JOBS)
+
+
+def parse_bio(script: tuple[dict, list[str]]):
+    from bio_gen import line_parse
+    line_parse.parse_bio_file(script[1])
+
+
+def parse_bio_parallel(script: tuple[dict, list[str]]):
+    from bio_gen import line_parse
+    line_parse.parse_bio_file_parallel(script[1], script[0], PARSE_JOBS)
+
+
+def parse_geometries(strings: list[str]):
+    from geometry import Geometry
+    for string in strings:
+        Geometry.parse(string)
+
+
+def format_geometries(geometries: list):
+    for geometry in geometries:
+        str(geometry)
+
+
+def follow_resources(resources: list[str]):
+    from mlt_resource import MltResource
+    for resource in resources:
+        MltResource.follow_if_named(resource)
+
+
+def construct_infos(info_jsons: list[tuple[str, dict]]):
+    from dialogue_gen.characterinfo import CharacterInfo
+    for name, info_json in info_jsons:
+        CharacterInfo(name=name, **info_json)
+
+
+def infos_with_attr(infos: list):
+    for info in infos:
+        info.with_attr('displayName', 'Someone')
+
+
+def follow_aliases(lookups: tuple[Any, list[str]]):
+    context, names = lookups
+    for name in names:
+        context.follow_alias(name)
+
+
+def detect_speakers(lines: tuple[Any, list[str]]):
+    '''Same as the speaker check in ending_gen's process_lines
+    '''
+    from ending_gen import econfigs
+    context, texts = lines
+    for text in texts:
+        if match := econfigs.PARSING.dialoguePattern.match(text):
+            context.char_exists(match.group('name').strip().lower())
+
+
+def flatten_pagegroup(page: list):
+    from ending_gen.generation import text_gen
+    text_gen.flatten_pagegroup(page)
+
+
+def generate_htmls(texts: list[str]):
+    import filters
+    for text in texts:
+        filters.generateHtml(text, 'Linux Biolinum O', 28)
+
+
+def fix_mlt(xml):
+    import mlt_fix
+    mlt_fix.fix_mlt(xml)
+
+
+def order_clips(stacks: tuple[list[list], list[str]]):
+    from dialogue_gen.generation import char_gen
+    char_gen.order_clips(*stacks)
+
+
+BENCHMARKS: list[Benchmark] = [
+    Benchmark('durations.calc_duration', load_durations, calc_durations, len),
+    Benchmark('durations.calc_duration_words', word_durations, calc_word_durations, lambda durs: len(durs[1])),
+    Benchmark('dialogue.parse', dialogue_script, parse_dialogue, lambda script: len(script[1])),
+    Benchmark('dialogue.parse_parallel', dialogue_script, parse_dialogue_parallel, lambda script: len(script[1])),
+    Benchmark('bio.parse', bio_script, parse_bio, lambda script: len(script[1])),
+    Benchmark('bio.parse_parallel', bio_script, parse_bio_parallel, lambda script: len(script[1])),
+    Benchmark('geometry.parse', geometry_strings, parse_geometries, len),
+    Benchmark('geometry.str', geometries, format_geometries, len),
+    Benchmark('mlt_resource.follow_if_named', resources, follow_resources, len),
+    Benchmark('info.construct', info_jsons, construct_infos, len),
+    Benchmark('info.with_attr', infos, infos_with_attr, len),
+    Benchmark('configcontext.follow_alias', alias_lookups, follow_aliases, lambda lookups: len(lookups[1])),
+    Benchmark('ending.detect_speakers', speaker_lines, detect_speakers, lambda lines: len(lines[1])),
+    Benchmark('ending.flatten_pagegroup', ending_page, flatten_pagegroup, len),
+    Benchmark('filters.generateHtml', sentences, generate_htmls, len),
+    Benchmark('mlt_fix.fix_mlt', mlt_tree, fix_mlt, lambda xml: len(xml.findall('producer')), copy_input=True),
+    Benchmark('char_gen.order_clips', clip_stacks, order_clips, lambda stacks: len(stacks[0][0])),
+]
+
+
+# =======
+# Running
+# =======
+
+def measure(benchmark: Benchmark, size: int, repeat: int, min_seconds: float) -> float:
+    '''Runs the benchmark and returns the best ops/sec.
+    Each repeat runs the benchmark as many times as it takes to reach min_seconds.
+    '''
+    data = benchmark.setup(size)
+    ops = benchmark.ops(data)
+
+    best = 0
+    for _ in range(repeat):
+        runs = 0
+        elapsed = 0
+        while elapsed < min_seconds:
+            run_data = copy.deepcopy(data) if benchmark.copy_input else data
+            start = time.perf_counter()
+            benchmark.run(run_data)
+            elapsed += time.perf_counter() - start
+            runs += 1
+        best = max(best, ops * runs / elapsed)
+
+    return best
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = ArgumentParser(description='Runs the micro-benchmarks')
+    parser.add_argument('names', nargs='*', help='only run benchmarks whose name contains one of these')
+    parser.add_argument('--size', type=int, default=10_000, help='number of inputs for each benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='take the best out of this many runs')
+    parser.add_argument('--min-time', type=float, default=0.2, dest='min_time',
+                        help='keep running each repeat for at least this many seconds')
+    parser.add_argument('--save', type=Path, default=None, help='save the results as a json baseline')
+    parser.add_argument('--compare', type=Path, default=None, help='compare the results against a json baseline')
+    args = parser.parse_args()
+
+    benchmarks = [benchmark for benchmark in BENCHMARKS
+                  if len(args.names) == 0 or any(name.lower() in benchmark.name.lower() for name in args.names)]
+
+    baseline: dict[str, float] = {}
+    if args.compare is not None:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+
+    print(f'{"benchmark":<32}{"ops/s":>14}{"baseline":>14}{"change":>10}')
+
+    results: dict[str, float] = {}
+    for benchmark in benchmarks:
+        ops_per_sec = results[benchmark.name] = measure(benchmark, args.size, args.repeat, args.min_time)
+
+        if (before := baseline.get(benchmark.name)) is not None:
+            print(f'{benchmark.name:<32}{ops_per_sec:>14,.0f}{before:>14,.0f}{ops_per_sec / before - 1:>+10.1%}')
+        else:
+            print(f'{benchmark.name:<32}{ops_per_sec:>14,.0f}')
+
+    if args.save is not None:
+        with open(args.save, 'w') as baseline_file:
+            json.dump({
+                'commit': git_commit(),
+                'python': platform.python_version(),
+                'size': args.size,
+                'results': results,
+            }, baseline_file, indent=4)
+        print(f'Saved results to {args.save}')
+
+
+if __name__ == '__main__':
+    main()
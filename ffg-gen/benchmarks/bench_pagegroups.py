@@ -0,0 +1,57 @@
+from argparse import ArgumentParser
+
+from benchmarks import synthetic
+from ending_gen.generation.text_gen import ClipGroup, ClipInfo, PageGroup, flatten_pagegroup
+from frame import Frame
+
+'''Compares ending page flattening against the old version that went back over every clip for each line.
+
+Run from the ffg-gen folder:
+    python -m benchmarks.bench_pagegroups --lines 1000
+'''
+
+
+def quadratic_flatten_pagegroup(pagegroup: PageGroup) -> ClipGroup:
+    '''How flatten_pagegroup used to work, for comparison
+    '''
+    clipgroup: ClipGroup = list()
+
+    curr_offset: Frame = Frame(0)
+    curr_newline_count: int = 0
+
+    for lineinfo in pagegroup:
+        for clipinfo in clipgroup:
+            clipinfo.duration += Frame(1) + lineinfo.duration
+
+        if (text := lineinfo.text) is not None:
+            offset = curr_offset - Frame(1) if curr_offset != 0 else 0
+            clipgroup.append(ClipInfo('\n' * curr_newline_count + text, lineinfo.charInfo, lineinfo.duration, offset))
+            curr_newline_count += text.count('\n') + 1
+
+        curr_offset += Frame(1) + lineinfo.duration
+
+    return clipgroup
+
+
+def main():
+    parser = ArgumentParser(description='Benchmarks ending page flattening')
+    parser.add_argument('--lines', type=int, nargs='+', default=[100, 1000, 3000], help='lines per page')
+    parser.add_argument('--waits', type=float, default=0.3, help='fraction of the lines that are waits')
+    parser.add_argument('--repeat', type=int, default=5, help='take the best time out of this many runs')
+    args = parser.parse_args()
+
+    print(f'{"lines":>8}{"method":>12}{"seconds":>10}')
+
+    for num_lines in args.lines:
+        page = synthetic.ending_page(num_lines, args.waits)
+
+        if flatten_pagegroup(page) != quadratic_flatten_pagegroup(page):
+            raise RuntimeError(f'flatten_pagegroup gave different clips for {num_lines} lines')
+
+        for name, func in (('quadratic', quadratic_flatten_pagegroup), ('linear', flatten_pagegroup)):
+            seconds = synthetic.best_time(lambda: func(page), args.repeat)
+            print(f'{num_lines:>8}{name:>12}{seconds:>10.4f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+from argparse import ArgumentParser
+from pathlib import Path
+
+import configs
+from benchmarks import synthetic
+
+'''Compares serial parsing against --parse-jobs.
+
+Run from the ffg-gen folder:
+    python -m benchmarks.bench_parallel_parse --lines 200000 --chapters 50 --jobs 2 4 8
+'''
+
+
+def main():
+    parser = ArgumentParser(description='Benchmarks parallel parsing against serial parsing')
+    parser.add_argument('--lines', type=int, default=200_000, help='number of lines in each synthetic script')
+    parser.add_argument('--chapters', type=int, default=50, help='number of chapters in each synthetic script')
+    parser.add_argument('--jobs', type=int, nargs='+', default=[2, 4], help='numbers of processes to try')
+    parser.add_argument('--repeat', type=int, default=3, help='take the best time out of this many runs')
+    args = parser.parse_args()
+
+    from dialogue_gen import dconfigs, line_parse as dialogue_parse
+    from bio_gen import bconfigs, line_parse as bio_parse
+
+    scenes = (
+        ('dialogue', synthetic.dialogue_config(), synthetic.dialogue_script, dconfigs,
+         dialogue_parse.parseDialogueFile, dialogue_parse.parseDialogueFileParallel),
+        ('bio', synthetic.bio_config(), synthetic.bio_script, bconfigs,
+         bio_parse.parse_bio_file, bio_parse.parse_bio_file_parallel),
+    )
+
+    print(f'{args.lines} lines, {args.chapters} chapters, {os.cpu_count()} cpus')
+    print(f'{"scene":<10}{"jobs":>6}{"seconds":>10}{"speedup":>10}')
+
+    with tempfile.TemporaryDirectory() as folder:
+        for scene, config, script, scene_configs, parse, parse_parallel in scenes:
+            path = Path(folder) / f'{scene}.txt'
+            synthetic.write_script(path, script(args.lines, args.chapters))
+            with open(path) as input_file:
+                lines = input_file.readlines()
+
+            def load():
+                configs.load_into_globals(config)
+                scene_configs.load_into_globals(config)
+
+            load()
+            serial = synthetic.best_time(lambda: parse(lines), args.repeat)
+            print(f'{scene:<10}{1:>6}{serial:>10.3f}{1:>10.2f}')
+
+            for jobs in args.jobs:
+                load()
+                seconds = synthetic.best_time(lambda: parse_parallel(lines, config, jobs), args.repeat)
+                print(f'{scene:<10}{jobs:>6}{seconds:>10.3f}{serial / seconds:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+
+'''Measures how long the cli takes to start up, using python -X importtime.
+
+Each command is run in a fresh process, so this measures cold starts of the interpreter
+(though the OS file cache will still be warm after the first run).
+Also compares against importing every scene's generation modules, which is what used to happen on every run.
+
+Run from the examples folder, so that the introspection commands can find the configs:
+    python -m benchmarks.bench_startup --repeat 10
+(with the ffg-gen folder on PYTHONPATH), or
+    python ../ffg-gen/benchmarks/bench_startup.py --repeat 10
+'''
+
+FFG_GEN = Path(__file__).resolve().parent.parent
+
+COMMANDS = {
+    'help': [str(FFG_GEN / 'ffg-gen.py'), '-h'],
+    'dialogue -h': [str(FFG_GEN / 'ffg-gen.py'), 'dialogue', '-h'],
+    'list-chapters': [str(FFG_GEN / 'ffg-gen.py'), 'dialogue', '--list-chapters'],
+    'list-components': [str(FFG_GEN / 'ffg-gen.py'), 'dialogue', '--list-components'],
+    'check-config': [str(FFG_GEN / 'ffg-gen.py'), 'dialogue', '--check-config'],
+    'eager imports': ['-c', f'import sys; sys.path.insert(0, {str(FFG_GEN)!r}); '
+                            'import dialogue_gen.dialogue_gen, bio_gen.bio_gen, ending_gen.ending_gen'],
+}
+
+
+def parse_importtime(stderr: str) -> tuple[float, bool]:
+    '''Returns (total import ms, whether vidpy got imported)
+    '''
+    total_us = 0
+    imported_vidpy = False
+
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        self_us, _, name = line.removeprefix('import time:').split('|')
+        total_us += int(self_us)
+        imported_vidpy |= name.strip() == 'vidpy'
+
+    return total_us / 1000, imported_vidpy
+
+
+def run(args: list[str]) -> tuple[float, float, bool]:
+    '''Runs the command once and returns (wall ms, import ms, whether vidpy got imported)
+    '''
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + args,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    import_ms, imported_vidpy = parse_importtime(result.stderr)
+    return wall_ms, import_ms, imported_vidpy
+
+
+def main():
+    parser = ArgumentParser(description='Benchmarks cli startup time')
+    parser.add_argument('--repeat', type=int, default=10, help='take the best time out of this many runs')
+    args = parser.parse_args()
+
+    print(f'{"command":<18}{"wall ms":>10}{"import ms":>12}{"vidpy":>8}')
+    for name, command in COMMANDS.items():
+        runs = [run(command) for _ in range(args.repeat)]
+        wall_ms = min(wall for wall, _, _ in runs)
+        import_ms = min(imports for _, imports, _ in runs)
+        imported_vidpy = any(vidpy for _, _, vidpy in runs)
+        print(f'{name:<18}{wall_ms:>10.1f}{import_ms:>12.1f}{"yes" if imported_vidpy else "no":>8}')
+
+
+if __name__ == '__main__':
+    main()
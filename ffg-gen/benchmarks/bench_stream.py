@@ -0,0 +1,82 @@
+import gc
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from pathlib import Path
+
+import configs
+import line_reader
+from benchmarks import synthetic
+
+'''Compares the peak memory of parsing the whole script up front against --stream.
+
+With --stream, the peak should track the largest chapter instead of the whole script.
+
+Run from the ffg-gen folder:
+    python -m benchmarks.bench_stream --lines 1000000 --chapters 20
+'''
+
+
+def measure(func) -> tuple[float, float]:
+    '''Runs the function and returns (peak MB, seconds)
+    '''
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6, seconds
+
+
+def main():
+    parser = ArgumentParser(description='Benchmarks peak memory with and without streaming')
+    parser.add_argument('--lines', type=int, default=1_000_000, help='number of lines in the synthetic script')
+    parser.add_argument('--chapters', type=int, default=20, help='number of chapters in the synthetic script')
+    parser.add_argument('--generate', action='store_true',
+                        help='also generate the text component for each chapter, not just parse')
+    args = parser.parse_args()
+
+    from dialogue_gen import dconfigs, line_parse
+    from dialogue_gen.generation import text_gen
+
+    config = synthetic.dialogue_config()
+    configs.load_into_globals(config)
+    dconfigs.load_into_globals(config)
+
+    def handle_chapter(lines):
+        if args.generate:
+            text_gen.generate(lines)
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = Path(folder) / 'dialogue.txt'
+        synthetic.write_script(path, synthetic.dialogue_script(args.lines, args.chapters))
+
+        def full():
+            with open(path) as input_file:
+                common_lines, chapters = line_parse.parseDialogueFile(input_file)
+            for lines in chapters.values():
+                handle_chapter(common_lines + lines)
+
+        def streamed():
+            line_parse.scanDialogueFile(line_reader.read_lines(path))
+            for _, lines in line_parse.iterDialogueChapters(line_reader.read_lines(path)):
+                handle_chapter(lines)
+                del lines
+
+        def largest_chapter():
+            chapter = max(line_parse.iterDialogueChapters(line_reader.read_lines(path)),
+                          key=lambda chapter: len(chapter[1]))
+            handle_chapter(chapter[1])
+
+        print(f'{args.lines} lines, {args.chapters} chapters{", generating text" if args.generate else ""}')
+        print(f'{"mode":<18}{"peak MB":>10}{"seconds":>10}')
+        for name, func in (('full', full), ('stream', streamed), ('largest chapter', largest_chapter)):
+            peak, seconds = measure(func)
+            print(f'{name:<18}{peak:>10.1f}{seconds:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+from argparse import ArgumentParser, _SubParsersAction
+
+import cli_args
+
+'''The command line interface for the end-to-end benchmark.
+
+Like the scene clis, the benchmark itself is only imported once we know we're running it.
+'''
+
+SCENES = ['dialogue', 'bio', 'ending']
+
+
+def attach_subparser_to(subparsers: _SubParsersAction) -> None:
+    """Adds the command parser for the benchmark to the subparser"""
+
+    parser: ArgumentParser = subparsers.add_parser(
+        'bench', help='Benchmark the whole pipeline on synthetic scripts of increasing size',
+        description='''Generates synthetic scripts and configs at each size, runs the whole pipeline on each of them,
+        then prints how the time of each phase and the peak memory scale with the size.''')
+
+    parser.add_argument(
+        '--scenes', nargs='+', choices=SCENES, default=SCENES,
+        help='which scenes to benchmark (default all of them)')
+    parser.add_argument(
+        '--sizes', nargs='+', type=cli_args.positive_int, default=[1000, 2000, 4000, 8000],
+        help='number of lines in each synthetic script (default 1000 2000 4000 8000)')
+    parser.add_argument(
+        '--chars', type=cli_args.positive_int, default=4,
+        help='number of characters in each synthetic script (default 4)')
+    parser.add_argument(
+        '--chapters', type=cli_args.positive_int, default=1,
+        help='number of chapters in each synthetic script. The ending scene ignores this. (default 1)')
+    parser.add_argument(
+        '--syslines', type=float, default=None,
+        help='''Fraction of lines that are syslines, like @expression or @wait.
+        Defaults to a typical amount for each scene.''')
+    parser.add_argument(
+        '--melt', type=str, default='standin',
+        help='''Path to the melt binary to benchmark with.
+        Defaults to the built-in stand-in, so that melt itself doesn't get timed.''')
+    parser.add_argument(
+        '--repeat', type=cli_args.positive_int, default=1,
+        help='take the fastest out of this many runs for each size (default 1)')
+    parser.add_argument(
+        '--json', type=str, default=None,
+        help='also write the results to this json file. Give - to print the json instead of the table.')
+    parser.add_argument(
+        '--keep', type=str, default=None,
+        help='keep the synthetic scripts, configs and outputs in this folder instead of a temp folder')
+
+    parser.set_defaults(func=run)
+
+
+def run():
+    from benchmarks import scaling
+    scaling.run(cli_args.ARGS)
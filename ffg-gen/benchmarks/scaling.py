@@ -0,0 +1,166 @@
+import json
+import math
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import Namespace
+from pathlib import Path
+
+from benchmarks import synthetic
+from exceptions import CliError
+
+'''End-to-end scaling benchmark, for `ffg-gen bench`.
+
+Every run is a fresh ffg-gen process on a synthetic script, so the peak memory of each size is measured separately.
+The phases come from the run's --timings-json. Whatever isn't covered by a phase
+(interpreter startup, imports, printing) only shows up in the total.
+'''
+
+FFG_GEN = Path(__file__).resolve().parent.parent / 'ffg-gen.py'
+
+PHASES = ['config', 'parse', 'generate', 'args', 'melt', 'fix', 'serialize', 'write']
+
+
+# =========
+# Synthesis
+# =========
+
+def write_inputs(folder: Path, scene: str, num_lines: int, args: Namespace) -> tuple[Path, Path]:
+    '''Writes the synthetic config and script for the scene into the folder.
+    Returns (config path, script path)
+    '''
+    script_options = dict() if args.syslines is None else {'sysline_rate': args.syslines}
+
+    match scene:
+        case 'dialogue':
+            config = synthetic.dialogue_config(args.chars)
+            script = synthetic.dialogue_script(num_lines, args.chapters, args.chars, **script_options)
+        case 'bio':
+            config = synthetic.bio_config(args.chars)
+            script = synthetic.bio_script(num_lines, args.chapters, args.chars, **script_options)
+        case 'ending':
+            config = synthetic.ending_config(args.chars)
+            script = synthetic.ending_script(num_lines, args.chars, **script_options)
+
+    config_path = folder / f'{scene}_{num_lines}.json'
+    script_path = folder / f'{scene}_{num_lines}.txt'
+    synthetic.write_config(config_path, config)
+    synthetic.write_script(script_path, script)
+    return config_path, script_path
+
+
+# =======
+# Running
+# =======
+
+def run_once(folder: Path, scene: str, num_lines: int, config_path: Path, script_path: Path, melt: str) -> dict:
+    '''Runs ffg-gen on the inputs in a fresh process.
+    Returns the result for the size, with the phase and component timings, total seconds and peak memory
+    '''
+    timings_path = folder / f'{scene}_{num_lines}_timings.json'
+    command = [sys.executable, str(FFG_GEN), scene, 'all',
+               '--config', str(config_path), '--input', str(script_path),
+               '--output', str(folder / f'{scene}_{num_lines}'),
+               '--melt', melt, '--timings-json', str(timings_path)]
+
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=folder, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    total = time.perf_counter() - start
+
+    if result.returncode != 0:
+        raise CliError(f'{scene} failed at {num_lines} lines:\n{result.stderr}')
+
+    with open(timings_path) as timings_file:
+        timings = json.load(timings_file)
+
+    return {
+        'lines': num_lines,
+        'phases': timings['phases'],
+        'components': timings['components'],
+        'total': total,
+        'max_rss_mb': timings['max_rss_mb'],
+    }
+
+
+def run_scene(folder: Path, scene: str, args: Namespace) -> list[dict]:
+    '''Runs the scene at each size, keeping the fastest out of the repeats
+    '''
+    results: list[dict] = []
+
+    for num_lines in sorted(args.sizes):
+        config_path, script_path = write_inputs(folder, scene, num_lines, args)
+        runs = [run_once(folder, scene, num_lines, config_path, script_path, args.melt) for _ in range(args.repeat)]
+        results.append(min(runs, key=lambda result: result['total']))
+
+    return results
+
+
+# =========
+# Reporting
+# =========
+
+def growth(smaller: dict, bigger: dict) -> float | None:
+    '''The exponent k in time ~ lines^k between the two sizes.
+    1 means linear, 2 means quadratic.
+    '''
+    if smaller['lines'] == bigger['lines'] or smaller['total'] <= 0:
+        return None
+    return math.log(bigger['total'] / smaller['total']) / math.log(bigger['lines'] / smaller['lines'])
+
+
+def print_table(scene: str, results: list[dict], args: Namespace):
+    chapters = '' if scene == 'ending' else f', {args.chapters} chapter(s)'
+    print(f'=== {scene} ({args.chars} characters{chapters}) ===')
+
+    print(f'{"lines":>8}' + ''.join(f'{phase:>10}' for phase in PHASES) + f'{"total":>10}{"growth":>8}{"rss MB":>9}')
+
+    previous: dict | None = None
+    for result in results:
+        phases = ''.join(f'{result["phases"].get(phase, 0):>10.3f}' for phase in PHASES)
+        exponent = growth(previous, result) if previous is not None else None
+        exponent = '' if exponent is None else f'{exponent:.2f}'
+        rss = '' if result['max_rss_mb'] is None else f'{result["max_rss_mb"]:.1f}'
+        print(f'{result["lines"]:>8}{phases}{result["total"]:>10.3f}{exponent:>8}{rss:>9}')
+        previous = result
+
+    print()
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True, cwd=FFG_GEN.parent,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: Namespace):
+    with tempfile.TemporaryDirectory() as temp_folder:
+        folder = Path(args.keep or temp_folder)
+        folder.mkdir(parents=True, exist_ok=True)
+
+        results: dict[str, list[dict]] = dict()
+        for scene in args.scenes:
+            results[scene] = run_scene(folder, scene, args)
+            if args.json != '-':
+                print_table(scene, results[scene], args)
+
+    if args.json is not None:
+        output = {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'melt': args.melt,
+            'chars': args.chars,
+            'chapters': args.chapters,
+            'syslines': args.syslines,
+            'results': results,
+        }
+
+        if args.json == '-':
+            print(json.dumps(output, indent=4))
+        else:
+            with open(args.json, 'w') as json_file:
+                json.dump(output, json_file, indent=4)
+            print(f'Saved results to {args.json}')
@@ -0,0 +1,409 @@
+import json
+import random
+import time
+from pathlib import Path
+from typing import Any, Callable, Generator
+from xml.etree.ElementTree import Element, SubElement
+
+'''Generates synthetic configs and scripts for benchmarking.
+
+Everything is seeded, so the same arguments always give the same script.
+The resource paths don't point at real files, so the generated mlt is only good for measuring.
+'''
+
+WORDS = ('the', 'festival', 'youkai', 'shrine', 'forest', 'koto', 'lead', 'follow', 'someone', 'playing',
+         'darkness', 'ground', 'hill', 'outside', 'guitar', 'incident', 'beat', 'source', 'daytime', 'again')
+
+
+def char_names(num_chars: int) -> list[str]:
+    '''Names can't end in digits, since those would get parsed as the expression
+    '''
+    return [f'char{letters(i)}' for i in range(num_chars)]
+
+
+def letters(index: int) -> str:
+    '''0 -> a, 25 -> z, 26 -> ba, ...
+    '''
+    digits = ''
+    while True:
+        index, digit = divmod(index, 26)
+        digits = chr(ord('a') + digit) + digits
+        if index == 0:
+            return digits
+
+
+def sentence(rng: random.Random, min_words: int = 3, max_words: int = 20) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))).capitalize() + '.'
+
+
+# ========
+# Dialogue
+# ========
+
+def dialogue_config(num_chars: int = 4) -> dict:
+    '''A dialogue config with enough info to generate every component
+    '''
+    characters = {name: {
+        'isPlayer': i % 2 == 0,
+        'displayName': name.capitalize(),
+        'geometry': f'{-300 if i % 2 == 0 else 130} {100 + i}',
+        'portraitPathFormat': f'!portraits!{name} {{expression}}.png',
+        'headerOutlineColor': '#fd6666',
+        'headerOverlayPath': f'!portraits!{name} overlay.png',
+        'nametagPath': f'!portraits!{name} nametag.png',
+    } for i, name in enumerate(char_names(num_chars))}
+
+    return {
+        'parsing': {
+            'dialogueRegex': '(?P<name>.+)(?P<expression>\\d+.*): (?P<text>.+)',
+            'shortDialogueRegex': '(?P<name>.+): (?P<text>.+)',
+            'expressionRegex': '(?P<name>.+)(?P<expression>\\d+)'
+        },
+        'componentMacros': {
+            'all': ['nametags', 'text', 'header', 'tfill:!textbox', 'chars:p', 'chars:e', 'group:background']
+        },
+        'resourceNames': {
+            'common': 'assets/common/',
+            'textbox': '!common!/textbox.png',
+            'frame': '!common!/frame.png',
+            'droptextMask': '!common!/drop text mask.png',
+            'portraits': '!common!/portraits/',
+        },
+        'videoMode': {'width': 1280, 'height': 960, 'fps': 30},
+        'durations': {
+            'mode': 'char',
+            'thresholds': [
+                {'count': 0, 'duration': 2.0},
+                {'count': 30, 'duration': 2.5},
+                {'count': 60, 'duration': 3.0},
+                {'count': 80, 'duration': 3.5},
+                {'count': 100, 'duration': 4.5},
+                {'count': 120, 'duration': 5.0},
+            ]
+        },
+        'charInfo': {
+            'common': {
+                'headerGeometry': '108 717 350 42',
+                'headerFont': 'MF KeKe (Noncommercial)',
+                'headerFontSize': 28,
+                'headerWeight': 500,
+                'dialogueGeometry': '104 767 691 133',
+                'dialogueFont': 'Linux Biolinum O',
+                'dialogueFontSize': 28,
+                'dropTextMaskPath': '!droptextMask',
+                'dropTextEnd': 5,
+                'backBrightness': 0.7,
+                'brightnessFadeEnd': 6,
+                'moveEnd': 10,
+                'moveCurve': 'k',
+                'enterEnd': 8,
+                'exitDuration': 0.25,
+                'fadeInEnd': 6,
+                'fadeOutEnd': 6,
+                'nametagGeometry': '6 139',
+                'nametagInOffset': '-20 0',
+                'nametagOutOffset': '10 0',
+                'nametagDur': 4.0,
+                'nametagInDur': 10,
+                'nametagOutDur': 4
+            },
+            'player': {'backOffset': '-36 24', 'offstageOffset': '-72 48'},
+            'enemy': {'backOffset': '36 24', 'offstageOffset': '72 48'},
+        },
+        'aliases': {},
+        'characters': characters,
+    }
+
+
+def dialogue_script(num_lines: int, num_chapters: int = 1, num_chars: int = 4, seed: int = 0,
+                    sysline_rate: float = 0.05) -> Generator[str, None, None]:
+    '''Generates a dialogue script with roughly num_lines lines, split evenly into chapters.
+    Mostly dialogue lines, with about sysline_rate of the lines being the usual syslines.
+    '''
+    rng = random.Random(seed)
+    names = char_names(num_chars)
+    per_chapter = max(1, num_lines // max(1, num_chapters))
+
+    yield '@component background fill:!frame'
+
+    for chapter in range(num_chapters):
+        yield f'=== chapter{chapter}'
+        yield from (f'@expression {name} 1' for name in names)
+        yield '@enterall'
+
+        for i in range(per_chapter):
+            if rng.random() < sysline_rate:
+                match rng.randrange(5):
+                    case 0: yield f'@expression {rng.choice(names)} {rng.randint(1, 5)}'
+                    case 1: yield f'@sleep {rng.choice(("1.0", "15"))}'
+                    case 2: yield f'@set {rng.choice(names)} displayName "Someone"'
+                    case 3: yield '@resetall'
+                    case 4: yield f'!dur +{rng.randint(1, 10)}'
+                continue
+
+            match rng.random():
+                case x if x < 0.01: yield f'# comment {i}'
+                case x if x < 0.04: yield f'{rng.choice(names)}: {sentence(rng)}'
+                case _: yield f'{rng.choice(names)}{rng.randint(1, 5)}: {sentence(rng)}'
+
+
+# ===
+# Bio
+# ===
+
+def bio_config(num_chars: int = 4) -> dict:
+    characters = {name: {
+        'portraitGeometry': '-320 28',
+        'portraitPathFormat': f'!portraits!{name} {{expression}}.png',
+        'titleGeometry': '300 -329',
+        'titlePathFormat': f'!portraits!{name} nametag.png',
+        'bioFontColor': '#73FA79'
+    } for name in char_names(num_chars)}
+
+    return {
+        'componentMacros': {
+            'all': ['text', 'pagenum', 'progressbar', 'tfill:!biobox', 'group:background']
+        },
+        'resourceNames': {
+            'biobox': 'assets/common/bio box.png',
+            'portraits': 'assets/portraits/',
+        },
+        'videoMode': {'width': 1280, 'height': 960, 'fps': 30},
+        'durations': {
+            'mode': 'word',
+            'thresholds': [
+                {'count': 0, 'duration': 20.0},
+                {'count': 20, 'duration': 24.0},
+                {'count': 40, 'duration': 28.0},
+                {'count': 60, 'duration': 30.0},
+                {'count': 80, 'duration': 32.0},
+                {'count': 100, 'duration': 34.0},
+            ]
+        },
+        'bioInfo': {
+            'common': {
+                'bioGeometry': '665 268 551 596',
+                'bioFont': 'Linux Biolinum O',
+                'bioFontSize': 28,
+                'firstFadeInDur': 8,
+                'lastFadeOutDur': 6,
+                'textFadeInDur': 4,
+                'textFadeOutDur': 3,
+                'progbarColor': '#42FFFFFF',
+                'progbarThickness': 200,
+                'progbarFov': 178,
+                'progbarGeometry': '501 333',
+                'progbarFadeOutDur': 10,
+                'pagenumGeometry': '940 747 225 86',
+                'pagenumFont': 'Linux Biolinum O Bold',
+                'pagenumFontSize': 32,
+                'pagenumWeight': 500,
+                'pagenumCropX': 1135
+            }
+        },
+        'characters': characters,
+    }
+
+
+def bio_script(num_lines: int, num_chapters: int = 1, num_chars: int = 4, seed: int = 0,
+               sysline_rate: float = 0) -> Generator[str, None, None]:
+    '''Generates a bio script with roughly num_lines lines, split evenly into chapters.
+    Each page is a few lines of text, with an expression change before about sysline_rate of them.
+    '''
+    rng = random.Random(seed)
+    names = char_names(num_chars)
+    per_chapter = max(1, num_lines // max(1, num_chapters))
+
+    for chapter in range(num_chapters):
+        yield f'=== chapter{chapter}'
+        yield f'@expression {rng.choice(names)} 1'
+
+        lines = 2
+        while lines < per_chapter:
+            yield f'--- {rng.choice(names)}'
+            for _ in range(page_lines := rng.randint(1, 6)):
+                if rng.random() < sysline_rate:
+                    yield f'@expression {rng.choice(names)} {rng.randint(1, 5)}'
+                yield sentence(rng, 5, 30)
+            lines += page_lines + 1
+
+
+# ======
+# Ending
+# ======
+
+def ending_config(num_chars: int = 4) -> dict:
+    characters = {name: {'dialogueFontColor': '#fd6666'} for name in char_names(num_chars)}
+    characters['narrator'] = {}
+
+    return {
+        'parsing': {
+            'dialogueRegex': '(?P<name>.+): (?P<text>.+)'
+        },
+        'componentMacros': {
+            'all': ['text', 'tfill:!gradient', 'bgimage', 'group:background']
+        },
+        'resourceNames': {
+            'gradient': 'assets/ending/ending gradient.png',
+            'image_folder': 'assets/ending/images/',
+            'droptextMask': 'assets/ending/droptext mask.png'
+        },
+        'videoMode': {'width': 1280, 'height': 960, 'fps': 30},
+        'durations': {
+            'mode': 'char',
+            'thresholds': [
+                {'count': 0, 'duration': 2.0},
+                {'count': 30, 'duration': 2.5},
+                {'count': 45, 'duration': 3.0},
+                {'count': 60, 'duration': 3.5},
+                {'count': 80, 'duration': 4.0},
+            ]
+        },
+        'endingInfo': {
+            'common': {
+                'dialogueGeometry': '42 712 1208 222',
+                'dialogueFont': 'Righteous',
+                'dialogueFontSize': 29,
+                'dropTextMaskPath': '!droptextMask',
+                'dropTextDur': 5,
+                'fadeInDur': 8,
+                'fadeOutDur': 6,
+                'bgFadeInDur': 8,
+                'bgFadeOutDur': 6
+            }
+        },
+        'aliases': {},
+        'characters': characters,
+    }
+
+
+def ending_script(num_lines: int, num_chars: int = 4, seed: int = 0,
+                  sysline_rate: float = 0.04) -> Generator[str, None, None]:
+    '''Generates an ending script with roughly num_lines lines.
+    Pages are separated by ---, with about sysline_rate of the lines changing the bg image or waiting.
+    '''
+    rng = random.Random(seed)
+    names = char_names(num_chars)
+
+    yield '@speaker narrator'
+
+    # a page with nothing but waits doesn't generate
+    page_has_text = False
+
+    for i in range(num_lines):
+        if rng.random() < sysline_rate:
+            match rng.randrange(2) if page_has_text else 0:
+                case 0: yield f'@bgimage !image_folder!image {rng.randint(1, 5)}.jpg'
+                case 1: yield f'@wait {rng.choice(("0.5", "10"))}'
+            continue
+
+        match rng.random():
+            case x if x < 0.15 and page_has_text:
+                yield '---'
+                page_has_text = False
+            case x if x < 0.26:
+                yield f'{rng.choice(names)}: {sentence(rng)}'
+                page_has_text = True
+            case _:
+                yield sentence(rng)
+                page_has_text = True
+
+
+def ending_page(num_lines: int, wait_rate: float = 0.3, seed: int = 0) -> list:
+    '''A single ending page (a PageGroup) with num_lines lines, with about wait_rate of them being waits.
+    The char info isn't used by the flattening, so it's left as None.
+    '''
+    from ending_gen.generation.text_gen import LineInfo
+    from frame import Frame
+
+    rng = random.Random(seed)
+    return [LineInfo(None if rng.random() < wait_rate else 'Some text.', None, Frame(rng.randint(15, 150)))
+            for _ in range(num_lines)]
+
+
+# ===
+# Mlt
+# ===
+
+def mlt_tree(num_clips: int, num_tracks: int = 4, seed: int = 0) -> Element:
+    '''An mlt tree shaped like what melt gives us for a generated scene, before mlt_fix gets to it.
+    Each clip gets the filters the text and character components use, including fades.
+    '''
+    rng = random.Random(seed)
+    root = Element('mlt', {'LC_NUMERIC': 'C', 'version': '7', 'root': '', 'producer': 'main_bin'})
+    SubElement(root, 'profile', {'width': '1280', 'height': '960', 'frame_rate_num': '30', 'frame_rate_den': '1'})
+
+    def add_property(parent: Element, name: str, value: str):
+        SubElement(parent, 'property', {'name': name}).text = value
+
+    filter_count = 0
+
+    def add_filter(producer: Element, service: str, **props: str):
+        nonlocal filter_count
+        filter_element = SubElement(producer, 'filter', {'id': f'filter{filter_count}'})
+        filter_count += 1
+        add_property(filter_element, 'mlt_service', service)
+        for name, value in props.items():
+            add_property(filter_element, name, value)
+
+    playlists = [[] for _ in range(num_tracks)]
+    for i in range(num_clips):
+        duration = rng.randint(30, 150)
+        producer = SubElement(root, 'producer', {'id': f'producer{i}', 'in': '0', 'out': str(duration)})
+        add_property(producer, 'resource', '#00000000')
+        add_property(producer, 'mlt_service', 'color')
+
+        match i % 2:
+            case 0:
+                add_filter(producer, 'qtext', html=f'<p>{sentence(rng)}</p>')
+                add_filter(producer, 'mask_start', **{'filter': 'shape', 'filter.mix': '0=0;5=100'})
+                add_filter(producer, 'dynamictext', argument='Name', size='28')
+            case 1:
+                add_filter(producer, 'affine', **{'transition.rect': '0k=-300 100 1280 960;10=-270 100 1280 960'})
+                add_filter(producer, 'brightness', level='0=0.7;6=1')
+                add_filter(producer, 'brightness', alpha='0=0;6=1')
+                add_filter(producer, 'brightness', alpha=f'{duration - 6}=1;{duration}=0')
+
+        playlists[i % num_tracks].append(producer.get('id'))
+
+    for track, producer_ids in enumerate(playlists):
+        playlist = SubElement(root, 'playlist', {'id': f'playlist{track}'})
+        for producer_id in producer_ids:
+            SubElement(playlist, 'entry', {'producer': producer_id})
+
+    tractor = SubElement(root, 'tractor', {'id': 'tractor0'})
+    for track in range(num_tracks):
+        SubElement(tractor, 'track', {'producer': f'playlist{track}'})
+
+    return root
+
+
+# =======
+# Writing
+# =======
+
+def write_config(path: Path, config: dict):
+    with open(path, 'w') as config_file:
+        json.dump(config, config_file, indent=4)
+
+
+def write_script(path: Path, script: Generator[str, None, None]):
+    with open(path, 'w') as script_file:
+        for line in script:
+            script_file.write(line)
+            script_file.write('\n')
+
+
+# ======
+# Timing
+# ======
+
+def best_time(func: Callable[[], Any], repeat: int) -> float:
+    '''Runs the func repeat times and returns the fastest run in seconds
+    '''
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
@@ -1,12 +1,12 @@
 from dataclasses import dataclass, field
 from functools import cache
-from typing import Any, Self
-
-from vidpy.utils import Frame
+from typing import Any, Collection, Self
 
 import configs
 import infohelper
+import stats
 from exceptions import MissingConfigError
+from frame import Frame
 from geometry import Geometry
 from mlt_resource import MltResource
 from . import bconfigs
@@ -85,11 +85,21 @@ class BioInfo(infohelper.Info):
     @classmethod
     @cache
     def of_name(cls, name: str | None) -> Self:
-        if name is None:
-            return BioInfo(**bconfigs.BIO_INFO.get('common'))
+        # only runs on a cache miss
+        with stats.timer(_OF_NAME_STATS):
+            if name is None:
+                return BioInfo(**bconfigs.BIO_INFO.get('common'))
+
+            character_json: dict = merge_down_chain(name)
+            return BioInfo(name=name, **character_json)
+
+    @classmethod
+    def known_names(cls) -> Collection[str]:
+        return bconfigs.CHARACTERS.keys()
+
 
-        character_json: dict = merge_down_chain(name)
-        return BioInfo(name=name, **character_json)
+_OF_NAME_STATS = stats.counter('BioInfo.of_name')
+stats.register_cache('BioInfo.of_name', BioInfo.of_name)
 
 
 # === Config Searching ===
@@ -1,13 +1,13 @@
+import sys
 from dataclasses import dataclass
 
-from vidpy.utils import Frame
-
 from exceptions import LineParseError
-from lines import TextLine, SysLine, parse_common_sysline
+from frame import Frame
+from lines import TextLine, SysLine, COMMON_SYSLINES
 from . import bconfigs
 
 
-@dataclass
+@dataclass(slots=True)
 class BioTextBlock(TextLine):
     '''A single parsed text block from the script.
     Note that this can represent multiple actual lines in the script.
@@ -20,6 +20,10 @@ class BioTextBlock(TextLine):
     duration: Frame = None
 
     def __post_init__(self):
+        # names repeat a lot in big scripts, so share the strings
+        if self.name is not None:
+            self.name = sys.intern(self.name)
+
         if self.duration is None:
             self.duration = bconfigs.DURATIONS.calc_duration(self.text)
 
@@ -28,22 +32,7 @@ class BioTextBlock(TextLine):
 # Bio-specific Syslines
 # ======================
 
-def parse_sysline(line: str) -> SysLine:
-    """Parses a sysline.
-
-    args:
-        line - a sysline with the @ stripped off already
-    """
-    sysline = parse_common_sysline(line)
-    if sysline is not None:
-        return sysline
-
-    match line.split(None, 1):
-        case ['expression', args]: return SetExpr.parseArgs(args.strip())
-        case _: raise LineParseError(f'Unrecognized sysline: {line}')
-
-
-@dataclass
+@dataclass(slots=True)
 class SetExpr(SysLine):
     """Sets the expression for a character.
     Usage: @expression [name] [expression]
@@ -54,5 +43,13 @@ class SetExpr(SysLine):
 
     def parseArgs(args: str):
         match args.split(None, 1):
-            case [name, expression]: return SetExpr(name, expression)
+            case [name, expression]: return SetExpr(sys.intern(name), sys.intern(expression))
             case _: raise LineParseError(f'Invalid args for @expr: {args}')
+
+
+SYSLINES = COMMON_SYSLINES.extended(
+    with_args={
+        'expression': SetExpr.parseArgs,
+    })
+'''All the syslines that can be used in bio scripts
+'''
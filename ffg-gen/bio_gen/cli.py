@@ -0,0 +1,93 @@
+from argparse import ArgumentParser, _SubParsersAction
+
+import cli_args
+import introspection
+import line_reader
+
+'''The command line interface for the bio scene.
+
+This only imports what's needed to set up the parser.
+The generation modules (and vidpy) are imported once we know we're actually generating.
+'''
+
+BUILTIN_COMPONENTS = ['text', 'textsplit', 'progressbar', 'pagenum', 'portrait:[name]', 'title:[name]',
+                      'fill:[resource]', 'tfill:[resource]', 'groups', 'group:[group]']
+
+
+def attach_subparser_to(subparsers: _SubParsersAction, parents) -> None:
+    '''Adds the command parser for bio scene to the subparser'''
+
+    parser: ArgumentParser = subparsers.add_parser(
+        'bio', help='Generate mlt for a bio scene', parents=parents)
+
+    parser.add_argument(
+        'components', nargs='*',
+        help='''
+        Determines which components to generate. Order does matter; layers go from top to bottom.
+
+        You can configure macros in your config json under "componentMacros".
+        Each macro maps to an array of components.
+        Macros can be recursive :)
+
+        Use --list-components to see everything that's available.
+        ''')
+
+    parser.add_argument(
+        '--config', '-j', type=str, default='bio-gen.json',
+        help='path to the config json')
+    parser.add_argument(
+        '--input', '-i', type=str, default='bio.txt',
+        help='path to the input bio file')
+    parser.add_argument(
+        '--chapter', '-c', type=str, default=None,
+        help='Only generate this chapter')
+    parser.add_argument(
+        '--single-output', action='store_const', const=True, default=False, dest='single_output',
+        help='''Put every chapter into a single mlt, one after another, instead of one mlt per chapter.
+        Each chapter gets a marker in Shotcut. With --stream, every chapter still has to be kept until the end.''')
+    parser.add_argument(
+        '--parse-jobs', type=cli_args.positive_int, default=1, dest='parse_jobs',
+        help='''Parse the script in this many processes, split up at the chapters.
+        Only worth it for very big scripts. Ignored with --stream. (default 1)''')
+    parser.add_argument(
+        '--stream', action='store_const', const=True, default=False,
+        help='''Only keep one chapter in memory at a time, for very big scripts.
+        The input gets read twice, so that !define and page totals work the same as usual.''')
+
+    introspection.add_arguments(parser, has_chapters=True)
+
+    parser.set_defaults(func=run)
+
+
+def run():
+    if introspection.requested():
+        introspect()
+        return
+
+    introspection.expect_components()
+
+    from bio_gen import bio_gen
+    bio_gen.bio_gen()
+
+
+def introspect():
+    from bio_gen import bconfigs, line_parse
+    from bio_gen.bioinfo import BioInfo
+
+    introspection.load_config(bconfigs)
+
+    if cli_args.ARGS.check_config:
+        introspection.check_config(BioInfo, bconfigs.CHARACTERS)
+
+    if cli_args.ARGS.list_chapters:
+        introspection.print_chapters(line_parse.scan_bio_file(line_reader.read_lines(cli_args.ARGS.input))[0])
+
+    if cli_args.ARGS.list_components or cli_args.ARGS.plan:
+        with open(cli_args.ARGS.input) as input_file:
+            common_lines, chapters = line_parse.parse_bio_file(input_file)
+        lines = common_lines + [line for chapter in chapters.values() for line in chapter]
+
+        if cli_args.ARGS.list_components:
+            introspection.print_components(BUILTIN_COMPONENTS, lines)
+        if cli_args.ARGS.plan:
+            introspection.print_plan(lines)
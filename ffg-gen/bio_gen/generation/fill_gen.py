@@ -1,9 +1,9 @@
 from vidpy import Clip
-from vidpy.utils import Frame
 
 import configs
 from bio_gen.bioinfo import BioInfo
-from filters import opacityFilterArgs
+from filters import fadeFilterArgs
+from frame import Frame
 from lines import Line
 from mlt_resource import MltResource
 from vidpy_extension.ext_composition import ExtComposition
@@ -27,12 +27,8 @@ def generate(lines: list[Line], resource: MltResource, do_fade: bool) -> ExtComp
     if do_fade:
         bioInfo: BioInfo = BioInfo.of_common()
 
-        fadeInEnd=bioInfo.firstFadeInDur
-        clip.fx('brightness', opacityFilterArgs(f'0=0;{fadeInEnd}=1'))
-
-        fadeOutDur=bioInfo.lastFadeOutDur
-        fadeOutStart = total_duration - fadeOutDur
-        clip.fx('brightness', opacityFilterArgs(f'{fadeOutStart}=1;{total_duration}=0'))
+        for fadeArgs in fadeFilterArgs(total_duration, bioInfo.firstFadeInDur, bioInfo.lastFadeOutDur):
+            clip.fx('brightness', fadeArgs)
 
     return ExtComposition(
         [clip],
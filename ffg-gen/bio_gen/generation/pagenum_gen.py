@@ -2,13 +2,13 @@ from dataclasses import dataclass
 from typing import Generator
 
 from vidpy import Clip
-from vidpy.utils import Frame
 
 import configs
 import filters
 from bio_gen.bioinfo import BioInfo
 from bio_gen.bioline import BioTextBlock
 from configcontext import ConfigContext
+from frame import Frame
 from geometry import Geometry
 from lines import Line, SysLine
 from vidpy_extension.ext_composition import ExtComposition
@@ -95,28 +95,21 @@ def to_clip(clip_info: ClipInfo) -> Clip:
     ))
 
     # apply inbetween fade filters if required
-    if not clip_info.is_first:
-        fade_end = bioInfo.textFadeInDur
-        clip.fx('brightness', filters.opacityFilterArgs(f'0=0;{fade_end}=1'))
-
-    if not clip_info.is_last:
-        fade_start = clip_info.duration - bioInfo.textFadeOutDur
-        clip.fx('brightness', filters.opacityFilterArgs(f'{fade_start}=1;{clip_info.duration}=0'))
+    fadeInDur = None if clip_info.is_first else bioInfo.textFadeInDur
+    fadeOutDur = None if clip_info.is_last else bioInfo.textFadeOutDur
+    for fadeArgs in filters.fadeFilterArgs(clip_info.duration, fadeInDur, fadeOutDur):
+        clip.fx('brightness', fadeArgs)
 
     # apply second text layer
-    text_filter_args = text_filter_args.copy()
-    text_filter_args['argument'] = f'/{clip_info.total_pages}'
+    text_filter_args = filters.intern_args(text_filter_args | {'argument': f'/{clip_info.total_pages}'})
 
     clip.fx('dynamictext', text_filter_args)
 
     # apply boundary fade filters if required
-    if clip_info.is_first:
-        fade_end = bioInfo.firstFadeInDur
-        clip.fx('brightness', filters.opacityFilterArgs(f'0=0;{fade_end}=1'))
-
-    if clip_info.is_last:
-        fade_start = clip_info.duration - bioInfo.lastFadeOutDur
-        clip.fx('brightness', filters.opacityFilterArgs(f'{fade_start}=1;{clip_info.duration}=0'))
+    fadeInDur = bioInfo.firstFadeInDur if clip_info.is_first else None
+    fadeOutDur = bioInfo.lastFadeOutDur if clip_info.is_last else None
+    for fadeArgs in filters.fadeFilterArgs(clip_info.duration, fadeInDur, fadeOutDur):
+        clip.fx('brightness', fadeArgs)
 
     # and we're done!
     return clip
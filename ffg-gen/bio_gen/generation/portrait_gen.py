@@ -2,14 +2,14 @@ from dataclasses import dataclass
 from typing import Generator
 
 from vidpy import Clip
-from vidpy.utils import Frame
 
 import configs
 from bio_gen.bioinfo import BioInfo
 from bio_gen.bioline import BioTextBlock, SetExpr
 from configcontext import ConfigContext
 from exceptions import DialogueGenException
-from filters import affineFilterArgs, opacityFilterArgs
+from filters import affineFilterArgs, fadeFilterArgs
+from frame import Frame
 from lines import Line, SysLine
 from vidpy_extension.ext_composition import ExtComposition
 
@@ -104,15 +104,10 @@ def create_clip(bioInfo: BioInfo, expression: str, duration: Frame, fade_in: boo
     if bioInfo.portraitGeometry:
         clip.fx('affine', affineFilterArgs(bioInfo.portraitGeometry))
 
-    # apply fade in if required
-    if fade_in:
-        fade_end = bioInfo.firstFadeInDur
-        clip.fx('brightness', opacityFilterArgs(f'0=0;{fade_end}=1'))
-
-    # apply fade out if required
-    if fade_out:
-        fadeOutDur = bioInfo.lastFadeOutDur
-        fade_start = duration - fadeOutDur
-        clip.fx('brightness', opacityFilterArgs(f'{fade_start}=1;{duration}=0'))
+    # apply fade in and fade out if required
+    fadeInDur = bioInfo.firstFadeInDur if fade_in else None
+    fadeOutDur = bioInfo.lastFadeOutDur if fade_out else None
+    for fadeArgs in fadeFilterArgs(duration, fadeInDur, fadeOutDur):
+        clip.fx('brightness', fadeArgs)
 
     return clip
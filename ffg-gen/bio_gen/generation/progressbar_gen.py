@@ -1,13 +1,13 @@
 from typing import Generator
 
 from vidpy import Clip
-from vidpy.utils import Frame
 
 import configs
 import filters
 from bio_gen.bioinfo import BioInfo
 from bio_gen.bioline import BioTextBlock
 from configcontext import ConfigContext
+from frame import Frame
 from geometry import Geometry
 from lines import Line, SysLine
 from vidpy_extension.ext_composition import ExtComposition
@@ -76,14 +76,11 @@ def line_to_clip(line: BioTextBlock, bioInfo: BioInfo, is_first: bool, is_last:
     geometry = bioInfo.progbarGeometry
     clip.fx('affine', filters.affineFilterArgs(geometry))
 
-    # fade in
-    fadeInEnd = bioInfo.firstFadeInDur if is_first else bioInfo.textFadeInDur
-    clip.fx('brightness', filters.opacityFilterArgs(f'0=0;{fadeInEnd}=1'))
-
-    # fade out
+    # fade in and fade out
+    fadeInDur = bioInfo.firstFadeInDur if is_first else bioInfo.textFadeInDur
     fadeOutDur = bioInfo.lastFadeOutDur if is_last else bioInfo.progbarFadeOutDur
-    fadeOutStart = line.duration - fadeOutDur
-    clip.fx('brightness', filters.opacityFilterArgs(f'{fadeOutStart}=1;{line.duration}=0'))
+    for fadeArgs in filters.fadeFilterArgs(line.duration, fadeInDur, fadeOutDur):
+        clip.fx('brightness', fadeArgs)
 
     # we're finally done!
     return clip
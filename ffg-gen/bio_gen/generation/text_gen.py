@@ -4,15 +4,17 @@ from itertools import zip_longest
 from typing import Generator, Iterable
 
 from vidpy import Clip
-from vidpy.utils import Frame
 
+import cli_args
 import configs
 import filters
 from bio_gen.bioinfo import BioInfo
 from configcontext import ConfigContext
+from frame import Frame
 from lines import Line, SysLine
 from vidpy_extension.blankclip import BlankClip
 from vidpy_extension.ext_composition import ExtComposition
+from vidpy_extension.timeline import clip_frames, pack_tracks
 
 
 @dataclass
@@ -103,13 +105,11 @@ def to_clip(clip_info: ClipInfo) -> Clip:
     clip.fx('qtext', richTextFilter)
 
     # figure out fade filters
-    fadeInEnd = bioInfo.firstFadeInDur if clip_info.is_first else bioInfo.textFadeInDur
-
+    fadeInDur = bioInfo.firstFadeInDur if clip_info.is_first else bioInfo.textFadeInDur
     fadeOutDur = bioInfo.lastFadeOutDur if clip_info.is_last else bioInfo.textFadeOutDur
-    fadeOutStart = clip_info.duration - fadeOutDur
 
-    clip.fx('brightness', filters.opacityFilterArgs(f'0=0;{fadeInEnd}=1')) \
-        .fx('brightness', filters.opacityFilterArgs(f'{fadeOutStart}=1;{clip_info.duration}=0'))
+    for fadeArgs in filters.fadeFilterArgs(clip_info.duration, fadeInDur, fadeOutDur):
+        clip.fx('brightness', fadeArgs)
 
     return clip
 
@@ -141,6 +141,17 @@ def to_tracks(clip_infos: Iterable[ClipInfo]) -> list[list[Clip]]:
     # split each ClipInfo into a list of single-paragraph ClipInfos
     clip_stacks: list[list[ClipInfo]] = [split_clip_info(clip_info) for clip_info in clip_infos]
 
+    if cli_args.ARGS.pack_tracks:
+        slots = []
+        for clip_stack in clip_stacks:
+            clips = [to_clip(clipinfo) for clipinfo in clip_stack]
+            slots.append((clip_frames(clips[0]), [[clip] for clip in clips]))
+
+        # same as below, the first text goes on the bottom
+        track_list = pack_tracks(slots)
+        track_list.reverse()
+        return track_list
+
     # figure out the maximum number of tracks needed
     num_tracks = max([len(clip_stack) for clip_stack in clip_stacks])
 
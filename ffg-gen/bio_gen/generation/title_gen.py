@@ -1,9 +1,9 @@
 from vidpy import Clip
-from vidpy.utils import Frame
 
 import configs
 from bio_gen.bioinfo import BioInfo
-from filters import affineFilterArgs, opacityFilterArgs
+from filters import affineFilterArgs, fadeFilterArgs
+from frame import Frame
 from lines import Line
 from vidpy_extension.ext_composition import ExtComposition
 
@@ -36,12 +36,8 @@ def generate(lines: list[Line], name: str) -> ExtComposition:
         clip.fx('affine', affineFilterArgs(bioInfo.titleGeometry))
 
     # apply fades
-    fadeInEnd = bioInfo.firstFadeInDur
-    clip.fx('brightness', opacityFilterArgs(f'0=0;{fadeInEnd}=1'))
-
-    fadeOutDur = bioInfo.lastFadeOutDur
-    fadeOutStart = total_duration - fadeOutDur
-    clip.fx('brightness', opacityFilterArgs(f'{fadeOutStart}=1;{total_duration}=0'))
+    for fadeArgs in fadeFilterArgs(total_duration, bioInfo.firstFadeInDur, bioInfo.lastFadeOutDur):
+        clip.fx('brightness', fadeArgs)
 
     return ExtComposition(
         [clip],
@@ -1,11 +1,14 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum, auto
 from typing import Iterable, Generator
 
 import configs
-from bio_gen.bioline import BioTextBlock, parse_sysline
+import parallel_parse
+from bio_gen import bconfigs
+from bio_gen.bioline import BioTextBlock, SYSLINES
 from durations import Frame, to_frame
 from exceptions import LineParseError, DialogueGenException
+from line_grammar import LineGrammar, LineKind, KeywordTable
 from lines import Line
 
 
@@ -21,6 +24,17 @@ class State(Enum):
     IN_BLOCK = auto()
 
 
+@dataclass
+class ParseState:
+    '''The state that carries over from one line to the next while parsing
+    '''
+    # a character set during a text block start
+    # will persist until another character is set
+    curr_name: str | None = None
+    pagenum: int = 0    # pagenum of the last text block
+    pending_directives: list['Directive'] = field(default_factory=list)  # directives waiting for the next text block
+
+
 def parse_bio_file(lines: Iterable[str]) -> tuple[list[Line], dict[str, list[Line]]]:
     '''Parse the script into the internal representation.
     The output is given as a tuple of (common, dict[chapters])
@@ -28,6 +42,78 @@ def parse_bio_file(lines: Iterable[str]) -> tuple[list[Line], dict[str, list[Lin
     # parse all lines
     parsed = list(parse_lines(lines))
 
+    return group_chapters(parsed)
+
+
+def parse_bio_file_parallel(lines: list[str], config: dict, jobs: int) -> tuple[list[Line], dict[str, list[Line]]]:
+    '''Same as parse_bio_file, but splits the script at the chapters and parses the pieces in a process pool.
+
+    args:
+        config: the config json, so the workers can load it
+        jobs: the number of worker processes
+    '''
+    # only unindented chapter markers are safe to split at, since indented ones are just text inside a text block
+    chunks = parallel_parse.split_at_chapters(lines, lambda line: line.startswith('==='), jobs * 2)
+    if jobs <= 1 or len(chunks) <= 1:
+        return parse_bio_file(lines)
+
+    parsed: list[Line] = []
+    parse_state = ParseState()
+
+    for chunk, result in zip(chunks, parallel_parse.map_chunks(parse_chunk, chunks, jobs, init_worker, (config,))):
+        if len(parse_state.pending_directives) > 0:
+            # directives left over from the previous chunk apply to the first text block in this one,
+            # so the worker's result is wrong. Parse this chunk again while carrying them over.
+            parsed += parse_chunk_lines(chunk, parse_state)
+            continue
+
+        # the worker started counting pages from 0 and didn't know the current character
+        for line in result.lines:
+            if isinstance(line, BioTextBlock):
+                line.pagenum += parse_state.pagenum
+                if line.name is None:
+                    line.name = parse_state.curr_name
+
+        parsed += result.lines
+        parallel_parse.apply_defines(result.defines)
+        parse_state = ParseState(
+            curr_name=result.state.curr_name if result.state.curr_name is not None else parse_state.curr_name,
+            pagenum=parse_state.pagenum + result.state.pagenum,
+            pending_directives=result.state.pending_directives)
+
+    return group_chapters(parsed)
+
+
+def init_worker(config: dict):
+    '''Loads the configs in a worker process
+    '''
+    configs.load_into_globals(config)
+    bconfigs.load_into_globals(config)
+
+
+def parse_chunk(chunk: parallel_parse.Chunk) -> parallel_parse.ChunkResult:
+    '''Parses a chunk in a worker process
+    '''
+    parse_state = ParseState()
+    parsed, defines = parallel_parse.record_defines(lambda: parse_chunk_lines(chunk, parse_state))
+    return parallel_parse.ChunkResult(parsed, parse_state, defines)
+
+
+def parse_chunk_lines(chunk: parallel_parse.Chunk, parse_state: ParseState) -> list[Line]:
+    '''Parses a chunk, continuing from the given state
+    '''
+    parsed = list(parse_lines(chunk.lines, chunk.first_lineno, parse_state))
+
+    # the next chunk starts with the same chapter marker
+    if chunk.trailing_marker:
+        parsed.pop()
+
+    return parsed
+
+
+def group_chapters(parsed: list[Line]) -> tuple[list[Line], dict[str, list[Line]]]:
+    '''Sets the total pages, then splits the parsed lines into a tuple of (common, dict[chapters])
+    '''
     # set total_pages on all bio lines
     total_pagenum = len([line for line in parsed if isinstance(line, BioTextBlock)])
     for line in parsed:
@@ -49,6 +135,58 @@ def parse_bio_file(lines: Iterable[str]) -> tuple[list[Line], dict[str, list[Lin
     return common_lines, chapters
 
 
+def scan_bio_file(lines: Iterable[str]) -> tuple[list[str], int]:
+    '''Parses the whole script without keeping any of the lines, for the first pass of --stream.
+    Any !define directives will still be applied.
+
+    returns: the names of all the chapters, and the total number of pages
+    '''
+    chapter_names: list[str] = []
+    total_pagenum: int = 0
+
+    for line in parse_lines(lines):
+        if isinstance(line, ChapterLine):
+            chapter_names.append(line.name)
+        elif isinstance(line, BioTextBlock):
+            total_pagenum += 1
+
+    return chapter_names, total_pagenum
+
+
+def iter_bio_chapters(lines: Iterable[str], total_pagenum: int) -> Generator[tuple[str | None, list[Line]], None, None]:
+    '''Streaming version of parse_bio_file.
+    Yields (chapter name, lines) one chapter at a time, with the common lines already included at the start.
+    Only the current chapter is kept in memory.
+
+    If there are no chapters, yields (None, common lines) once.
+
+    args:
+        total_pagenum: the total number of pages in the whole file, from scan_bio_file
+    '''
+    common_lines: list[Line] = []
+    chapter_name: str | None = None
+    chapter_lines: list[Line] | None = None
+
+    for line in parse_lines(lines):
+        if isinstance(line, BioTextBlock):
+            line.total_pages = total_pagenum
+
+        if isinstance(line, ChapterLine):
+            if chapter_lines is not None:
+                yield chapter_name, chapter_lines
+            chapter_name = line.name
+            chapter_lines = list(common_lines)
+        elif chapter_lines is not None:
+            chapter_lines.append(line)
+        else:
+            common_lines.append(line)
+
+    if chapter_lines is not None:
+        yield chapter_name, chapter_lines
+    else:
+        yield None, common_lines
+
+
 def iterate_by_pairs(iterable: Iterable) -> Generator[tuple[int, int], None, None]:
     '''[1 2 3 4] -> (1 2), (2 3), (3 4)
     '''
@@ -62,11 +200,29 @@ def iterate_by_pairs(iterable: Iterable) -> Generator[tuple[int, int], None, Non
         yield first, second
 
 
-def isComment(line: str) -> bool:
-    return len(line) == 0 or line.startswith('#') or line.startswith('//') or line.startswith('(')
-
-
-def parse_lines(lines: Iterable[str]) -> Generator[Line, None, None]:
+PENDING_GRAMMAR = LineGrammar(
+    comments=('#', '//', '('),
+    prefixes={
+        '@': LineKind.SYSLINE,
+        '!': LineKind.DIRECTIVE,
+        '---': LineKind.BREAK,
+        '===': LineKind.CHAPTER,
+    })
+'''How each line gets classified outside of text blocks
+'''
+
+BLOCK_GRAMMAR = LineGrammar(
+    prefixes={
+        '---': LineKind.BREAK,
+        '===': LineKind.CHAPTER,
+    })
+'''How each line gets classified inside of text blocks.
+Syslines and comments are treated as raw text here.
+'''
+
+
+def parse_lines(lines: Iterable[str], first_lineno: int = 1,
+                parse_state: ParseState | None = None) -> Generator[Line, None, None]:
     '''This is a generator because bio line parsing needs to be stateful.
 
     ### Parsing Logic:
@@ -84,11 +240,17 @@ def parse_lines(lines: Iterable[str]) -> Generator[Line, None, None]:
     They will be treated as raw text inside of text blocks.
 
     '===': Starts a new chapter, which will naturally end the current block.
+
+    args:
+        first_lineno: line number of the first line, if we're not starting from the top of the file
+        parse_state: state to continue from. Will be updated as the lines get parsed.
     '''
+    if parse_state is None:
+        parse_state = ParseState()
+
     state: State = State.PENDING
     buffer: list[str] = []
-    pagenum: int = 0
-    pending_directives: list[Directive] = []
+    pending_directives: list[Directive] = parse_state.pending_directives
 
     def flush_buffer(curr_name: str | None) -> BioTextBlock:
         '''Joins all the accumulated lines into a text block, then clears the accumulator.
@@ -99,12 +261,11 @@ def parse_lines(lines: Iterable[str]) -> Generator[Line, None, None]:
             buffer.pop()
 
         # increment pagenum
-        nonlocal pagenum
-        pagenum += 1
+        parse_state.pagenum += 1
 
         # create text block
         text: str = str.join('\n', buffer)
-        textblock = BioTextBlock(curr_name, text, pagenum)
+        textblock = BioTextBlock(curr_name, text, parse_state.pagenum, lineno=block_start)
 
         # apply any pending directives
         for directive in pending_directives:
@@ -116,88 +277,96 @@ def parse_lines(lines: Iterable[str]) -> Generator[Line, None, None]:
 
         return textblock
 
-    # a character set during a text block start
-    # will persist until another character is set
-    curr_name: str = None
+    # line number of the first line in the current text block
+    block_start: int = None
 
-    for line in lines:
+    for lineno, line in enumerate(lines, start=first_lineno):
         # processing while in pending state
         if state is State.PENDING:
             # strip before processing
             line = line.strip()
 
-            # skip this line if it's empty or it's a comment
-            if isComment(line):
-                continue
-
-            # process this line as a sysline if it begins with @
-            elif line.startswith('@'):
-                yield parse_sysline(line[1:])
-
-            # process this line as a line parse directive if it begins with !
-            elif line.startswith('!'):
-                if (directive := parse_directive(line[1:])) is not None:
-                    pending_directives.append(directive)
-                continue
-
-            # '---*' immediately starts a new text block
-            elif line.startswith('---*'):
-                state = State.IN_BLOCK
-                # determine if we're also setting a new character
-                if char_name := line.removeprefix('---*').strip():
-                    curr_name = char_name
-
-            # '---' sets state to pending
-            elif line.startswith('---'):
-                # we're already in pending state, but this line can also
-                # change the character, so we still need to check that
-                if char_name := line.removeprefix('---').strip():
-                    curr_name = char_name
-
-            # '===' ends the current chapter and starts a new one
-            elif line.startswith('==='):
-                # we don't need to flush the buffer since we're in PENDING state
-                yield ChapterLine(line.removeprefix('===').strip())
-
-            # any other text starts a text block
-            else:
-                state = State.IN_BLOCK
-                buffer.append(line)
+            kind, rest = PENDING_GRAMMAR.classify(line)
+            match kind:
+                # skip this line if it's empty or it's a comment
+                case LineKind.COMMENT:
+                    continue
+
+                # process this line as a sysline if it begins with @
+                case LineKind.SYSLINE:
+                    sysline = SYSLINES.parse(rest)
+                    sysline.lineno = lineno
+                    yield sysline
+
+                # process this line as a line parse directive if it begins with !
+                case LineKind.DIRECTIVE:
+                    if (directive := DIRECTIVES.parse(rest)) is not None:
+                        pending_directives.append(directive)
+                    continue
+
+                # '---*' immediately starts a new text block
+                case LineKind.BREAK if rest.startswith('*'):
+                    state = State.IN_BLOCK
+                    block_start = lineno + 1
+                    # determine if we're also setting a new character
+                    if char_name := rest.removeprefix('*').strip():
+                        parse_state.curr_name = char_name
+
+                # '---' sets state to pending
+                case LineKind.BREAK:
+                    # we're already in pending state, but this line can also
+                    # change the character, so we still need to check that
+                    if char_name := rest.strip():
+                        parse_state.curr_name = char_name
+
+                # '===' ends the current chapter and starts a new one
+                case LineKind.CHAPTER:
+                    # we don't need to flush the buffer since we're in PENDING state
+                    yield ChapterLine(rest.strip())
+
+                # any other text starts a text block
+                case _:
+                    state = State.IN_BLOCK
+                    block_start = lineno
+                    buffer.append(line)
 
         # processing while in text block
         elif state is State.IN_BLOCK:
             # strip right to prevent shenanigans with trailing whitespaces
             line = line.rstrip()
 
-            # '---*' ends the text block and immediately starts a new one
-            if line.startswith('---*'):
-                yield flush_buffer(curr_name)
-                # determine if we're also setting a new character
-                if char_name := line.removeprefix('---*').strip():
-                    curr_name = char_name
-
-            # '---' ends the text block and puts the state in pending
-            elif line.startswith('---'):
-                yield flush_buffer(curr_name)
-                state = State.PENDING
-                # determine if we're also setting a new character
-                if char_name := line.removeprefix('---').strip():
-                    curr_name = char_name
-
-            # '===' ends the current chapter and starts a new one
-            elif line.startswith('==='):
-                # reset everything before moving on
-                yield flush_buffer(curr_name)
-                state = State.PENDING
-                yield ChapterLine(line.removeprefix('===').strip())
-
-            # everything else gets parsed as text in the text block
-            else:
-                buffer.append(line)
+            kind, rest = BLOCK_GRAMMAR.classify(line)
+            match kind:
+                # '---*' ends the text block and immediately starts a new one
+                case LineKind.BREAK if rest.startswith('*'):
+                    yield flush_buffer(parse_state.curr_name)
+                    block_start = lineno + 1
+                    # determine if we're also setting a new character
+                    if char_name := rest.removeprefix('*').strip():
+                        parse_state.curr_name = char_name
+
+                # '---' ends the text block and puts the state in pending
+                case LineKind.BREAK:
+                    yield flush_buffer(parse_state.curr_name)
+                    state = State.PENDING
+                    # determine if we're also setting a new character
+                    if char_name := rest.strip():
+                        parse_state.curr_name = char_name
+
+                # '===' ends the current chapter and starts a new one
+                case LineKind.CHAPTER:
+                    # reset everything before moving on
+                    yield flush_buffer(parse_state.curr_name)
+                    state = State.PENDING
+                    yield ChapterLine(rest.strip())
+
+                # everything else gets parsed as text in the text block, including empty lines
+                case _:
+                    buffer.append(line)
 
     # handle any unterminated text blocks at end
     if len(buffer) > 0:
-        yield flush_buffer(curr_name)
+        yield flush_buffer(parse_state.curr_name)
 
 
 #
@@ -212,13 +381,6 @@ class Directive:
     def apply(self, line: BioTextBlock) -> None: ...
 
 
-def parse_directive(line: str) -> Directive | None:
-    match line.split(None, 1):
-        case ['dur', args]: return Dur.parseArgs(args.strip())
-        case ['define', args]: Define.parseArgs(args.strip())
-        case _: raise LineParseError(f'Unrecognized directive: {line}')
-
-
 @dataclass
 class Dur(Directive):
     ''' Affects the duration of the next BioTextBlock.
@@ -266,3 +428,14 @@ class Define(Directive):
         match line.split(None, 1):
             case [name, value]: configs.RESOURCE_NAMES[name] = value
             case _: LineParseError(f'Unrecognized !define directive: {line}')
+
+
+DIRECTIVES = KeywordTable(
+    'directive',
+    with_args={
+        'dur': Dur.parseArgs,
+        'define': Define.parseArgs,
+    })
+'''All the line parse directives.
+Some directives take effect immediately and return None instead of a Directive.
+'''
@@ -1,5 +1,18 @@
-from argparse import Namespace
+from argparse import ArgumentTypeError, Namespace
 
 ARGS: Namespace
 '''Global constant that holds the parsed cli args
 '''
+
+
+def positive_int(value: str) -> int:
+    '''Argparse type for options that have to be at least 1
+    '''
+    try:
+        number = int(value)
+    except ValueError:
+        raise ArgumentTypeError(f'{value} is not an integer')
+
+    if number < 1:
+        raise ArgumentTypeError(f'{value} has to be at least 1')
+    return number
@@ -0,0 +1,131 @@
+from dataclasses import dataclass, field
+from typing import Callable, Generator, Iterable, TYPE_CHECKING
+
+import timings
+from exceptions import CliError
+
+if TYPE_CHECKING:
+    from lines import Line
+    from vidpy_extension.ext_composition import ExtComposition
+
+'''Turns the components from the command line into a plan of what to generate, for every scene.
+
+Macros and component groups get expanded once up front, instead of while generating,
+which is where loops between them get caught.
+A component that shows up more than once (like a fill that's in both a macro and a group) only gets generated once;
+the other times reuse a copy of what it made, so it still ends up on every layer it was asked for.
+
+Doesn't import vidpy, so that --plan stays quick.
+'''
+
+GROUPS = 'groups'
+GROUP_PREFIX = 'group:'
+
+
+@dataclass
+class PlanStep:
+    component: str                  # a built-in component, with all the macros and groups expanded
+    path: tuple[str, ...]           # the macros and groups it was expanded from, outermost first
+    same_as: int | None = None      # index of the earlier step that generates the exact same thing, if any
+
+
+@dataclass
+class ComponentPlan:
+    steps: list[PlanStep] = field(default_factory=list)
+
+    @property
+    def num_generated(self) -> int:
+        return sum(1 for step in self.steps if step.same_as is None)
+
+
+# ========
+# Planning
+# ========
+
+def group_components(lines: Iterable['Line']) -> dict[str, list[str]]:
+    '''The components in each component group, in order of appearance
+    '''
+    groups: dict[str, list[str]] = dict()
+    for line in lines:
+        if hasattr(line, 'group'):
+            groups.setdefault(line.group, []).append(line.component)
+    return groups
+
+
+def make_plan(components: list[str], lines: Iterable['Line'], macros: dict[str, list[str]]) -> ComponentPlan:
+    '''Expands the macros and groups in the components into a flat plan, in the same order they'd be generated.
+
+    Raises a CliError if a macro or group ends up including itself.
+    '''
+    groups = group_components(lines)
+    plan = ComponentPlan()
+    first_steps: dict[str, int] = dict()
+
+    def expand(component: str, path: tuple[str, ...]):
+        if component in path:
+            cycle = ' -> '.join(path[path.index(component):] + (component,))
+            raise CliError(f'Component macros and groups loop back on themselves: {cycle}')
+
+        # same precedence as the scenes always had; macros can shadow everything else
+        if component in macros:
+            children = macros.get(component)
+        elif component == GROUPS:
+            children = [child for group in groups.values() for child in group]
+        elif component.startswith(GROUP_PREFIX):
+            group = component.removeprefix(GROUP_PREFIX)
+            children = groups.get(group, [])
+            if len(children) == 0:
+                print(f"No components found for component group '{group}'")
+        else:
+            plan.steps.append(PlanStep(component, path, first_steps.get(component)))
+            first_steps.setdefault(component, len(plan.steps) - 1)
+            return
+
+        for child in children:
+            expand(child, path + (component,))
+
+    for component in components:
+        expand(component, ())
+
+    return plan
+
+
+# =======
+# Running
+# =======
+
+def run_plan(plan: ComponentPlan, generate: Callable[[str], Iterable['ExtComposition']]
+             ) -> Generator['ExtComposition', None, None]:
+    '''Generates each step of the plan with the given function, which should handle every built-in component.
+    Steps that are the same as an earlier one get copies of the earlier compositions instead.
+    '''
+    generated: dict[int, list['ExtComposition']] = dict()
+
+    for index, step in enumerate(plan.steps):
+        if step.same_as is not None:
+            print(f'Reusing {step.component}')
+            yield from (composition.duplicate() for composition in generated[step.same_as])
+            continue
+
+        with timings.component(step.component):
+            compositions = list(generate(step.component))
+
+        generated[index] = compositions
+        yield from compositions
+
+
+# =========
+# Reporting
+# =========
+
+def print_plan(plan: ComponentPlan):
+    '''Prints every step of the plan, top layer first
+    '''
+    width = max((len(step.component) for step in plan.steps), default=0)
+
+    for index, step in enumerate(plan.steps):
+        origin = f'  from {" > ".join(step.path)}' if len(step.path) > 0 else ''
+        reused = f'  (same as {step.same_as + 1})' if step.same_as is not None else ''
+        print(f'{index + 1:>3}. {step.component:<{width}}{origin}{reused}')
+
+    print(f'{len(plan.steps)} component(s), {plan.num_generated} to generate')
@@ -1,9 +1,14 @@
 from typing import Self
 
 import configs
+import stats
 from exceptions import MissingConfigError
 from infohelper import Info
 
+_CACHE_STATS = stats.counter('cached_chars')
+_ALIAS_STATS = stats.counter('aliases')
+_SPEAKER_STATS = stats.counter('speaker_index')
+
 
 class ConfigContext:
     '''Encapsulates all the config changes that happens during a run
@@ -20,14 +25,51 @@ class ConfigContext:
         self.tracked_nicks: dict[str, str] = dict()
         self.cached_chars: dict[str, Info] = dict()
 
+        # whether each name that's been checked (before following aliases) is a character, including the misses.
+        # Cleared whenever the local aliases change
+        self.speaker_index: dict[str, bool] = dict()
+
     def char_exists(self, name: str | None, follow_alias: bool = True) -> bool:
         '''Determines if the given character exists.
         Will follow aliases.
 
         None will return True, since None gets the common info
         '''
+        if name is None:
+            return True
+
+        name = str.lower(name)
+
+        if not follow_alias:
+            return self.is_known(name)
+
+        exists = self.speaker_index.get(name)
+
+        if stats.ENABLED:
+            _SPEAKER_STATS.calls += 1
+            if exists is None:
+                _SPEAKER_STATS.misses += 1
+            else:
+                _SPEAKER_STATS.hits += 1
+
+        if exists is None:
+            exists = self.speaker_index[name] = self.is_known(self.follow_alias(name))
+
+        return exists
+
+    def is_known(self, name: str) -> bool:
+        '''Determines if the info for the name can be built, without following aliases.
+        Names that the info class doesn't list are turned down without building anything.
+        A listed name still has to build, since its entry in the config json can be incomplete.
+        '''
+        if name in self.cached_chars:
+            return True
+
+        if (known_names := self.info_class.known_names()) is not None and name not in known_names:
+            return False
+
         try:
-            self.get_char(name, follow_alias)
+            self.cached_chars[name] = self.info_class.of_name(name)
         except MissingConfigError:
             return False
         return True
@@ -46,6 +88,13 @@ class ConfigContext:
         if follow_alias:
             name = self.follow_alias(name)
 
+        if stats.ENABLED:
+            _CACHE_STATS.calls += 1
+            if name in self.cached_chars:
+                _CACHE_STATS.hits += 1
+            else:
+                _CACHE_STATS.misses += 1
+
         # create new Info from default values if not present in cache
         if name not in self.cached_chars:
             self.cached_chars[name] = self.info_class.of_name(name)
@@ -71,9 +120,15 @@ class ConfigContext:
 
         self.cached_chars.pop(name)
 
+        if stats.ENABLED:
+            _CACHE_STATS.evictions += 1
+
     def reset_all_char(self):
         '''Resets all infos by clearing the cache
         '''
+        if stats.ENABLED:
+            _CACHE_STATS.evictions += len(self.cached_chars)
+
         self.cached_chars.clear()
 
     def follow_alias(self, name: str) -> str:
@@ -81,6 +136,13 @@ class ConfigContext:
         Checks the local aliases first.
         Aliases are recursive.
         '''
+        if stats.ENABLED:
+            _ALIAS_STATS.calls += 1
+            if name in self.local_aliases or name in configs.GLOBAL_ALIASES:
+                _ALIAS_STATS.hits += 1
+            else:
+                _ALIAS_STATS.misses += 1
+
         if name in self.local_aliases:
             return self.follow_alias(self.local_aliases.get(name))
 
@@ -93,11 +155,13 @@ class ConfigContext:
         '''Set local alias
         '''
         self.local_aliases[alias] = name
+        self.speaker_index.clear()
 
     def remove_local_alias(self, alias: str):
         '''Removes a local alias
         '''
         self.local_aliases.pop(alias)
+        self.speaker_index.clear()
 
     def track_nick(self, name: str, nick: str):
         '''Adds the nick to the name -> nick dict
@@ -1,5 +1,7 @@
 from dataclasses import dataclass
 
+import stats
+
 '''Configs that are common to all operations
 '''
 
@@ -27,6 +29,8 @@ COMPONENT_MACROS: dict[str, list[str]]
 RESOURCE_NAMES: dict[str, str]
 GLOBAL_ALIASES: dict[str, str]
 
+_ALIAS_STATS = stats.counter('aliases')
+
 
 def load_into_globals(configJson: dict):
     """Load the json config values into the global variables
@@ -66,6 +70,13 @@ def follow_global_alias(name: str):
     Aliases are recursive.
     '''
 
+    if stats.ENABLED:
+        _ALIAS_STATS.calls += 1
+        if name in GLOBAL_ALIASES:
+            _ALIAS_STATS.hits += 1
+        else:
+            _ALIAS_STATS.misses += 1
+
     if name in GLOBAL_ALIASES:
         return follow_global_alias(GLOBAL_ALIASES.get(name))
 
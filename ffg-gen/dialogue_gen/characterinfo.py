@@ -1,11 +1,11 @@
 from dataclasses import dataclass, field
 from functools import cache
-from typing import Any, Self
-
-from vidpy.utils import Frame
+from typing import Any, Collection, Self
 
 import infohelper
+import stats
 from exceptions import MissingConfigError
+from frame import Frame
 from geometry import Geometry, Offset
 from mlt_resource import MltResource
 from . import dconfigs
@@ -77,11 +77,21 @@ class CharacterInfo(infohelper.Info):
     @classmethod
     @cache
     def of_name(cls, name: str | None) -> Self:
-        if name is None:
-            return CharacterInfo(**dconfigs.CHAR_INFO.get('common'))
+        # only runs on a cache miss
+        with stats.timer(_OF_NAME_STATS):
+            if name is None:
+                return CharacterInfo(**dconfigs.CHAR_INFO.get('common'))
+
+            character_json: dict = merge_down_chain(name)
+            return CharacterInfo(name=name, **character_json)
+
+    @classmethod
+    def known_names(cls) -> Collection[str]:
+        return dconfigs.CHARACTERS.keys()
+
 
-        character_json: dict = merge_down_chain(name)
-        return CharacterInfo(name=name, **character_json)
+_OF_NAME_STATS = stats.counter('CharacterInfo.of_name')
+stats.register_cache('CharacterInfo.of_name', CharacterInfo.of_name)
 
 
 # === Config Searching ===
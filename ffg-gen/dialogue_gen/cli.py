@@ -0,0 +1,104 @@
+from argparse import ArgumentParser, _SubParsersAction
+
+import cli_args
+import introspection
+import line_reader
+
+'''The command line interface for the dialogue scene.
+
+This only imports what's needed to set up the parser.
+The generation modules (and vidpy) are imported once we know we're actually generating.
+'''
+
+BUILTIN_COMPONENTS = ['text', 'header', 'chars', 'chars:p', 'chars:e', 'char:[name]', 'fill:[resource]', 'tfill:[resource]',
+                      'nametags', 'groups', 'group:[group]']
+
+
+def attach_subparser_to(subparsers: _SubParsersAction, parents) -> None:
+    """Adds the command parser for dialogue scene to the subparser"""
+
+    parser: ArgumentParser = subparsers.add_parser(
+        'dialogue', help='Generate mlt for a dialogue scene', parents=parents)
+
+    parser.add_argument(
+        'components', nargs='*',
+        help='''
+        Determines which components to generate. Order does matter; layers go from top to bottom.
+        Built-in options: text, header, char:[name], chars, fill:[resource], group:[group], groups
+
+        You can configure macros in your config json under "componentMacros".
+        Each macro maps to an array of components.
+        Macros can be recursive :)
+
+        Use --list-components to see everything that's available.
+        ''')
+
+    parser.add_argument(
+        '--config', '-j', type=str, default='dialogue-gen.json',
+        help='path to the config json')
+    parser.add_argument(
+        '--input', '-i', type=str, default='dialogue.txt',
+        help='path to the input dialogue file')
+    parser.add_argument(
+        '--chapter', '-c', type=str, default=None,
+        help='Only generate this chapter')
+    parser.add_argument(
+        '--single-output', action='store_const', const=True, default=False, dest='single_output',
+        help='''Put every chapter into a single mlt, one after another, instead of one mlt per chapter.
+        Each chapter gets a marker in Shotcut. With --stream, every chapter still has to be kept until the end.''')
+    parser.add_argument(
+        '--incremental', action='store_const', const=True, default=False,
+        help='''Reuse as much as possible from the previous run, only regenerating what changed.
+        The state of each component is checkpointed in the cache directory.''')
+    parser.add_argument(
+        '--cache-dir', type=str, default='.ffg-cache', dest='cache_dir',
+        help='directory to store the checkpoints for --incremental in (default .ffg-cache)')
+    parser.add_argument(
+        '--checkpoint-interval', type=cli_args.positive_int, default=50, dest='checkpoint_interval',
+        help='how many lines between each checkpoint for --incremental (default 50)')
+    parser.add_argument(
+        '--parse-jobs', type=cli_args.positive_int, default=1, dest='parse_jobs',
+        help='''Parse the script in this many processes, split up at the chapters.
+        Only worth it for very big scripts. Ignored with --stream. (default 1)''')
+    parser.add_argument(
+        '--stream', action='store_const', const=True, default=False,
+        help='''Only keep one chapter in memory at a time, for very big scripts.
+        The input gets read twice, so that !define works the same as usual.''')
+
+    introspection.add_arguments(parser, has_chapters=True)
+
+    parser.set_defaults(func=run)
+
+
+def run():
+    if introspection.requested():
+        introspect()
+        return
+
+    introspection.expect_components()
+
+    from dialogue_gen import dialogue_gen
+    dialogue_gen.dialogue_gen()
+
+
+def introspect():
+    from dialogue_gen import dconfigs, line_parse
+    from dialogue_gen.characterinfo import CharacterInfo
+
+    introspection.load_config(dconfigs)
+
+    if cli_args.ARGS.check_config:
+        introspection.check_config(CharacterInfo, dconfigs.CHARACTERS)
+
+    if cli_args.ARGS.list_chapters:
+        introspection.print_chapters(line_parse.scanDialogueFile(line_reader.read_lines(cli_args.ARGS.input)))
+
+    if cli_args.ARGS.list_components or cli_args.ARGS.plan:
+        with open(cli_args.ARGS.input) as input_file:
+            common_lines, chapters = line_parse.parseDialogueFile(input_file)
+        lines = common_lines + [line for chapter in chapters.values() for line in chapter]
+
+        if cli_args.ARGS.list_components:
+            introspection.print_components(BUILTIN_COMPONENTS, lines)
+        if cli_args.ARGS.plan:
+            introspection.print_plan(lines)
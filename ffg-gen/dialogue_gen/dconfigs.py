@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+import re
+from dataclasses import dataclass, field
 
 from durations import Durations
 
@@ -14,6 +15,16 @@ class ParsingConfigs:
     shortDialogueRegex: str
     expressionRegex: str
 
+    # compiled versions of the above, so we don't have to look them up for every line
+    dialoguePattern: re.Pattern = field(init=False, repr=False)
+    shortDialoguePattern: re.Pattern = field(init=False, repr=False)
+    expressionPattern: re.Pattern = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.dialoguePattern = re.compile(self.dialogueRegex)
+        self.shortDialoguePattern = re.compile(self.shortDialogueRegex)
+        self.expressionPattern = re.compile(self.expressionRegex)
+
 
 # === Global Constants ===
 
@@ -1,10 +1,16 @@
 import json
-from argparse import ArgumentParser, _SubParsersAction
 from typing import Generator
 
 import cli_args
+import component_plan
 import configs
+import framerange
+import incremental
+import line_reader
 import mlt_fix
+import parallel_components
+import single_output
+import timings
 from dialogue_gen import dconfigs
 from dialogue_gen import line_parse
 from dialogue_gen.characterinfo import CharacterInfo
@@ -15,48 +21,34 @@ from mlt_resource import MltResource
 from vidpy_extension.ext_composition import ExtComposition
 
 
-def attach_subparser_to(subparsers: _SubParsersAction, parents) -> None:
-    """Adds the command parser for dialogue scene to the subparser"""
-
-    parser: ArgumentParser = subparsers.add_parser(
-        'dialogue', help='Generate mlt for a dialogue scene', parents=parents)
-
-    parser.add_argument(
-        'components', nargs='+',
-        help='''
-        Determines which components to generate. Order does matter; layers go from top to bottom.
-        Built-in options: text, header, char:[name], chars, fill:[resource], group:[group], groups
-
-        You can configure macros in your config json under "componentMacros".
-        Each macro maps to an array of components.
-        Macros can be recursive :)
-        ''')
-
-    parser.add_argument(
-        '--config', '-j', type=str, default='dialogue-gen.json',
-        help='path to the config json')
-    parser.add_argument(
-        '--input', '-i', type=str, default='dialogue.txt',
-        help='path to the input dialogue file')
-    parser.add_argument(
-        '--chapter', '-c', type=str, default=None,
-        help='Only generate this chapter')
-
-    parser.set_defaults(func=dialogue_gen)
-
-
 def dialogue_gen():
     # load config json into global config values
-    with open(cli_args.ARGS.config) as json_file:
+    with timings.phase('config'), open(cli_args.ARGS.config) as json_file:
         json_dict = json.load(json_file)
         configs.load_into_globals(json_dict)
         dconfigs.load_into_globals(json_dict)
 
+    if cli_args.ARGS.stream:
+        dialogue_gen_streamed()
+    else:
+        dialogue_gen_parsed(json_dict)
+
+    if cli_args.ARGS.single_output:
+        single_output.write()
+
+
+def dialogue_gen_parsed(json_dict: dict):
+    '''Parses the whole input file up front, then generates each chapter.
+    Assumes the configs are already loaded.
+    '''
     # load lines from dialogue text file
     common_lines: list[Line] = None
     chapters: dict[str, list[Line]] = None
-    with open(cli_args.ARGS.input) as inputFile:
-        common_lines, chapters = line_parse.parseDialogueFile(inputFile)
+    with timings.phase('parse'), open(cli_args.ARGS.input) as inputFile:
+        if cli_args.ARGS.parse_jobs > 1:
+            common_lines, chapters = line_parse.parseDialogueFileParallel(inputFile.readlines(), json_dict, cli_args.ARGS.parse_jobs)
+        else:
+            common_lines, chapters = line_parse.parseDialogueFile(inputFile)
 
     # determine which chapters to process
     if (chapter_name := cli_args.ARGS.chapter) is not None:
@@ -77,16 +69,62 @@ def dialogue_gen():
             process_chapter(chapter_name, common_lines + lines)
 
 
+def dialogue_gen_streamed():
+    '''Same as dialogue_gen, except the chapters are parsed and generated one at a time.
+    Assumes the configs are already loaded.
+    '''
+    # first pass: apply all the !define directives and find the chapters
+    with timings.phase('parse'):
+        chapter_names: list[str] = line_parse.scanDialogueFile(line_reader.read_lines(cli_args.ARGS.input))
+
+    if (only_chapter := cli_args.ARGS.chapter) is not None and only_chapter not in chapter_names:
+        raise CliError(f'{only_chapter} is not a valid chapter.')
+
+    # the second pass will apply the !define directives again,
+    # so we need to undo that to match the usual behavior of everything being defined up front
+    resource_names: dict[str, str] = dict(configs.RESOURCE_NAMES)
+
+    # second pass: generate each chapter as we get to it
+    for chapter_name, lines in line_parse.iterDialogueChapters(line_reader.read_lines(cli_args.ARGS.input)):
+        if only_chapter is not None and chapter_name != only_chapter:
+            continue
+
+        configs.RESOURCE_NAMES.update(resource_names)
+
+        if chapter_name is not None:
+            print(f'=== Generating for chapter: {chapter_name} ===')
+        process_chapter(chapter_name, lines)
+
+        # let go of the chapter before parsing the next one
+        del lines
+
+
 def process_chapter(chapter_name: str | None, lines: list[Line]):
     '''Processes a single chapter
     Assumes that lines already includes the common lines
     '''
+    incremental.CHAPTER = chapter_name
+
     # generate all compositions
-    compositions: list[ExtComposition] = list(process_components(cli_args.ARGS.components, lines))
+    with timings.phase('generate'):
+        compositions: list[ExtComposition] = list(process_components(cli_args.ARGS.components, lines))
+
+    # only keep the requested range of the timeline, if given
+    if (frame_range := framerange.of_cli_args(lines)) is not None:
+        compositions = framerange.trim_compositions(compositions, frame_range)
+
+        if framerange.is_empty(compositions):
+            print("Nothing to generate in the requested range. Skipping...")
+            return
 
     # reverse the list so components render in left-to-right order of cli args
     compositions.reverse()
 
+    if cli_args.ARGS.single_output:
+        # everything gets written together once all the chapters are done
+        single_output.add_chapter(chapter_name, compositions)
+        return
+
     print("Done generating. Now exporting combined mlt...")
 
     mlt_fix.fix_and_write_mlt(compositions, chapter_name)
@@ -94,24 +132,33 @@ def process_chapter(chapter_name: str | None, lines: list[Line]):
 
 def process_components(components: list[str], lines: list[Line]) -> Generator[ExtComposition, None, None]:
     '''Creates a generator that will process each component.
-    The generator yields the Composition for that component
+    The generator yields the Composition for that component.
+
+    The macros and groups get expanded into a plan first, so that repeated components only get generated once
     '''
-    for component in components:
-        match component:
-            case macro if macro in configs.COMPONENT_MACROS:
-                yield from process_components(configs.COMPONENT_MACROS.get(macro), lines)
-            case 'text': yield from gen_text(lines)
-            case 'header': yield from gen_header(lines)
-            case 'chars': yield from gen_chars(lines)
-            case 'chars:p': yield from gen_sided_chars(lines, True)
-            case 'chars:e': yield from gen_sided_chars(lines, False)
-            case x if x.startswith('char:'): yield from gen_char(lines, x.removeprefix('char:'))
-            case x if x.startswith('fill:'): yield from gen_fill(lines, x.removeprefix('fill:'))
-            case x if x.startswith('tfill:'): yield from gen_tfill(lines, x.removeprefix('tfill:'))
-            case 'nametags': yield from gen_nametags(lines)
-            case 'groups': yield from gen_groups(lines)
-            case x if x.startswith('group:'): yield from gen_group(lines, x.removeprefix('group:'))
-            case _: raise CliError(f'{component} is not a valid component.')
+    plan = component_plan.make_plan(components, lines, configs.COMPONENT_MACROS)
+
+    if cli_args.ARGS.jobs > 1 and plan.num_generated > 1:
+        yield from parallel_components.run_plan(plan, lines, cli_args.ARGS.jobs, dconfigs.load_into_globals, process_component)
+    else:
+        yield from component_plan.run_plan(plan, lambda component: process_component(component, lines))
+
+
+def process_component(component: str, lines: list[Line]) -> Generator[ExtComposition, None, None]:
+    '''Creates a generator for a single built-in component.
+    Expects the macros and groups to already be expanded
+    '''
+    match component:
+        case 'text': yield from gen_text(lines)
+        case 'header': yield from gen_header(lines)
+        case 'chars': yield from gen_chars(lines)
+        case 'chars:p': yield from gen_sided_chars(lines, True)
+        case 'chars:e': yield from gen_sided_chars(lines, False)
+        case x if x.startswith('char:'): yield from gen_char(lines, x.removeprefix('char:'))
+        case x if x.startswith('fill:'): yield from gen_fill(lines, x.removeprefix('fill:'))
+        case x if x.startswith('tfill:'): yield from gen_tfill(lines, x.removeprefix('tfill:'))
+        case 'nametags': yield from gen_nametags(lines)
+        case _: raise CliError(f'{component} is not a valid component.')
 
 
 #
@@ -178,21 +225,3 @@ def gen_tfill(lines: list[Line], resource: str) -> Generator[ExtComposition, Non
 def gen_nametags(lines: list[Line]) -> Generator[ExtComposition, None, None]:
     print(f"Generating nametags")
     yield nametag_gen.generate(lines)
-
-
-def gen_groups(lines: list[Line]) -> Generator[ExtComposition, None, None]:
-    print(f"Generating components for all component groups...")
-
-    components: list[str] = [line.component for line in lines if hasattr(line, 'group')]
-    yield from process_components(components, lines)
-
-
-def gen_group(lines: list[Line], group: str) -> Generator[ExtComposition, None, None]:
-    print(f"Generating components for component group '{group}'")
-
-    components: list[str] = [line.component for line in lines
-                             if getattr(line, 'group', None) == group]
-    if len(components) == 0:
-        print(f"No components found for component group '{group}'")
-
-    yield from process_components(components, lines)
@@ -1,16 +1,15 @@
-import re
+import sys
 from dataclasses import dataclass
 
-from vidpy.utils import Frame
-
 import durations
 from configcontext import ConfigContext
 from exceptions import LineParseError
-from lines import TextLine, SysLine, parse_common_sysline
+from frame import Frame
+from lines import TextLine, SysLine, COMMON_SYSLINES
 from . import dconfigs
 
 
-@dataclass
+@dataclass(slots=True)
 class DialogueLine(TextLine):
     '''A single parsed line from the script.
     The fields are parsed by using the regex in the config json.
@@ -22,41 +21,20 @@ class DialogueLine(TextLine):
     duration: Frame = None
 
     def __post_init__(self):
+        # names and expressions repeat a lot in big scripts, so share the strings
+        self.name = sys.intern(self.name)
+        if self.expression is not None:
+            self.expression = sys.intern(self.expression)
+
         if self.duration is None:
             self.duration = dconfigs.DURATIONS.calc_duration(self.text)
 
 
-def parse_sysline(line: str) -> SysLine:
-    """Parses a sysline.
-
-    args:
-        line - a sysline with the @ stripped off already
-    """
-    sysline = parse_common_sysline(line)
-    if sysline is not None:
-        return sysline
-
-    match line.split(None, 1):
-        case ['expression', args]: return SetExpr.parseArgs(args.strip())
-        case ['enter', args]: return CharEnter.parseArgs(args.strip())
-        case ['enterall']: return CharEnterAll()
-        case ['enterall', args]: return CharEnterAll.parseArgs(args.strip())
-        case ['exit', args]: return CharExit.parseArgs(args.strip())
-        case ['exitall']: return CharExitAll()
-        case ['exitall', args]: return CharExitAll.parseArgs(args.strip())
-        case ['sleep', args]: return Sleep.parseArgs(args.strip())
-        case ['nick', args]: return Nick.parseArgs(args.strip())
-        case ['unnick', args]: return UnNick.parseArgs(args.strip())
-        case ['nametag', args]: return Nametag.parseArgs(args.strip())
-        case ['front', args]: return Front.parseArgs(args.strip())
-        case _: raise LineParseError(f'Unrecognized sysline: {line}')
-
-
 # ===========================
 # Dialogue-specific Syslines
 # ===========================
 
-@dataclass
+@dataclass(slots=True)
 class SetExpr(SysLine):
     """Sets the expression for a character.
     Usage: @expression [name] [expression]
@@ -66,15 +44,15 @@ class SetExpr(SysLine):
     expression: str
 
     def parseArgs(args: str):
-        if matches := re.match(dconfigs.PARSING.expressionRegex, args):
+        if matches := dconfigs.PARSING.expressionPattern.match(args):
             return SetExpr(
-                name=matches.group('name').lower().strip(),
-                expression=matches.group('expression').strip())
+                name=sys.intern(matches.group('name').lower().strip()),
+                expression=sys.intern(matches.group('expression').strip()))
         else:
             raise LineParseError(f'Invalid args for @expr: {args}')
 
 
-@dataclass
+@dataclass(slots=True)
 class CharEnter(SysLine):
     """Forces the character to enter the screen.
     By default, all characters will start offscreen and won't enter until explicitly declared
@@ -90,7 +68,7 @@ class CharEnter(SysLine):
             case _: raise LineParseError(f'Invalid args for @enter: {args}')
 
 
-@dataclass
+@dataclass(slots=True)
 class CharEnterAll(SysLine):
     """Forces all characters to enter the screen.
     Optionally lets you only affect the characters on a given side.
@@ -106,7 +84,7 @@ class CharEnterAll(SysLine):
             case _: raise LineParseError(f'Invalid args for @enterall: {args}')
 
 
-@dataclass
+@dataclass(slots=True)
 class CharExit(SysLine):
     """Forces the character to exit the screen.
     By default, all characters will automatically exit at the end of the scene
@@ -122,7 +100,7 @@ class CharExit(SysLine):
             case _: raise LineParseError(f'Invalid args for @exit: {args}')
 
 
-@dataclass
+@dataclass(slots=True)
 class CharExitAll(SysLine):
     """Forces all characters to exit the screen.
     Optionally lets you only affect the characters on a given side.
@@ -138,7 +116,7 @@ class CharExitAll(SysLine):
             case _: raise LineParseError(f'Invalid args for @exitall: {args}')
 
 
-@dataclass
+@dataclass(slots=True)
 class Sleep(SysLine):
     """Makes nothing happen for the given duration.
     `tfill` components will not display during this time.
@@ -155,7 +133,7 @@ class Sleep(SysLine):
             case _: raise LineParseError(f'Invalid args for @sleep: {args}')
 
 
-@dataclass
+@dataclass(slots=True)
 class Nick(SysLine):
     '''Basically a shorthand for @alias [name] [alias] + @set [name] displayName [alias]
     Nicks are tracked separately, so that an unnick doesn't remove existing aliases
@@ -182,7 +160,7 @@ class Nick(SysLine):
         context.update_char(new_charInfo)
 
 
-@dataclass
+@dataclass(slots=True)
 class UnNick(SysLine):
     '''Undoes the effects of a @nick. 
     Unique in that it takes the original name instead of the nick, and won't remove existing aliases.
@@ -208,7 +186,7 @@ class UnNick(SysLine):
             context.remove_local_alias(nickname)
 
 
-@dataclass
+@dataclass(slots=True)
 class Nametag(SysLine):
     '''Queues the start of a nametag animation
 
@@ -223,7 +201,7 @@ class Nametag(SysLine):
             case _: raise LineParseError(f'Invalid args for @nametag: {args}')
 
 
-@dataclass
+@dataclass(slots=True)
 class Front(SysLine):
     '''Forcibly brings the character to the front.
     The behavior is undefined if multiple characters are eligible to be brought to front.
@@ -237,3 +215,24 @@ class Front(SysLine):
         match args.split():
             case [name]: return Front(name)
             case _: raise LineParseError(f'Invalid args for @front: {args}')
+
+
+SYSLINES = COMMON_SYSLINES.extended(
+    with_args={
+        'expression': SetExpr.parseArgs,
+        'enter': CharEnter.parseArgs,
+        'enterall': CharEnterAll.parseArgs,
+        'exit': CharExit.parseArgs,
+        'exitall': CharExitAll.parseArgs,
+        'sleep': Sleep.parseArgs,
+        'nick': Nick.parseArgs,
+        'unnick': UnNick.parseArgs,
+        'nametag': Nametag.parseArgs,
+        'front': Front.parseArgs,
+    },
+    without_args={
+        'enterall': CharEnterAll,
+        'exitall': CharExitAll,
+    })
+'''All the syslines that can be used in dialogue scripts
+'''
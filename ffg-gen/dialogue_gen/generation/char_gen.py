@@ -3,18 +3,22 @@ from enum import Enum
 from typing import Generator, Iterable
 
 from vidpy import Clip
-from vidpy.utils import Frame
 
+import cli_args
 import configs
+import incremental
+import keyframes
 from configcontext import ConfigContext
 from dialogue_gen.characterinfo import CharacterInfo
 from dialogue_gen.dialogueline import DialogueLine, SetExpr, Sleep, CharEnter, CharEnterAll, CharExit, CharExitAll, \
     Front
 from exceptions import DialogueGenException
 from filters import affineFilterArgs, brightnessFilterArgs, opacityFilterArgs
+from frame import Frame
 from lines import Line, SysLine
 from vidpy_extension.blankclip import BlankClip
 from vidpy_extension.ext_composition import ExtComposition
+from vidpy_extension.timeline import clip_frames, pack_tracks
 
 
 # === Objects ====
@@ -104,9 +108,13 @@ def generate_sided(lines: list[Line], names: list[str]) -> Generator[ExtComposit
         return
 
     # process lines and then the track stacks
-    processed_lines: list[Generator[ClipInfo]] = [processLines(lines, name) for name in names]
+    processed_lines: list[list[ClipInfo]] = [processLines(lines, name) for name in names]
     track_list: list[list[ClipInfo]] = order_clips(processed_lines, names)
 
+    if cli_args.ARGS.pack_tracks:
+        yield from generate_packed(track_list)
+        return
+
     # now convert each track list to a Composition
     for track in track_list:
         clips = [clip_info.to_clip() for clip_info in track]
@@ -118,6 +126,26 @@ def generate_sided(lines: list[Line], names: list[str]) -> Generator[ExtComposit
             fps=configs.VIDEO_MODE.fps)
 
 
+def generate_packed(track_list: list[list[ClipInfo]]) -> Generator[ExtComposition, None, None]:
+    '''Same as converting each track to a Composition,
+    except characters that are offscreen don't take up a track, so the ones that are onscreen can move down.
+    '''
+    slots = []
+    for clip_stack in zip(*track_list):
+        clips = [clip_info.to_clip() for clip_info in clip_stack]
+        items = [None if clip_info.transition is Transition.STAY_OFFSCREEN else [clip]
+                 for clip_info, clip in zip(clip_stack, clips)]
+        slots.append((clip_frames(clips[0]), items))
+
+    for clips in pack_tracks(slots):
+        yield ExtComposition(
+            clips,
+            singletrack=True,
+            width=configs.VIDEO_MODE.width,
+            height=configs.VIDEO_MODE.height,
+            fps=configs.VIDEO_MODE.fps)
+
+
 def order_clips(processed_lines: list[Iterable[ClipInfo]], names: list[str]) -> list[list[ClipInfo]]:
     '''Stacks the clips from the tracks into the right order.
     Make sure the speaker is always in front and the characters don't randomly change order.
@@ -153,22 +181,33 @@ def order_clips(processed_lines: list[Iterable[ClipInfo]], names: list[str]) ->
 
 # === Processing Lines ===
 
-def processLines(lines: list[Line], targetName: str) -> Generator[ClipInfo, None, None]:
-    """Returns a generator that returns a stream of ClipInfo
+def processLines(lines: list[Line], targetName: str) -> list[ClipInfo]:
+    """Processes the lines into a list of ClipInfo for the target character
+    """
+    return incremental.process(f'char:{targetName}', CharProcessor(targetName), lines)
+
+
+class CharProcessor(incremental.LineProcessor):
+    """Keeps track of the state of the target character while going through the lines
     """
-    # Initialize context
-    context = ConfigContext(CharacterInfo)
 
-    # Initialize state to offscreen
-    curr_state: State = State.OFFSCREEN
-    curr_expression: str = None
-    curr_speaker: str = None
-    pending_transition: Transition = None
-    has_pending_front: bool = False
+    def __init__(self, targetName: str):
+        self.targetName: str = targetName
+
+        # Initialize context
+        self.context = ConfigContext(CharacterInfo)
+
+        # Initialize state to offscreen
+        self.curr_state: State = State.OFFSCREEN
+        self.curr_expression: str = None
+        self.curr_speaker: str = None
+        self.pending_transition: Transition = None
+        self.has_pending_front: bool = False
 
-    # === start of loop ===
+    def process(self, line: Line) -> list[ClipInfo]:
+        targetName = self.targetName
+        context = self.context
 
-    for line in lines:
         # always run the pre_hook first if it's a sysline
         if isinstance(line, SysLine):
             line.pre_hook(context)
@@ -177,83 +216,84 @@ def processLines(lines: list[Line], targetName: str) -> Generator[ClipInfo, None
         match line:
             case DialogueLine(name=name, expression=expression):
                 # store the new values from the dialogueLine
-                curr_speaker = context.follow_alias(name)
-                if curr_speaker == targetName and expression is not None:
-                    curr_expression = expression
+                self.curr_speaker = context.follow_alias(name)
+                if self.curr_speaker == targetName and expression is not None:
+                    self.curr_expression = expression
 
             case Sleep():
                 # we fall through and generate a clip using the previous line's state,
                 # except there is no speaker
-                curr_speaker = None
+                self.curr_speaker = None
 
             case SetExpr(name=name, expression=expression) if context.follow_alias(name) == targetName:
                 # set the expression, then continue to next dialogue line
-                curr_expression = expression
-                continue
+                self.curr_expression = expression
+                return []
 
             case CharEnter(name=name) if context.follow_alias(name) == targetName:
                 # force an enter transition on the next dialogue line
-                curr_state = State.PENDING_ENTER
-                continue
+                self.curr_state = State.PENDING_ENTER
+                return []
 
             case CharEnterAll(is_player=is_player) if (is_player is None) or (is_player == context.get_char(targetName).isPlayer):
                 # force an enter transition on the next dialogue line
-                curr_state = State.PENDING_ENTER
-                continue
+                self.curr_state = State.PENDING_ENTER
+                return []
 
             case CharExit(name=name) if context.follow_alias(name) == targetName:
                 # force an exit transition on the next dialogue line
-                match curr_state:
-                    case State.FRONT: pending_transition = Transition.FULL_EXIT
-                    case State.BACK: pending_transition = Transition.HALF_EXIT
-                continue
+                match self.curr_state:
+                    case State.FRONT: self.pending_transition = Transition.FULL_EXIT
+                    case State.BACK: self.pending_transition = Transition.HALF_EXIT
+                return []
 
             case CharExitAll(is_player=is_player) if (is_player is None) or (is_player == context.get_char(targetName).isPlayer):
                 # force an exit transition on the next dialogue line
-                match curr_state:
-                    case State.FRONT: pending_transition = Transition.FULL_EXIT
-                    case State.BACK: pending_transition = Transition.HALF_EXIT
-                continue
+                match self.curr_state:
+                    case State.FRONT: self.pending_transition = Transition.FULL_EXIT
+                    case State.BACK: self.pending_transition = Transition.HALF_EXIT
+                return []
 
             case Front(name=name) if name == targetName:
                 # force bring_to_front on the next line
-                has_pending_front = True
-                continue
+                self.has_pending_front = True
+                return []
 
-            case _: continue
+            case _: return []
 
-        # this part will get run unless continue got called in the match statement
+        # this part will get run unless we returned early in the match statement
         # make sure whatever line makes it down here has a duration field
 
         # if no pending transition, then determine transition depending on current conditions
-        is_speaker: bool = curr_speaker == targetName
-        if pending_transition is None:
-            pending_transition = determine_transition(curr_state, is_speaker)
+        is_speaker: bool = self.curr_speaker == targetName
+        if self.pending_transition is None:
+            self.pending_transition = determine_transition(self.curr_state, is_speaker)
 
         # determine whether to bring character to front, and reset any pending @front
-        bring_to_front: bool = is_speaker or has_pending_front
-        has_pending_front = False
+        bring_to_front: bool = is_speaker or self.has_pending_front
+        self.has_pending_front = False
 
         charInfo: CharacterInfo = context.get_char(targetName, False)
 
         # generate clip using the transition
-        yield ClipInfo(charInfo, pending_transition, curr_expression, line.duration, line, bring_to_front)
+        clip_info = ClipInfo(charInfo, self.pending_transition, self.curr_expression, line.duration, line, bring_to_front)
 
         # update state and reset pending transition
-        curr_state = Transition.state_after(pending_transition)
-        pending_transition = None
+        self.curr_state = Transition.state_after(self.pending_transition)
+        self.pending_transition = None
 
-    # === end of loop ===
+        return [clip_info]
 
-    # grab charInfo again
-    charInfo: CharacterInfo = context.get_char(targetName, False)
-    exitDuration: Frame = charInfo.exitDuration
+    def finish(self) -> list[ClipInfo]:
+        # grab charInfo again
+        charInfo: CharacterInfo = self.context.get_char(self.targetName, False)
+        exitDuration: Frame = charInfo.exitDuration
 
-    # final exit
-    match curr_state:
-        case State.FRONT: yield ClipInfo(charInfo, Transition.FULL_EXIT, curr_expression, exitDuration)
-        case State.BACK: yield ClipInfo(charInfo, Transition.HALF_EXIT, curr_expression, exitDuration)
-        case _: yield ClipInfo(charInfo, Transition.STAY_OFFSCREEN, curr_expression, exitDuration)
+        # final exit
+        match self.curr_state:
+            case State.FRONT: return [ClipInfo(charInfo, Transition.FULL_EXIT, self.curr_expression, exitDuration)]
+            case State.BACK: return [ClipInfo(charInfo, Transition.HALF_EXIT, self.curr_expression, exitDuration)]
+            case _: return [ClipInfo(charInfo, Transition.STAY_OFFSCREEN, self.curr_expression, exitDuration)]
 
 
 def determine_transition(curr_state: State, is_speaker: bool) -> Transition:
@@ -298,17 +338,17 @@ def create_clip(transition: Transition, charInfo: CharacterInfo, expression: str
 
     # apply fade in if required
     if transition in (Transition.FULL_ENTER, Transition.HALF_ENTER):
-        fade_end = charInfo.fadeInEnd
-        clip.fx('brightness', opacityFilterArgs(f'0=0;{fade_end}=1'))
+        clip.fx('brightness', opacityFilterArgs(keyframes.fade_in(charInfo.fadeInEnd)))
 
     # apply fade out if required
     if transition in (Transition.FULL_EXIT, Transition.HALF_EXIT):
-        fade_end = charInfo.fadeOutEnd
-        clip.fx('brightness', opacityFilterArgs(f'0=1;{fade_end}=0'))
+        clip.fx('brightness', opacityFilterArgs(keyframes.fade_out(0, charInfo.fadeOutEnd)))
 
     return clip
 
 
+@keyframes.cache_per_info('geometry', 'frontOffset', 'backOffset', 'offstageOffset',
+                          'moveEnd', 'moveCurve', 'enterEnd')
 def determine_movement_rect(transition: Transition, charInfo: CharacterInfo) -> str:
     moveEnd = charInfo.moveEnd
     moveCurve = charInfo.moveCurve
@@ -333,11 +373,12 @@ def determine_movement_rect(transition: Transition, charInfo: CharacterInfo) ->
         case Transition.HALF_EXIT:
             return f'0{moveCurve}={backGeometry};{moveEnd}={offstageBackGeometry}'
         case Transition.STAY_IN:
-            return frontGeometry
+            return str(frontGeometry)
         case Transition.STAY_OUT:
-            return backGeometry
+            return str(backGeometry)
 
 
+@keyframes.cache_per_info('brightnessFadeEnd', 'frontBrightness', 'backBrightness')
 def determine_brightness_levels(transition: Transition, charInfo: CharacterInfo) -> str:
     fade_end = charInfo.brightnessFadeEnd
     full_level = charInfo.frontBrightness
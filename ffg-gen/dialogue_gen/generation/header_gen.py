@@ -1,25 +1,22 @@
 from vidpy import Clip
-from vidpy.utils import Frame
 
 import configs
+import incremental
 from configcontext import ConfigContext
 from dialogue_gen.characterinfo import CharacterInfo
 from dialogue_gen.dialogueline import Sleep
+from frame import Frame
 from lines import Line, SysLine
 from mlt_resource import MltResource
 from vidpy_extension.blankclip import BlankClip
 from vidpy_extension.ext_composition import ExtComposition
 
 
-def filter_none(lines: list) -> list:
-    return [line for line in lines if line is not None]
-
-
 def generate(lines: list[Line]) -> ExtComposition:
     """Processes the list of lines into a Composition
     """
-    context = ConfigContext(CharacterInfo)
-    clips: list[Clip] = filter_none([lineToClip(line, context) for line in lines])
+    processor = incremental.ContextProcessor(CharacterInfo, lineToClip)
+    clips: list[Clip] = incremental.process('header', processor, lines)
 
     return ExtComposition(
         clips,
@@ -2,13 +2,15 @@ from dataclasses import dataclass
 from typing import Generator
 
 from vidpy import Clip
-from vidpy.utils import Frame
 
 import configs
+import incremental
+import keyframes
 from configcontext import ConfigContext
 from dialogue_gen.characterinfo import CharacterInfo
 from dialogue_gen.dialogueline import Nametag
-from filters import affineFilterArgs, opacityFilterArgs
+from filters import affineFilterArgs, fadeFilterArgs
+from frame import Frame
 from lines import Line, SysLine
 from vidpy_extension.blankclip import BlankClip
 from vidpy_extension.ext_composition import ExtComposition
@@ -41,24 +43,36 @@ def generate(lines: list[Line]) -> ExtComposition:
         fps=configs.VIDEO_MODE.fps)
 
 
-def find_nametag_clips(lines: list[Line]) -> Generator[NametagClipInfo, None, None]:
+def find_nametag_clips(lines: list[Line]) -> list[NametagClipInfo]:
     '''Calculates the start frame and info of each nametag clip.
     '''
-    context = ConfigContext(CharacterInfo)
-    curr_frame = Frame(0)
+    return incremental.process('nametags', NametagProcessor(), lines)
+
+
+class NametagProcessor(incremental.LineProcessor):
+    '''Finds the nametags while keeping track of the current frame
+    '''
+
+    def __init__(self):
+        self.context = ConfigContext(CharacterInfo)
+        self.curr_frame = Frame(0)
+
+    def process(self, line: Line) -> list[NametagClipInfo]:
+        clip_infos = []
 
-    for line in lines:
         if isinstance(line, SysLine):
             # always run the pre_hook first if it's a sysline
-            line.pre_hook(context)
+            line.pre_hook(self.context)
 
             if isinstance(line, Nametag):
                 # -1 because the extra frame only applies to blank clips
-                yield NametagClipInfo(Frame(curr_frame - 1), context.get_char(line.name))
+                clip_infos.append(NametagClipInfo(Frame(self.curr_frame - 1), self.context.get_char(line.name)))
 
         if hasattr(line, 'duration'):
             # +1 to account for the 1 frame gap between clips
-            curr_frame += line.duration + 1
+            self.curr_frame += line.duration + 1
+
+        return clip_infos
 
 
 def process_clip_infos(clip_infos: list[NametagClipInfo]) -> Generator[Clip, None, None]:
@@ -83,21 +97,23 @@ def create_nametag_clip(char_info: CharacterInfo) -> Clip:
     clip = Clip(str(char_info.nametagPath), start=Frame(0)) \
         .set_duration(char_info.nametagDur)
 
+    # apply geometry (including movement)
+    clip.fx('affine', affineFilterArgs(determine_nametag_rect(char_info)))
+
+    # apply fade in and fade out
+    for fadeArgs in fadeFilterArgs(char_info.nametagDur, char_info.nametagInDur, char_info.nametagOutDur):
+        clip.fx('brightness', fadeArgs)
+
+    return clip
+
+
+@keyframes.cache_per_info('nametagGeometry', 'nametagInOffset', 'nametagOutOffset',
+                          'nametagDur', 'nametagInDur', 'nametagOutDur')
+def determine_nametag_rect(char_info: CharacterInfo) -> str:
     in_end = char_info.nametagInDur
     out_start = char_info.nametagDur - char_info.nametagOutDur
 
-    # apply geometry (including movement)
     start_geometry = char_info.nametagGeometry + char_info.nametagInOffset
     end_geometry = char_info.nametagGeometry + char_info.nametagOutOffset
-    clip.fx('affine', affineFilterArgs(
-        f'0={start_geometry};{in_end}={char_info.nametagGeometry};{out_start}={
-            char_info.nametagGeometry};{char_info.nametagDur}={end_geometry}'
-    ))
-
-    # apply fade in
-    clip.fx('brightness', opacityFilterArgs(f'0=0;{in_end}=1'))
-
-    # apply fade out
-    clip.fx('brightness', opacityFilterArgs(f'{out_start}=1;{char_info.nametagDur}=0'))
-
-    return clip
+    return f'0={start_geometry};{in_end}={char_info.nametagGeometry};' \
+           f'{out_start}={char_info.nametagGeometry};{char_info.nametagDur}={end_geometry}'
@@ -2,10 +2,10 @@ from dataclasses import dataclass
 from typing import Generator
 
 from vidpy import Clip
-from vidpy.utils import Frame
 
 import configs
 from dialogue_gen.dialogueline import Sleep
+from frame import Frame
 from lines import Line
 from mlt_resource import MltResource
 from vidpy_extension.blankclip import BlankClip
@@ -1,11 +1,12 @@
-import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Iterable, Generator
 
 import configs
-from dialogue_gen.dialogueline import DialogueLine, parse_sysline
+import parallel_parse
+from dialogue_gen.dialogueline import DialogueLine, SYSLINES
 from durations import Frame, to_frame
 from exceptions import LineParseError, DialogueGenException
+from line_grammar import LineGrammar, LineKind, KeywordTable
 from lines import Line
 from . import dconfigs
 
@@ -17,6 +18,13 @@ class ChapterLine:
     name: str
 
 
+@dataclass
+class ParseState:
+    '''The state that carries over from one line to the next while parsing
+    '''
+    pending_directives: list['Directive'] = field(default_factory=list)  # directives waiting for the next dialogue line
+
+
 def parseDialogueFile(lines: Iterable[str]) -> tuple[list[Line], dict[str, list[Line]]]:
     """Parse the script into the internal representation
     The output is given as a tuple of (common, dict[chapters])
@@ -24,6 +32,66 @@ def parseDialogueFile(lines: Iterable[str]) -> tuple[list[Line], dict[str, list[
     # parse all lines
     parsed = list(parse_lines(lines))
 
+    return group_chapters(parsed)
+
+
+def parseDialogueFileParallel(lines: list[str], config: dict, jobs: int) -> tuple[list[Line], dict[str, list[Line]]]:
+    """Same as parseDialogueFile, but splits the script at the chapters and parses the pieces in a process pool.
+
+    args:
+        config: the config json, so the workers can load it
+        jobs: the number of worker processes
+    """
+    chunks = parallel_parse.split_at_chapters(lines, lambda line: line.lstrip().startswith('==='), jobs * 2)
+    if jobs <= 1 or len(chunks) <= 1:
+        return parseDialogueFile(lines)
+
+    parsed: list[Line] = []
+    state = ParseState()
+
+    for chunk, result in zip(chunks, parallel_parse.map_chunks(parse_chunk, chunks, jobs, init_worker, (config,))):
+        if len(state.pending_directives) > 0:
+            # directives left over from the previous chunk apply to the first line in this one,
+            # so the worker's result is wrong. Parse this chunk again while carrying them over.
+            parsed += parse_chunk_lines(chunk, state)
+        else:
+            parsed += result.lines
+            parallel_parse.apply_defines(result.defines)
+            state = result.state
+
+    return group_chapters(parsed)
+
+
+def init_worker(config: dict):
+    '''Loads the configs in a worker process
+    '''
+    configs.load_into_globals(config)
+    dconfigs.load_into_globals(config)
+
+
+def parse_chunk(chunk: parallel_parse.Chunk) -> parallel_parse.ChunkResult:
+    '''Parses a chunk in a worker process
+    '''
+    state = ParseState()
+    parsed, defines = parallel_parse.record_defines(lambda: parse_chunk_lines(chunk, state))
+    return parallel_parse.ChunkResult(parsed, state, defines)
+
+
+def parse_chunk_lines(chunk: parallel_parse.Chunk, state: ParseState) -> list[Line]:
+    '''Parses a chunk, continuing from the given state
+    '''
+    parsed = list(parse_lines(chunk.lines, chunk.first_lineno, state))
+
+    # the next chunk starts with the same chapter marker
+    if chunk.trailing_marker:
+        parsed.pop()
+
+    return parsed
+
+
+def group_chapters(parsed: list[Line]) -> tuple[list[Line], dict[str, list[Line]]]:
+    """Splits the parsed lines into a tuple of (common, dict[chapters])
+    """
     # get indexes of all chapter markers
     chapter_indexes = [i for i, line in enumerate(parsed) if isinstance(line, ChapterLine)]
     chapter_indexes.append(len(parsed))     # append final index to make iteration logic easier
@@ -39,6 +107,43 @@ def parseDialogueFile(lines: Iterable[str]) -> tuple[list[Line], dict[str, list[
     return common_lines, chapters
 
 
+def scanDialogueFile(lines: Iterable[str]) -> list[str]:
+    """Parses the whole script without keeping any of the lines, for the first pass of --stream.
+    Any !define directives will still be applied.
+
+    returns: the names of all the chapters
+    """
+    return [line.name for line in parse_lines(lines) if isinstance(line, ChapterLine)]
+
+
+def iterDialogueChapters(lines: Iterable[str]) -> Generator[tuple[str | None, list[Line]], None, None]:
+    """Streaming version of parseDialogueFile.
+    Yields (chapter name, lines) one chapter at a time, with the common lines already included at the start.
+    Only the current chapter is kept in memory.
+
+    If there are no chapters, yields (None, common lines) once.
+    """
+    common_lines: list[Line] = []
+    chapter_name: str | None = None
+    chapter_lines: list[Line] | None = None
+
+    for line in parse_lines(lines):
+        if isinstance(line, ChapterLine):
+            if chapter_lines is not None:
+                yield chapter_name, chapter_lines
+            chapter_name = line.name
+            chapter_lines = list(common_lines)
+        elif chapter_lines is not None:
+            chapter_lines.append(line)
+        else:
+            common_lines.append(line)
+
+    if chapter_lines is not None:
+        yield chapter_name, chapter_lines
+    else:
+        yield None, common_lines
+
+
 def iterate_by_pairs(iterable: Iterable) -> Generator[tuple[int, int], None, None]:
     '''[1 2 3 4] -> (1 2), (2 3), (3 4)
     '''
@@ -52,44 +157,70 @@ def iterate_by_pairs(iterable: Iterable) -> Generator[tuple[int, int], None, Non
         yield first, second
 
 
-def parse_lines(lines: str) -> Generator[Line, None, None]:
+GRAMMAR = LineGrammar(
+    comments=('#', '//', '('),
+    prefixes={
+        '@': LineKind.SYSLINE,
+        '===': LineKind.CHAPTER,
+        '!': LineKind.DIRECTIVE,
+    })
+'''How each line of a dialogue script gets classified
+'''
+
+
+def parse_lines(lines: Iterable[str], first_lineno: int = 1, state: ParseState | None = None) -> Generator[Line, None, None]:
     '''Parse all the lines in the file.
+
+    args:
+        first_lineno: line number of the first line, if we're not starting from the top of the file
+        state: state to continue from. Will be updated as the lines get parsed.
     '''
-    pending_directives: list[Directive] = []
+    if state is None:
+        state = ParseState()
+    pending_directives: list[Directive] = state.pending_directives
+
+    # look these up once instead of every line
+    classify = GRAMMAR.classify
+    dialoguePattern = dconfigs.PARSING.dialoguePattern
+    shortDialoguePattern = dconfigs.PARSING.shortDialoguePattern
 
-    for line in lines:
+    for lineno, line in enumerate(lines, start=first_lineno):
         # strip before processing
         line = line.strip()
 
-        # skip this line if it's empty or it's a comment
-        if isComment(line):
-            continue
-
-        # process this line as a sysline if it begins with @
-        if line.startswith('@'):
-            yield parse_sysline(line[1:])
-            continue
-
-        # process this line as a chapter marker if it begins with ===
-        if line.startswith('==='):
-            yield ChapterLine(line.removeprefix('===').strip())
-            continue
-
-        # process this line as a line parse directive if it begins with !
-        if line.startswith('!'):
-            if (directive := parse_directive(line[1:])) is not None:
-                pending_directives.append(directive)
-            continue
+        kind, rest = classify(line)
+        match kind:
+            # skip this line if it's empty or it's a comment
+            case LineKind.COMMENT:
+                continue
+
+            # process this line as a sysline if it begins with @
+            case LineKind.SYSLINE:
+                sysline = SYSLINES.parse(rest)
+                sysline.lineno = lineno
+                yield sysline
+                continue
+
+            # process this line as a chapter marker if it begins with ===
+            case LineKind.CHAPTER:
+                yield ChapterLine(rest.strip())
+                continue
+
+            # process this line as a line parse directive if it begins with !
+            case LineKind.DIRECTIVE:
+                if (directive := DIRECTIVES.parse(rest)) is not None:
+                    pending_directives.append(directive)
+                continue
 
         expression: str = None
 
         # try to match normal dialogue line
-        match = re.match(dconfigs.PARSING.dialogueRegex, line)
+        match = dialoguePattern.match(line)
         if match:
             expression = match.group('expression').strip()  # normal dialogue line exclusive group
         else:
             # try to match shortened dialogue line and throw if that match also fails
-            if not (match := re.match(dconfigs.PARSING.shortDialogueRegex, line)):
+            if not (match := shortDialoguePattern.match(line)):
                 raise LineParseError(f'Unrecognized line: {line}')
 
         # groups that appear in both dialogue line types
@@ -97,7 +228,7 @@ def parse_lines(lines: str) -> Generator[Line, None, None]:
         text = match.group('text').strip()
 
         # process match into a dialogueLine
-        dialogueLine = DialogueLine(name, expression, text)
+        dialogueLine = DialogueLine(name, expression, text, lineno=lineno)
 
         # apply any pending directives and reset the directive list
         for directive in pending_directives:
@@ -108,10 +239,6 @@ def parse_lines(lines: str) -> Generator[Line, None, None]:
         yield dialogueLine
 
 
-def isComment(line: str) -> bool:
-    return len(line) == 0 or line.startswith('#') or line.startswith('//') or line.startswith('(')
-
-
 #
 # Line parse directives
 #
@@ -124,13 +251,6 @@ class Directive:
     def apply(self, line: DialogueLine) -> None: ...
 
 
-def parse_directive(line: str) -> Directive | None:
-    match line.split(None, 1):
-        case ['dur', args]: return Dur.parseArgs(args.strip())
-        case ['define', args]: Define.parseArgs(args.strip())
-        case _: raise LineParseError(f'Unrecognized directive: {line}')
-
-
 @dataclass
 class Dur(Directive):
     ''' Affects the duration of the next DialogueLine.
@@ -178,3 +298,14 @@ class Define(Directive):
         match line.split(None, 1):
             case [name, value]: configs.RESOURCE_NAMES[name] = value
             case _: LineParseError(f'Unrecognized !define directive: {line}')
+
+
+DIRECTIVES = KeywordTable(
+    'directive',
+    with_args={
+        'dur': Dur.parseArgs,
+        'define': Define.parseArgs,
+    })
+'''All the line parse directives.
+Some directives take effect immediately and return None instead of a Directive.
+'''
@@ -2,11 +2,13 @@ import ast
 import math
 import re
 from bisect import bisect
-from dataclasses import dataclass
-
-from vidpy.utils import Frame
+from dataclasses import dataclass, field
 
 import configs
+from frame import Frame
+
+
+WORD_PATTERN = re.compile(r'\w+')
 
 
 @dataclass
@@ -28,6 +30,9 @@ class Durations:
     mode: str
     thresholds: list[Threshold]     # list of thresholds. Must be in count order
 
+    # lookup table from count to duration, for every count up to the last threshold
+    table: list[Frame] = field(init=False, repr=False, compare=False)
+
     def __post_init__(self):
         # error checking
         if self.mode not in ('char', 'word'):
@@ -37,19 +42,33 @@ class Durations:
         if isinstance(self.thresholds[0], dict):
             self.thresholds = [Threshold(**threshold) for threshold in self.thresholds]
 
-    def calc_duration(self, text: str) -> Frame:
-        '''Finds the duration of the given text
+        # precompute the duration for each count.
+        # Anything past the last threshold gets the last duration, so we only need to go up to there.
+        self.table = [self.lookup_duration(count) for count in range(self.thresholds[-1].count + 1)]
+
+    def lookup_duration(self, count: int) -> Frame:
+        '''Finds the duration for the given count by searching through the thresholds.
+        Note that counts below the first threshold wrap around to the last threshold.
+        '''
+        index = bisect(self.thresholds, count,
+                       key=lambda threshold: threshold.count)
+        return self.thresholds[index-1].duration
+
+    def count(self, text: str) -> int:
+        '''Counts the chars or words in the text, depending on the mode
         '''
-        count: int = None
         match self.mode:
             case 'char':
-                count = len(text)
+                return len(text)
             case 'word':
-                count = len(re.findall(r'\w+', text))
+                # subn only builds the leftover string instead of a list of every word
+                return WORD_PATTERN.subn('', text)[1]
 
-        index = bisect(self.thresholds, count,
-                       key=lambda threshold: threshold.count)
-        return self.thresholds[index-1].duration
+    def calc_duration(self, text: str) -> Frame:
+        '''Finds the duration of the given text
+        '''
+        table = self.table
+        return table[min(self.count(text), len(table) - 1)]
 
 
 def to_frame(duration: int | float | str | None) -> Frame:
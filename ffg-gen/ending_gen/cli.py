@@ -0,0 +1,72 @@
+from argparse import ArgumentParser, _SubParsersAction
+
+import cli_args
+import introspection
+
+'''The command line interface for the ending scene.
+
+This only imports what's needed to set up the parser.
+The generation modules (and vidpy) are imported once we know we're actually generating.
+'''
+
+BUILTIN_COMPONENTS = ['text', 'bgimage', 'fill:[resource]', 'tfill:[resource]', 'groups', 'group:[group]']
+
+
+def attach_subparser_to(subparsers: _SubParsersAction, parents) -> None:
+    """Adds the command parser for ending scene to the subparser"""
+
+    parser: ArgumentParser = subparsers.add_parser(
+        'ending', help='Generate mlt for an ending scene', parents=parents)
+
+    parser.add_argument(
+        'components', nargs='*',
+        help='''
+        Determines which components to generate. Order does matter; layers go from top to bottom.
+
+        You can configure macros in your config json under "componentMacros".
+        Each macro maps to an array of components.
+        Macros can be recursive :)
+
+        Use --list-components to see everything that's available.
+        ''')
+
+    parser.add_argument(
+        '--config', '-j', type=str, default='ending-gen.json',
+        help='path to the config json')
+    parser.add_argument(
+        '--input', '-i', type=str, default='ending.txt',
+        help='path to the input ending file')
+
+    introspection.add_arguments(parser, has_chapters=False)
+
+    parser.set_defaults(func=run)
+
+
+def run():
+    if introspection.requested():
+        introspect()
+        return
+
+    introspection.expect_components()
+
+    from ending_gen import ending_gen
+    ending_gen.ending_gen()
+
+
+def introspect():
+    from ending_gen import econfigs, line_parse
+    from ending_gen.endinginfo import EndingInfo
+
+    introspection.load_config(econfigs)
+
+    if cli_args.ARGS.check_config:
+        introspection.check_config(EndingInfo, econfigs.CHARACTERS)
+
+    if cli_args.ARGS.list_components or cli_args.ARGS.plan:
+        with open(cli_args.ARGS.input) as input_file:
+            lines = line_parse.parse_ending_file(input_file)
+
+        if cli_args.ARGS.list_components:
+            introspection.print_components(BUILTIN_COMPONENTS, lines)
+        if cli_args.ARGS.plan:
+            introspection.print_plan(lines)
@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+import re
+from dataclasses import dataclass, field
 
 from durations import Durations
 
@@ -12,6 +13,12 @@ from durations import Durations
 class ParsingConfigs:
     dialogueRegex: str  # used to determine if a speaker change is needed
 
+    # compiled version of the above, so we don't have to look it up for every line
+    dialoguePattern: re.Pattern = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.dialoguePattern = re.compile(self.dialogueRegex)
+
 
 # === Global Constants ===
 
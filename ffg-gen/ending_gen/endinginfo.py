@@ -1,11 +1,11 @@
 from dataclasses import dataclass
 from functools import cache
-from typing import Any, Self
-
-from vidpy.utils import Frame
+from typing import Any, Collection, Self
 
 import infohelper
+import stats
 from exceptions import MissingConfigError
+from frame import Frame
 from geometry import Geometry
 from mlt_resource import MltResource
 from . import econfigs
@@ -49,11 +49,21 @@ class EndingInfo(infohelper.Info):
     @classmethod
     @cache
     def of_name(cls, name: str | None) -> Self:
-        if name is None:
-            return EndingInfo(**econfigs.ENDING_INFO.get('common'))
+        # only runs on a cache miss
+        with stats.timer(_OF_NAME_STATS):
+            if name is None:
+                return EndingInfo(**econfigs.ENDING_INFO.get('common'))
+
+            character_json: dict = merge_down_chain(name)
+            return EndingInfo(name=name, **character_json)
+
+    @classmethod
+    def known_names(cls) -> Collection[str]:
+        return econfigs.CHARACTERS.keys()
+
 
-        character_json: dict = merge_down_chain(name)
-        return EndingInfo(name=name, **character_json)
+_OF_NAME_STATS = stats.counter('EndingInfo.of_name')
+stats.register_cache('EndingInfo.of_name', EndingInfo.of_name)
 
 
 # === Config Searching ===
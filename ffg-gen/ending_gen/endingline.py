@@ -1,15 +1,14 @@
 from dataclasses import dataclass
 
-from vidpy.utils import Frame
-
 import durations
 from exceptions import LineParseError
-from lines import TextLine, SysLine, parse_common_sysline
+from frame import Frame
+from lines import TextLine, SysLine, COMMON_SYSLINES
 from mlt_resource import MltResource
 from . import econfigs
 
 
-@dataclass
+@dataclass(slots=True)
 class TextLine(TextLine):
     '''A parsed text block from the script.
 
@@ -27,7 +26,7 @@ class TextLine(TextLine):
             self.duration = econfigs.DURATIONS.calc_duration(self.text)
 
 
-@dataclass
+@dataclass(slots=True)
 class PageTurn(SysLine):
     '''Represents a "page turn" of the dialogue
     '''
@@ -37,25 +36,7 @@ class PageTurn(SysLine):
 # Ending-specific Syslines
 # ========================
 
-def parse_sysline(line: str) -> SysLine:
-    """Parses a sysline.
-
-    args:
-        line - a sysline with the @ stripped off already
-    """
-    sysline = parse_common_sysline(line)
-    if sysline is not None:
-        return sysline
-
-    match line.split(None, 1):
-        case ['wait', args]: return Wait.parseArgs(args.strip())
-        case ['sleep', args]: return Sleep.parseArgs(args.strip())
-        case ['speaker', args]: return SetSpeaker.parseArgs(args.strip())
-        case ['bgimage', args]: return SetBgImage.parseArgs(args.strip())
-        case _: raise LineParseError(f'Unrecognized sysline: {line}')
-
-
-@dataclass
+@dataclass(slots=True)
 class Wait(SysLine):
     """Makes the preceding text line stay for longer.
     Interprets integer durations as frames and float durations as seconds.
@@ -71,7 +52,7 @@ class Wait(SysLine):
             case _: raise LineParseError(f'Invalid args for @wait: {args}')
 
 
-@dataclass
+@dataclass(slots=True)
 class Sleep(SysLine):
     """Makes nothing happen for the given duration.
     `tfill` components will not display during this time.
@@ -88,7 +69,7 @@ class Sleep(SysLine):
             case _: raise LineParseError(f'Invalid args for @sleep: {args}')
 
 
-@dataclass
+@dataclass(slots=True)
 class SetSpeaker(SysLine):
     '''Sets the current speaker
     Usage: @speaker [name]
@@ -102,7 +83,7 @@ class SetSpeaker(SysLine):
             case _: raise LineParseError(f'Invalid args for @speaker: {args}')
 
 
-@dataclass
+@dataclass(slots=True)
 class SetBgImage(SysLine):
     '''Sets the current bg image.
     Usage: `@bgimage [image]`
@@ -116,3 +97,14 @@ class SetBgImage(SysLine):
         match args:
             case 'none': return SetBgImage(None)
             case image: return SetBgImage(MltResource(image))
+
+
+SYSLINES = COMMON_SYSLINES.extended(
+    with_args={
+        'wait': Wait.parseArgs,
+        'sleep': Sleep.parseArgs,
+        'speaker': SetSpeaker.parseArgs,
+        'bgimage': SetBgImage.parseArgs,
+    })
+'''All the syslines that can be used in ending scripts
+'''
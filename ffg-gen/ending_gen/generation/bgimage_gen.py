@@ -2,12 +2,12 @@ from dataclasses import dataclass
 from typing import Generator, Iterable
 
 from vidpy import Clip
-from vidpy.utils import Frame
 
 import configs
 import filters
 from ending_gen.endinginfo import EndingInfo
 from ending_gen.endingline import SetBgImage
+from frame import Frame
 from lines import Line
 from mlt_resource import MltResource
 from vidpy_extension.blankclip import BlankClip
@@ -62,15 +62,13 @@ def to_clip(clip_section: ClipSection) -> Clip:
         # which char info to use
         info = EndingInfo.of_common()
 
-        # figure out fade filters
-        fadeInEnd = info.bgFadeInDur
-        fadeOutStart = clip_section.duration - info.bgFadeOutDur
-        fadeOutEnd = clip_section.duration
+        clip = Clip(str(image), start=Frame(0)).set_duration(clip_section.duration)
 
-        return Clip(str(image), start=Frame(0))\
-            .set_duration(clip_section.duration)\
-            .fx('brightness', filters.opacityFilterArgs(f'0=0;{fadeInEnd}=1'))\
-            .fx('brightness', filters.opacityFilterArgs(f'{fadeOutStart}=1;{fadeOutEnd}=0'))
+        # add fade filters
+        for fadeArgs in filters.fadeFilterArgs(clip_section.duration, info.bgFadeInDur, info.bgFadeOutDur):
+            clip.fx('brightness', fadeArgs)
+
+        return clip
     else:
         return BlankClip.ofDuration(clip_section.duration)
 
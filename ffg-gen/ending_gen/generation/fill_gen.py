@@ -1,7 +1,7 @@
 from vidpy import Clip
-from vidpy.utils import Frame
 
 import configs
+from frame import Frame
 from lines import Line
 from mlt_resource import MltResource
 from vidpy_extension.ext_composition import ExtComposition
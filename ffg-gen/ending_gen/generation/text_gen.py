@@ -1,20 +1,20 @@
-import re
 from dataclasses import dataclass
-from itertools import zip_longest
 from typing import Generator, Iterable
 
 from vidpy import Clip
-from vidpy.utils import Frame
 
+import cli_args
 import configs
 from configcontext import ConfigContext
 from ending_gen import econfigs
 from ending_gen.endinginfo import EndingInfo
 from ending_gen.endingline import TextLine, PageTurn, Wait, Sleep, SetSpeaker
 from filters import textFilterArgs, dropTextFilterArgs
+from frame import Frame
 from lines import Line, SysLine
 from vidpy_extension.blankclip import BlankClip
 from vidpy_extension.ext_composition import ExtComposition
+from vidpy_extension.timeline import pack_tracks, track_frames
 
 
 # === Objects ====
@@ -110,7 +110,7 @@ def process_lines(lines: list[Line]) -> Generator[PageGroup, None, None]:
             # normal TextLine
             case TextLine(text=text, duration=duration):
                 # figure out if automatic speaker change is required
-                if match := re.match(econfigs.PARSING.dialogueRegex, text):
+                if match := econfigs.PARSING.dialoguePattern.match(text):
                     name = match.group('name').strip().lower()
 
                     # Check if name even matches a known char name.
@@ -143,24 +143,31 @@ def process_pagegroups(pagegroups: Iterable[PageGroup]) -> list[list[Clip]]:
     # process each PageGroup into a ClipGroup
     clipgroups = [flatten_pagegroup(pagegroup) for pagegroup in pagegroups]
 
+    if cli_args.ARGS.pack_tracks:
+        slots = []
+        for clipgroup in clipgroups:
+            items = [[BlankClip.ofDuration(clipinfo.offset), info_to_clip(clipinfo)] for clipinfo in clipgroup]
+            slots.append((track_frames(items[0]), items))
+        return pack_tracks(slots)
+
     # figure out the maximum number of tracks needed
     num_tracks = max([len(clipgroup) for clipgroup in clipgroups])
 
     track_list: list[list[Clip]] = [list() for _ in range(num_tracks)]
 
     for clipgroup in clipgroups:
-        # we know track_list is always same or longer than clipgroup,
-        # so only clipinfo can be None
-        for (clipinfo, track) in zip_longest(clipgroup, track_list, fillvalue=None):
-            # fill with blank if the clipgroup doesn't reach this track
-            if clipinfo is None:
-                track.append(BlankClip.ofDuration(total_duration(clipgroup)))
-            else:
-                # blank offset
-                track.append(BlankClip.ofDuration(clipinfo.offset))
-
-                # actual text portion
-                track.append(info_to_clip(clipinfo))
+        for clipinfo, track in zip(clipgroup, track_list):
+            # blank offset
+            track.append(BlankClip.ofDuration(clipinfo.offset))
+
+            # actual text portion
+            track.append(info_to_clip(clipinfo))
+
+        # fill the tracks that the clipgroup doesn't reach with blanks
+        if len(clipgroup) < num_tracks:
+            duration = total_duration(clipgroup)
+            for track in track_list[len(clipgroup):]:
+                track.append(BlankClip.ofDuration(duration))
 
     return track_list
 
@@ -169,29 +176,28 @@ def flatten_pagegroup(pagegroup: PageGroup) -> ClipGroup:
     '''Processes the PageGroup to a ClipGroup, 
     which closer represents the actual info in the Clip.
     '''
-    # expand duration to actual durations
+    # every clip lasts until the end of the page.
+    # +1 accounts for the 1 frame gap between each clip
+    page_end: Frame = Frame(sum(Frame(1) + lineinfo.duration for lineinfo in pagegroup))
+
     clipgroup: ClipGroup = list()
 
     curr_offset: Frame = Frame(0)
     curr_newline_count: int = 0
 
     for lineinfo in pagegroup:
-        # increment durations of all existing clips in the group
-        for clipinfo in clipgroup:
-            # +1 accounts for the 1 frame gap between the previous and current clip
-            clipinfo.duration += Frame(1) + lineinfo.duration
-
         # if the lineinfo is not a Wait...
         if (text := lineinfo.text) is not None:
             # The +1 overshoots since the gap is already covered by being a new clip.
             # But double check to prevent negative offsets.
             offset = curr_offset - Frame(1) if curr_offset != 0 else 0
 
-            # add new clip to group
+            # add new clip to group.
+            # -1 since the duration of a clip never includes its own 1 frame gap
             clipgroup.append(ClipInfo(
                 '\n' * curr_newline_count + text,
                 lineinfo.charInfo,
-                lineinfo.duration,
+                Frame(page_end - curr_offset - 1),
                 offset))
 
             # update the newline count
@@ -1,9 +1,20 @@
 from typing import Iterable, Generator
 
-from ending_gen.endingline import TextLine, PageTurn, parse_sysline
+from ending_gen.endingline import TextLine, PageTurn, SYSLINES
+from line_grammar import LineGrammar, LineKind
 from lines import Line
 
 
+GRAMMAR = LineGrammar(
+    comments=('//',),
+    prefixes={
+        '@': LineKind.SYSLINE,
+        '---': LineKind.BREAK,
+    })
+'''How each line of an ending script gets classified
+'''
+
+
 def parse_ending_file(lines: Iterable[str]) -> list[Line]:
     '''Parse the script into the internal representation.
     The output is given as a list of Lines.
@@ -36,41 +47,50 @@ def parse_lines(lines: list[str]) -> Generator[Line, None, None]:
     # used to store lines for multi-line texts
     buffer: list[str] = []
 
-    for line in lines:
+    # line number of the first line in the buffer
+    buffer_start: int = None
+
+    for lineno, line in enumerate(lines, start=1):
         # strip right before processing
         # we preserve left whitespace since multi-line text might care about it
         line = line.rstrip()
 
-        # skip this line if it's empty or it's a comment
-        if isComment(line):
-            continue
+        kind, rest = GRAMMAR.classify(line)
+        match kind:
+            # skip this line if it's empty or it's a comment
+            case LineKind.COMMENT:
+                continue
 
-        # process this line as a sysline if it begins with @
-        elif line.startswith('@'):
-            yield parse_sysline(line[1:])
+            # process this line as a sysline if it begins with @
+            case LineKind.SYSLINE:
+                sysline = SYSLINES.parse(rest)
+                sysline.lineno = lineno
+                yield sysline
+                continue
 
-        # `---` always marks a page turn
-        elif line.startswith('---'):
-            yield PageTurn()
+            # `---` always marks a page turn
+            case LineKind.BREAK:
+                yield PageTurn(lineno=lineno)
+                continue
 
         # process line as normal text
-        else:
-            # add text to buffer if multi-line
-            if line.endswith('\\'):
-                buffer.append(line[:-1])
+        # add text to buffer if multi-line
+        if line.endswith('\\'):
+            if len(buffer) == 0:
+                buffer_start = lineno
+            buffer.append(line[:-1])
 
-            # finally yield the Line
+        # finally yield the Line
+        else:
+            text: str
+            start: int
+            if len(buffer) == 0:
+                text = line
+                start = lineno
+            # flush buffer if not empty
             else:
-                text: str
-                if len(buffer) == 0:
-                    text = line
-                # flush buffer if not empty
-                else:
-                    buffer.append(line)
-                    text = str.join('\n', buffer)
-                    buffer.clear()
-                yield TextLine(text)
-
-
-def isComment(line: str) -> bool:
-    return len(line) == 0 or line.startswith('//')
+                buffer.append(line)
+                text = str.join('\n', buffer)
+                start = buffer_start
+                buffer.clear()
+            yield TextLine(text, lineno=start)
@@ -1,9 +1,13 @@
 from argparse import ArgumentParser
 
 import cli_args
-from bio_gen import bio_gen
-from dialogue_gen import dialogue_gen
-from ending_gen import ending_gen
+import mlt_report
+import render_cost
+import timings
+from benchmarks import cli as bench_cli
+from bio_gen import cli as bio_cli
+from dialogue_gen import cli as dialogue_cli
+from ending_gen import cli as ending_cli
 
 
 def createArgumentParser() -> ArgumentParser:
@@ -18,14 +22,77 @@ def createArgumentParser() -> ArgumentParser:
     parentparser.add_argument(
         '--fill-blanks', action='store_const', const=True, default=False, dest='fill_blanks',
         help='Use transparent clips for waits instead of blanks.')
+    parentparser.add_argument(
+        '--fold-fades', action='store_const', const=True, default=False, dest='fold_fades',
+        help='''Put a clip's fade in and fade out into a single opacity filter instead of two brightness filters.
+        Shotcut shows it as one opacity filter with a fade in and fade out.''')
+    parentparser.add_argument(
+        '--drop-noop-filters', action='store_const', const=True, default=False, dest='drop_noop_filters',
+        help='''Leave out filters that don't change anything, like a brightness of 1 or a full-frame transform
+        that doesn't move, and print how many got dropped.''')
+    parentparser.add_argument(
+        '--pack-tracks', action='store_const', const=True, default=False, dest='pack_tracks',
+        help='''Put clips on as few tracks as possible. Offscreen characters don't keep a track to themselves,
+        and tracks end after their last clip instead of being padded with blanks.''')
+    parentparser.add_argument(
+        '--mix-all-tracks', action='store_const', const=True, default=False, dest='mix_all_tracks',
+        help='''Add an audio mix transition to every track, like older versions did.
+        Normally only tracks that could have audio (anything that isn't an image or color) get one.''')
+    parentparser.add_argument(
+        '--jobs', type=cli_args.positive_int, default=1,
+        help='''Generate the components of each chapter in this many processes.
+        Helps the most for big chapters with lots of components, on a machine with cores to spare.
+        The output is the same as generating them one by one. (default 1)''')
+    parentparser.add_argument(
+        '--from', type=str, default=None, dest='range_from',
+        help='''Only generate the timeline starting from this position.
+        Give frames as ints, seconds as floats or [h:]m:s, and line numbers in the input file as L[num].''')
+    parentparser.add_argument(
+        '--to', type=str, default=None, dest='range_to',
+        help='Only generate the timeline up until this position. Takes the same formats as --from.')
+    parentparser.add_argument(
+        '--melt', type=str, default=None,
+        help='''Path to the melt binary to use, if it isn't the one on your PATH.
+        Give "standin" to use a built-in stand-in instead, which doesn't need melt installed.
+        The stand-in output is only good for benchmarking and testing; don't try to render it.''')
+    parentparser.add_argument(
+        '--report', action='store_const', const=True, default=False,
+        help='''After writing each mlt, print how many tracks, producers, filters and transitions it has,
+        for each component. Heavy mlts are slow to load and scrub in Shotcut.''')
+    parentparser.add_argument(
+        '--render-cost', action='store_const', const=True, default=False, dest='render_cost',
+        help='''After writing each mlt, estimate how expensive each component is to render,
+        and show the most expensive parts of the timeline.''')
+    parentparser.add_argument(
+        '--cost-table', type=str, default=None, dest='cost_table',
+        help='''Json of {filter service: cost} to override the costs used by --render-cost.
+        Use "transition:[service]" and "producer:[service]" for transitions and producers.''')
+    parentparser.add_argument(
+        '--timings', action='store_const', const=True, default=False,
+        help='Print how long each phase and each component took to stderr once done.')
+    parentparser.add_argument(
+        '--timings-json', type=str, default=None, dest='timings_json',
+        help='Write how long each phase and each component took (and the peak memory) to this json file.')
+    parentparser.add_argument(
+        '--stats', action='store_const', const=True, default=False,
+        help='''Count the hits and misses of the config caches and lookups, then print them to stderr once done.
+        Also goes in --timings-json.''')
+    parentparser.add_argument(
+        '--profile', type=str, default=None,
+        help='Run under cProfile and save the stats to this file. Open it with pstats or snakeviz.')
+    parentparser.add_argument(
+        '--trace-memory', action='store_const', const=True, default=False, dest='trace_memory',
+        help='''Trace memory allocations for each phase, and show the biggest ones with --timings.
+        Makes the run a lot slower.''')
 
     parser = ArgumentParser(description='Generates mlt files for Touhou-style album videos.',
                             parents=[parentparser])
     subparsers = parser.add_subparsers(help='the type of scene to generate', required=True)
 
-    dialogue_gen.attach_subparser_to(subparsers, [parentparser])
-    bio_gen.attach_subparser_to(subparsers, [parentparser])
-    ending_gen.attach_subparser_to(subparsers, [parentparser])
+    dialogue_cli.attach_subparser_to(subparsers, [parentparser])
+    bio_cli.attach_subparser_to(subparsers, [parentparser])
+    ending_cli.attach_subparser_to(subparsers, [parentparser])
+    bench_cli.attach_subparser_to(subparsers)
 
     return parser
 
@@ -34,7 +101,14 @@ def main():
     parser = createArgumentParser()
     cli_args.ARGS = parser.parse_args()
 
-    cli_args.ARGS.func()
+    # catch a bad cost table before spending the whole run generating
+    if getattr(cli_args.ARGS, 'render_cost', False) or getattr(cli_args.ARGS, 'cost_table', None) is not None:
+        render_cost.load_into_globals(cli_args.ARGS.cost_table)
+
+    timings.run(cli_args.ARGS.func)
+
+    if getattr(cli_args.ARGS, 'report', False):
+        mlt_report.print_summary()
 
 
 if __name__ == "__main__":
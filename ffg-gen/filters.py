@@ -1,15 +1,80 @@
-from vidpy.utils import Frame
+from functools import lru_cache
+from weakref import WeakValueDictionary
+
+import cli_args
+import keyframes
+from frame import Frame
+from mlt_resource import MltResource
+
+
+# ===========
+# Filter args
+# ===========
+
+class FilterArgs(dict):
+    """An immutable set of filter properties.
+    Create these through intern_args, so that identical property sets are shared between clips instead of duplicated.
+
+    The melt args get serialized once and then reused for every clip that shares this instance.
+    """
+    __slots__ = ('_melt_args', '__weakref__')
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError('FilterArgs are shared between clips and cannot be modified. Make a copy instead.')
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _immutable
+
+    def __reduce__(self):
+        # re-intern when unpickling from the incremental cache
+        return intern_args, (dict(self),)
+
+    def melt_args(self) -> list[str]:
+        """The properties as melt command line args, in the same format vidpy uses
+        """
+        try:
+            return self._melt_args
+        except AttributeError:
+            pass
+
+        args = [f'{key}="{value!s}"' for key, value in self.items()]
+
+        # named resources are resolved when serialized and can get redefined later, so don't hold on to those
+        if not any(isinstance(value, MltResource) for value in self.values()):
+            self._melt_args = args
+        return args
+
+
+_INTERNED: WeakValueDictionary[tuple, FilterArgs] = WeakValueDictionary()
+
+
+def intern_args(props: dict) -> FilterArgs:
+    """Returns the shared FilterArgs with the given properties, creating it if needed.
+
+    Non-string values are compared by repr, since equal values like 1 and 1.0 get serialized differently.
+    Entries go away once no clip uses them anymore.
+    """
+    key = tuple((name, type(value), value if type(value) is str else repr(value)) for name, value in props.items())
+    try:
+        return _INTERNED[key]
+    except KeyError:
+        filter_args = _INTERNED[key] = FilterArgs(props)
+        return filter_args
+
+
+# ==============
+# Filter presets
+# ==============
 
 
 def textFilterArgs(text, geometry,
                    color="#ffffff", bgcolor="0x00000000", olcolor="0x00000000",
                    outline=1, halign="left", valign="middle",
                    pad=0, font="Sans", size=1080, style="normal",
-                   weight=500) -> dict:
+                   weight=500) -> FilterArgs:
     """
     Generates the args for the simple text filter. Use with 'dynamictext' filter
     """
-    return {
+    return intern_args({
         'argument': text,
         'geometry': geometry,
         'family': font,
@@ -23,11 +88,11 @@ def textFilterArgs(text, geometry,
         'pad': pad,
         'halign': halign,
         'valign': valign,
-    }
+    })
 
 
 def richTextFilterArgs(text: str, geometry: str, font: str, fontSize: int, color: str = '#ffffff',
-                       align: str = "left") -> dict:
+                       align: str = "left") -> FilterArgs:
     """
     Generates the args for the rich text filter. Use with 'qtext' filter
 
@@ -39,14 +104,14 @@ def richTextFilterArgs(text: str, geometry: str, font: str, fontSize: int, color
         color: The font color. White by default
         align: The text alignment
     """
-    return {
+    return intern_args({
         'argument': 'text',
         'geometry': geometry,
         'html': generateHtml(text, font, fontSize, color, align),
         'pixel_ratio': 1,
         'overflow-y': 1,
         'bgcolour': '#00000000'
-    }
+    })
 
 
 HTML = """
@@ -61,61 +126,71 @@ li.checked::marker { content: "\2612"; }
 """
 
 
+HTML_HEAD, HTML_TAIL = HTML.split('{TEXT}')
+
+
+@lru_cache(maxsize=None, typed=True)
+def generateHtmlHead(font: str, fontSize: int, color: str, align: str) -> str:
+    """Fills in the part of the html template before the text.
+    This only depends on the styling, so it gets compiled once for each style.
+    """
+    return HTML_HEAD.replace("{FONT}", font) \
+        .replace("{SIZE}", str(fontSize)) \
+        .replace("{COLOR}", color) \
+        .replace("{ALIGN}", str(align))
+
+
 def generateHtml(text: str, font: str, fontSize: int, color: str = '#ffffff', align: str = "left") -> str:
     """Generates the html for the rich text filter
     """
     # replace newlines with <br/> so that they show up as newlines in html
     text = text.replace('\n', '<br/>')
 
-    return HTML.replace("{FONT}", font) \
-        .replace("{SIZE}", str(fontSize)) \
-        .replace("{COLOR}", color) \
-        .replace("{TEXT}", text) \
-        .replace("{ALIGN}", str(align))
+    return generateHtmlHead(font, fontSize, color, align) + text + HTML_TAIL
 
 
-def dropTextFilterArgs(resource: str, end: Frame) -> dict:
+def dropTextFilterArgs(resource: str, end: Frame) -> FilterArgs:
     """Generates the args for a mask filter to create the drop text effect. Use with 'mask_start' filter
     """
-    return {
+    return intern_args({
         'filter': 'shape',
         "filter.mix": f'0=0;{end}=100',
         "filter.resource": resource,
         "filter.use_luminance": 1,
         "filter.use_mix": 1
-    }
+    })
 
 
-def affineFilterArgs(rect: str, halign="center", valign="middle", distort=0) -> dict:
+def affineFilterArgs(rect: str, halign="center", valign="middle", distort=0) -> FilterArgs:
     """Generates the args for the transform filter. use with 'affine' filter
 
     Args:
         rect: The rect field in the filter. This includes timestamps and geometry
         distort: 1 to use distort
     """
-    return {
+    return intern_args({
         'background': 'color:#00000000',
         'transition.fill': '1',
         'transition.distort': distort,
         'transition.rect': rect,
         'transition.valign': halign,
         'transition.halign': valign,
-    }
+    })
 
 
-def brightnessFilterArgs(level: str) -> dict:
+def brightnessFilterArgs(level: str) -> FilterArgs:
     """Generates the args for the brightness filter. use with 'brightness' filter
 
     Args:
         level: The level field in the filter. This includes timestamps and value
     """
 
-    return {
+    return intern_args({
         'level': level
-    }
+    })
 
 
-def opacityFilterArgs(alpha: str) -> dict:
+def opacityFilterArgs(alpha: str) -> FilterArgs:
     """Generates the args for the opacity filter. use with 'brightness' filter.
     mlt_fix will handle converting this to a shotcut fade-in if able
 
@@ -123,12 +198,36 @@ def opacityFilterArgs(alpha: str) -> dict:
         alpha: The alpha/opacity field in the filter. This includes timestamps and value
     """
 
-    return {
+    return intern_args({
         'alpha': alpha,
-    }
+    })
+
+
+def fadeFilterArgs(duration: int, fadeInDur: int | None, fadeOutDur: int | None) -> list[FilterArgs]:
+    '''Generates the args for fading a clip in at its start and out at its end. use each with 'brightness' filter.
+    Leave a fade as None to skip it.
+
+    Normally that's one filter per fade. With --fold-fades, both fades go into a single filter
+    when there are both and they don't overlap, which halves the brightness filters on the clip.
+
+    Args:
+        duration: The duration of the clip. The fade out ends here
+        fadeInDur: How long the fade in is
+        fadeOutDur: How long the fade out is
+    '''
+    if fadeInDur is not None and fadeOutDur is not None and cli_args.ARGS.fold_fades \
+            and 0 < fadeInDur < duration - fadeOutDur < duration:
+        return [opacityFilterArgs(keyframes.fade_in_out(fadeInDur, duration - fadeOutDur, duration))]
+
+    args: list[FilterArgs] = []
+    if fadeInDur is not None:
+        args.append(opacityFilterArgs(keyframes.fade_in(fadeInDur)))
+    if fadeOutDur is not None:
+        args.append(opacityFilterArgs(keyframes.fade_out(duration - fadeOutDur, duration)))
+    return args
 
 
-def eqToStereoFilterArgs(fov: float, yaw=0, roll=0, amount=100) -> dict:
+def eqToStereoFilterArgs(fov: float, yaw=0, roll=0, amount=100) -> FilterArgs:
     '''Generates the args for the 360 Equirectangular to Stereographic filter.
     This is really only intended to map a ribbon into a circular loading bar.
 
@@ -140,17 +239,17 @@ def eqToStereoFilterArgs(fov: float, yaw=0, roll=0, amount=100) -> dict:
         roll: also controls rotation of circle
         amount: also controls zoom of circle
     '''
-    return {
+    return intern_args({
         'fov': fov,
         'yaw': yaw,
         'pitch': -90,
         'roll': roll,
         'amount': amount,
         'interpolation': 0
-    }
+    })
 
 
-def cropFilterArgs(rect: str) -> dict:
+def cropFilterArgs(rect: str) -> FilterArgs:
     '''Generates the args for the Crop: Rectangle filter.
 
     Use with 'qtcrop' filter.
@@ -158,16 +257,16 @@ def cropFilterArgs(rect: str) -> dict:
     Args:
         rect: geometry of the crop
     '''
-    return {
+    return intern_args({
         'rect': rect,
         'circle': 0,
         'color': '#00000000',
         'radius': 0,
         'disable': 0
-    }
+    })
 
 
-def gaussianBlurFilterArgs(amount: float, blur_alpha: bool = True) -> dict:
+def gaussianBlurFilterArgs(amount: float, blur_alpha: bool = True) -> FilterArgs:
     """
     Generates the args for the Blur: Gaussian filter
 
@@ -177,14 +276,14 @@ def gaussianBlurFilterArgs(amount: float, blur_alpha: bool = True) -> dict:
         amount: percent amount of blur
         blur_alpha: whether Blur Alpha is checked
     """
-    return {
+    return intern_args({
         'av.sigma': amount,
         'av.sigmaV': amount,
         'av.planes': '0xf' if blur_alpha else '0x7'
-    }
+    })
 
 
-def hueFilterArgs(hue: int = 0, lightness: float = 100, saturation: float = 100) -> dict:
+def hueFilterArgs(hue: int = 0, lightness: float = 100, saturation: float = 100) -> FilterArgs:
     """
     Generates the args for the Hue/Lightness/Saturation filter.
     The param values are given as shotcut filter values and are mapped to avfilter values.
@@ -200,16 +299,16 @@ def hueFilterArgs(hue: int = 0, lightness: float = 100, saturation: float = 100)
     # Lightness: ranges from -10 to 10 with shotcut 100% -> 0
     # Saturation: ranges from 0 to 5 with shotcut 100% -> 1
 
-    return {
+    return intern_args({
         'av.h': hue,
         'av.b': (lightness - 100) / 10,
         'av.s': saturation / 100
-    }
+    })
 
 
 def colorGradingFilterArgs(lift_r: float = 0, lift_g: float = 0, lift_b: float = 0,
                            gamma_r: float = 1, gamma_g: float = 1, gamma_b: float = 1,
-                           gain_r: float = 1, gain_g: float = 1, gain_b: float = 1) -> dict:
+                           gain_r: float = 1, gain_g: float = 1, gain_b: float = 1) -> FilterArgs:
     """
     Generates the args for the Color Grading filter.
     These will be in pure internal values instead of Shotcut values since I'm too lazy to figure out the conversion.
@@ -217,7 +316,7 @@ def colorGradingFilterArgs(lift_r: float = 0, lift_g: float = 0, lift_b: float =
 
     Use with the 'lift_gamma_gain' filter
     """
-    return {
+    return intern_args({
         'lift_r': lift_r,
         'lift_g': lift_g,
         'lift_b': lift_b,
@@ -227,4 +326,4 @@ def colorGradingFilterArgs(lift_r: float = 0, lift_g: float = 0, lift_b: float =
         'gain_r': gain_r,
         'gain_g': gain_g,
         'gain_b': gain_b
-    }
+    })
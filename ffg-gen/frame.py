@@ -0,0 +1,10 @@
+'''Our own copy of vidpy's Frame, so that parsing and config loading don't have to import vidpy.
+
+vidpy recognizes frames by the class name, so this can be passed anywhere vidpy expects its own Frame.
+'''
+
+
+class Frame(int):
+    '''A wrapper class for int to help differentiate between timestamps and frames'''
+
+    pass
@@ -0,0 +1,127 @@
+import ast
+from dataclasses import dataclass
+
+import cli_args
+import configs
+from exceptions import CliError
+from frame import Frame
+from lines import Line
+from vidpy_extension.ext_composition import ExtComposition
+from vidpy_extension.timeline import trim_clips
+
+'''Handles the --from and --to options, which only generate part of the timeline.
+
+The whole chapter still gets generated, so any state set by syslines before the start is still applied.
+The compositions are then trimmed down to the requested range, so the output lines up exactly with a full render.
+'''
+
+
+@dataclass
+class FrameRange:
+    '''A range of frames in the timeline of a chapter.
+    Includes the start frame but not the end frame.
+    '''
+    start: Frame
+    end: Frame | None   # None means until the end of the timeline
+
+
+def of_cli_args(lines: list[Line]) -> FrameRange | None:
+    '''Figures out the frame range from the --from and --to cli args.
+    Returns None if neither was given.
+
+    Args:
+        lines: the lines of the chapter, which are needed to resolve line numbers
+    '''
+    if cli_args.ARGS.range_from is None and cli_args.ARGS.range_to is None:
+        return None
+
+    start = Frame(0)
+    if cli_args.ARGS.range_from is not None:
+        start = parse_position(cli_args.ARGS.range_from, lines, False)
+
+    end = None
+    if cli_args.ARGS.range_to is not None:
+        end = parse_position(cli_args.ARGS.range_to, lines, True)
+
+    # an end before the start just means there's nothing to generate.
+    # This can legitimately happen when the line numbers are in a different chapter.
+    if end is not None and end < start:
+        end = start
+
+    return FrameRange(start, end)
+
+
+def parse_position(position: str, lines: list[Line], is_end: bool) -> Frame | None:
+    '''Converts a position in the timeline into a frame.
+
+    `L[num]`: a line number in the input file.
+        As a start, this is where the first line at or after that line number starts.
+        As an end, this is where the last line at or before that line number ends.
+
+    `[h:]m:s`: a timestamp. Seconds can have decimals
+
+    int: interpreted as frames
+
+    float: interpreted as seconds
+
+    Returns None if the position is a line number past the end of the chapter.
+    '''
+    try:
+        if position[0] in 'Ll':
+            return line_to_frame(int(position[1:]), lines, is_end)
+        elif ':' in position:
+            seconds = 0
+            for part in position.split(':'):
+                seconds = seconds * 60 + float(part)
+            return seconds_to_frame(seconds)
+        else:
+            value = ast.literal_eval(position)
+    except (ValueError, SyntaxError, IndexError):
+        raise CliError(f'{position} is not a valid position')
+
+    if isinstance(value, int):
+        return Frame(value)
+    elif isinstance(value, float):
+        return seconds_to_frame(value)
+    else:
+        raise CliError(f'{position} is not a valid position')
+
+
+def seconds_to_frame(seconds: float) -> Frame:
+    return Frame(round(seconds * configs.VIDEO_MODE.fps))
+
+
+def line_to_frame(lineno: int, lines: list[Line], is_end: bool) -> Frame | None:
+    '''Finds the frame where the first line with a duration at or after the given line number starts.
+    If it's an end, we look for the first line after the given line number instead.
+    '''
+    curr_frame = 0
+
+    for line in lines:
+        if not hasattr(line, 'duration'):
+            continue
+
+        if line.lineno is not None and (line.lineno > lineno or (line.lineno == lineno and not is_end)):
+            return Frame(curr_frame)
+
+        # +1 to account for the 1 frame gap between clips
+        curr_frame += line.duration + 1
+
+    # line number is past the end of the chapter
+    return None if is_end else Frame(curr_frame)
+
+
+def trim_compositions(compositions: list[ExtComposition], frame_range: FrameRange) -> list[ExtComposition]:
+    '''Trims all compositions down to the frame range.
+    The compositions are modified in place.
+    '''
+    for composition in compositions:
+        composition.clips = trim_clips(composition.clips, frame_range.start, frame_range.end)
+
+    return compositions
+
+
+def is_empty(compositions: list[ExtComposition]) -> bool:
+    '''Whether there's nothing left in the compositions after trimming
+    '''
+    return all(len(composition.clips) == 0 for composition in compositions)
@@ -0,0 +1,268 @@
+import hashlib
+import io
+import os
+import pickle
+import tempfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+import cli_args
+import configs
+from configcontext import ConfigContext
+from infohelper import Info
+from lines import Line
+
+'''Line-level incremental regeneration.
+
+Clip generation is a left-to-right state machine over the lines, so we can save the state every so often.
+On the next run, we diff the lines against the previous run and resume from the last checkpoint before the first change.
+Once the state after the changed lines matches the state from the previous run again,
+we just reuse the rest of the outputs from the previous run.
+'''
+
+CACHE_VERSION = 3
+'''Bump this whenever the generation logic changes, so that old caches get invalidated
+'''
+
+CHAPTER: str | None = None
+'''The chapter currently being processed. Used as part of the cache key.
+'''
+
+
+# ==========
+# Processors
+# ==========
+
+class LineProcessor(ABC):
+    '''A left-to-right state machine that processes lines into outputs.
+
+    All state has to be stored on the processor itself, and it has to be picklable,
+    since the processor itself is what gets saved as a checkpoint.
+    '''
+
+    @abstractmethod
+    def process(self, line: Line) -> list:
+        '''Processes the next line, returning any outputs
+        '''
+        ...
+
+    def finish(self) -> list:
+        '''Called after all lines have been processed, returning any trailing outputs
+        '''
+        return []
+
+
+class ContextProcessor(LineProcessor):
+    '''Maps each line to at most one output, where the only state is the ConfigContext
+
+    Args:
+        info_class: the Info class to create the ConfigContext with
+        line_func: maps (line, context) to an output or None. Has to be a top-level function so it can be pickled.
+    '''
+
+    def __init__(self, info_class: type[Info], line_func: Callable[[Line, ConfigContext], Any]):
+        self.context = ConfigContext(info_class)
+        self.line_func = line_func
+
+    def process(self, line: Line) -> list:
+        output = self.line_func(line, self.context)
+        return [] if output is None else [output]
+
+
+# ==========
+# Run record
+# ==========
+
+@dataclass
+class Checkpoint:
+    '''The saved state of the processor right before processing a line
+    '''
+    index: int          # index of the line that is about to be processed
+    num_outputs: int    # number of outputs that were produced before this line
+    digest: bytes       # digest of the pickled state, for comparing states
+    state: bytes        # the pickled processor
+
+
+@dataclass
+class RunRecord:
+    '''Everything we need to remember about a previous run
+    '''
+    line_keys: list[str]
+    outputs: list
+    checkpoints: list[Checkpoint]
+
+
+def line_key(line: Line) -> str:
+    '''Key for diffing lines between runs.
+    Uses the repr since it doesn't include the line number.
+    '''
+    return repr(line)
+
+
+def state_digest(processor: LineProcessor) -> bytes:
+    '''Digest of the processor state, for checking if two states are the same.
+
+    Pickles without the memo, so that the result only depends on the values
+    and not on which objects happen to be shared.
+    '''
+    buffer = io.BytesIO()
+    pickler = pickle.Pickler(buffer)
+    pickler.fast = True
+    pickler.dump(processor)
+    return hashlib.sha1(buffer.getvalue()).digest()
+
+
+def take_checkpoint(processor: LineProcessor, index: int, num_outputs: int) -> Checkpoint:
+    return Checkpoint(index, num_outputs, state_digest(processor), pickle.dumps(processor))
+
+
+# ==========
+# Processing
+# ==========
+
+def process(name: str, processor: LineProcessor, lines: list[Line]) -> list:
+    '''Runs the processor over the lines and returns all the outputs.
+
+    If --incremental is on, the previous run of the same component will be reused as much as possible.
+
+    Args:
+        name: name of the component, for the cache key
+        processor: a fresh processor
+        lines: the lines to process
+    '''
+    if not getattr(cli_args.ARGS, 'incremental', False):
+        outputs = []
+        for line in lines:
+            outputs += processor.process(line)
+        outputs += processor.finish()
+        return outputs
+
+    path = cache_path(name)
+    record = load_record(path)
+    record = run(processor, lines, record, cli_args.ARGS.checkpoint_interval)
+    save_record(path, record)
+
+    return record.outputs
+
+
+def run(processor: LineProcessor, lines: list[Line], old: RunRecord | None, interval: int) -> RunRecord:
+    '''Runs the processor over the lines, reusing as much of the old run as possible.
+
+    Args:
+        processor: a fresh processor. Only used if we can't resume from a checkpoint
+        lines: the lines to process
+        old: the record of the previous run, or None if there isn't one
+        interval: how many lines between each checkpoint
+
+    returns: the record of this run, which contains the outputs
+    '''
+    keys = [line_key(line) for line in lines]
+
+    # nothing changed at all
+    if old is not None and keys == old.line_keys:
+        return old
+
+    # find the unchanged lines at the start and end
+    prefix = 0
+    suffix = 0
+    if old is not None:
+        shortest = min(len(keys), len(old.line_keys))
+
+        while prefix < shortest and keys[prefix] == old.line_keys[prefix]:
+            prefix += 1
+
+        while suffix < shortest - prefix and keys[-1 - suffix] == old.line_keys[-1 - suffix]:
+            suffix += 1
+
+    # resume from the last checkpoint before the first changed line
+    outputs: list = []
+    checkpoints: list[Checkpoint] = []
+    start = 0
+    if old is not None:
+        resume = max((checkpoint for checkpoint in old.checkpoints if checkpoint.index <= prefix),
+                     key=lambda checkpoint: checkpoint.index, default=None)
+        if resume is not None:
+            processor = pickle.loads(resume.state)
+            outputs = old.outputs[:resume.num_outputs]
+            checkpoints = [checkpoint for checkpoint in old.checkpoints if checkpoint.index < resume.index]
+            start = resume.index
+
+    # old checkpoints in the unchanged suffix, keyed by where they would be in the new lines
+    shift = len(keys) - (len(old.line_keys) if old is not None else 0)
+    suffix_start = len(keys) - suffix
+    old_checkpoints: dict[int, Checkpoint] = {} if old is None else \
+        {checkpoint.index + shift: checkpoint for checkpoint in old.checkpoints
+         if checkpoint.index + shift >= max(suffix_start, start + 1)}
+
+    for index in range(start, len(lines)):
+        old_checkpoint = old_checkpoints.get(index)
+
+        if index % interval == 0 or old_checkpoint is not None:
+            checkpoint = take_checkpoint(processor, index, len(outputs))
+            checkpoints.append(checkpoint)
+
+            # the state converged with the previous run, so the rest of the outputs will be the same
+            if old_checkpoint is not None and old_checkpoint.digest == checkpoint.digest:
+                output_shift = len(outputs) - old_checkpoint.num_outputs
+                outputs += old.outputs[old_checkpoint.num_outputs:]
+                checkpoints += [Checkpoint(later.index + shift, later.num_outputs + output_shift,
+                                           later.digest, later.state)
+                                for later in old.checkpoints if later.index > old_checkpoint.index]
+                return RunRecord(keys, outputs, checkpoints)
+
+        outputs += processor.process(lines[index])
+
+    outputs += processor.finish()
+
+    return RunRecord(keys, outputs, checkpoints)
+
+
+# =======
+# Storage
+# =======
+
+def cache_path(name: str) -> Path:
+    '''Figures out where the run record for the component is stored.
+    The file name is a hash of everything that could change the outputs besides the lines.
+    '''
+    with open(cli_args.ARGS.config, 'rb') as config_file:
+        config_bytes = config_file.read()
+
+    key = hashlib.sha1()
+    key.update(str(CACHE_VERSION).encode())
+    key.update(config_bytes)
+    key.update(repr(sorted(configs.RESOURCE_NAMES.items())).encode())
+    key.update(repr(cli_args.ARGS.fill_blanks).encode())
+    key.update(str(Path(cli_args.ARGS.input).resolve()).encode())
+    key.update(repr(CHAPTER).encode())
+    key.update(name.encode())
+
+    return Path(cli_args.ARGS.cache_dir) / f'{key.hexdigest()}.pickle'
+
+
+def load_record(path: Path) -> RunRecord | None:
+    '''Loads the run record, or returns None if there isn't a usable one
+    '''
+    try:
+        with open(path, 'rb') as record_file:
+            return pickle.load(record_file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+
+def save_record(path: Path, record: RunRecord):
+    '''Writes the record to a temp file next to it, then swaps it into place.
+    With --jobs, two workers can save the same record at once (like chars and chars:p both doing char:[name]),
+    so a reader should only ever see one whole record or the other.
+    '''
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temp_path = tempfile.mkstemp(dir=path.parent, prefix=path.stem, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as record_file:
+            pickle.dump(record, record_file)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
@@ -1,11 +1,11 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, replace
-from typing import TypeVar, Any, Callable, Self
-
-from vidpy.utils import Frame
+from typing import TypeVar, Any, Callable, Collection, Self
 
 import durations
+import stats
 from exceptions import MissingInfoError
+from frame import Frame
 from geometry import Geometry, Offset
 from mlt_resource import MltResource
 
@@ -18,7 +18,12 @@ V = TypeVar("V")
 # ===============
 
 class _UNSET_TYPE:
-    pass
+    def __repr__(self) -> str:
+        return 'UNSET'
+
+    def __reduce__(self) -> str:
+        # makes sure the sentinel stays a singleton when pickled
+        return 'UNSET'
 
 
 UNSET = _UNSET_TYPE()
@@ -46,6 +51,9 @@ def expect_is_set(value: T | V, prop_name: str, char_name: str | None = None, se
 # Info base class
 # ===============
 
+_VALIDATION_STATS = stats.counter('info_validation')
+
+
 @dataclass(frozen=True)
 class Info(ABC):
     '''This class holds the config info pertaining to the scenario.
@@ -63,6 +71,14 @@ class Info(ABC):
         '''
         value = super(Info, self).__getattribute__(attribute_name)
         char_name = super(Info, self).__getattribute__('name')
+
+        if stats.ENABLED:
+            _VALIDATION_STATS.calls += 1
+            if value is UNSET:
+                _VALIDATION_STATS.misses += 1
+            else:
+                _VALIDATION_STATS.hits += 1
+
         expect_is_set(value, attribute_name, char_name)
         return value
 
@@ -91,6 +107,16 @@ class Info(ABC):
         '''
         return cls.of_name(None)
 
+    @classmethod
+    def known_names(cls) -> Collection[str] | None:
+        '''The names that of_name can find in the config json, without following aliases.
+        Lets callers turn down a name that isn't a character without building (and failing to build) its Info.
+        A listed name can still fail to build if its config is incomplete.
+
+        Returns None if the subclass can't tell, in which case you have to try of_name and see.
+        '''
+        return None
+
 
     def with_attr(self, attr: str, value: Any) -> Self:
         '''Returns a new instance with the given field changed
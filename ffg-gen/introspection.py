@@ -0,0 +1,127 @@
+import json
+from argparse import ArgumentParser
+from types import ModuleType
+from typing import Iterable, TYPE_CHECKING
+
+import cli_args
+from exceptions import CliError, DialogueGenException
+
+if TYPE_CHECKING:
+    from infohelper import Info
+    from lines import Line
+
+'''Commands that look at the config and input file without generating anything.
+
+None of these need vidpy, so they start up a lot faster than an actual generation run.
+This gets imported while setting up the parser, so the configs are only imported once they're needed.
+Make sure nothing in here imports the generation modules.
+'''
+
+
+def add_arguments(parser: ArgumentParser, has_chapters: bool = True):
+    '''Adds the introspection options to a scene's subparser
+    '''
+    if has_chapters:
+        parser.add_argument(
+            '--list-chapters', action='store_const', const=True, default=False, dest='list_chapters',
+            help='List the chapters in the input file, then exit without generating anything.')
+    parser.add_argument(
+        '--list-components', action='store_const', const=True, default=False, dest='list_components',
+        help='List the available components, macros and component groups, then exit without generating anything.')
+    parser.add_argument(
+        '--check-config', action='store_const', const=True, default=False, dest='check_config',
+        help='Check that the info for every character can be loaded from the config, then exit without generating anything.')
+    parser.add_argument(
+        '--plan', action='store_const', const=True, default=False, dest='plan',
+        help='Show what the components expand to after the macros and groups, in the order they would be generated, '
+             'then exit without generating anything.')
+
+
+def requested() -> bool:
+    '''Whether any introspection option was given
+    '''
+    args = cli_args.ARGS
+    return getattr(args, 'list_chapters', False) or args.list_components or args.check_config or args.plan
+
+
+def expect_components():
+    '''Raises a CliError if there's nothing to generate
+    '''
+    if len(cli_args.ARGS.components) == 0:
+        raise CliError('No components given. Use --list-components to see the options.')
+
+
+def load_config(scene_configs: ModuleType) -> dict:
+    '''Loads the config json into the global configs and the given scene configs
+    '''
+    import configs
+
+    with open(cli_args.ARGS.config) as json_file:
+        json_dict = json.load(json_file)
+        configs.load_into_globals(json_dict)
+        scene_configs.load_into_globals(json_dict)
+
+    return json_dict
+
+
+def print_chapters(chapter_names: list[str]):
+    if len(chapter_names) == 0:
+        print('No chapters; the whole input file is generated at once.')
+
+    for chapter_name in chapter_names:
+        print(chapter_name)
+
+
+def print_components(builtins: list[str], lines: Iterable['Line']):
+    '''Prints the built-in components, the macros in the config, and the component groups in the input file
+    '''
+    import configs
+
+    print('Built-in components:')
+    for component in builtins:
+        print(f'  {component}')
+
+    print('Macros:')
+    for macro, components in configs.COMPONENT_MACROS.items():
+        print(f'  {macro}: {" ".join(components)}')
+
+    # nested dicts so that each group keeps its components in order, without duplicates
+    groups: dict[str, dict[str, None]] = dict()
+    for line in lines:
+        if hasattr(line, 'group'):
+            groups.setdefault(line.group, dict())[line.component] = None
+
+    print('Component groups:')
+    for group, components in groups.items():
+        print(f'  {group}: {" ".join(components)}')
+
+
+def print_plan(lines: Iterable['Line']):
+    '''Prints the plan for the components given on the command line
+    '''
+    import component_plan
+    import configs
+
+    expect_components()
+    component_plan.print_plan(component_plan.make_plan(cli_args.ARGS.components, lines, configs.COMPONENT_MACROS))
+
+
+def check_config(info_class: type['Info'], characters: Iterable[str]):
+    '''Loads the common info and the info of every character.
+    Raises a CliError if any of them fail.
+    '''
+    problems: list[str] = []
+
+    for name in [None, *characters]:
+        try:
+            info_class.of_name(name)
+        except (DialogueGenException, TypeError, ValueError) as e:
+            problems.append(f'{name or "common"}: {e}')
+
+    for problem in problems:
+        print(problem)
+
+    if len(problems) > 0:
+        raise CliError(f'Found {len(problems)} problem(s) in {cli_args.ARGS.config}')
+
+    print(f'{cli_args.ARGS.config} looks good.')
@@ -0,0 +1,86 @@
+from functools import lru_cache, wraps
+from typing import Callable
+
+import stats
+
+'''Caches for the keyframe strings used by the animated filters.
+
+Most keyframes only depend on a few config values, so the same strings get built over and over for every clip.
+These caches build each string once and reuse it for every clip and chapter after that.
+'''
+
+
+# =============
+# Opacity fades
+# =============
+
+@lru_cache(maxsize=None, typed=True)
+def fade_in(end: int) -> str:
+    '''Keyframes for fading from transparent to opaque, starting at frame 0.
+    Use with opacityFilterArgs
+    '''
+    return f'0=0;{end}=1'
+
+
+@lru_cache(maxsize=None, typed=True)
+def fade_out(start: int, end: int) -> str:
+    '''Keyframes for fading from opaque to transparent.
+    Use with opacityFilterArgs
+    '''
+    return f'{start}=1;{end}=0'
+
+
+@lru_cache(maxsize=None, typed=True)
+def fade_in_out(in_end: int, out_start: int, out_end: int) -> str:
+    '''Keyframes for fading in from frame 0 and then fading out, in a single filter.
+    The fades can't overlap. Use with opacityFilterArgs
+    '''
+    return f'0=0;{in_end}=1;{out_start}=1;{out_end}=0'
+
+
+stats.register_cache('keyframes.fade_in', fade_in)
+stats.register_cache('keyframes.fade_out', fade_out)
+stats.register_cache('keyframes.fade_in_out', fade_in_out)
+
+
+# ===============
+# Per-info caches
+# ===============
+
+def cache_per_info(*fields: str) -> Callable[[Callable[..., str]], Callable[..., str]]:
+    '''Caches a keyframe function that takes an Info as its last argument.
+
+    Entries are keyed by the other arguments, plus the values of the given Info fields.
+    That way, Infos with the same relevant values share entries even if they're different instances,
+    and an @set on an unrelated field doesn't throw away the cache.
+    Make sure the fields cover every Info field the function reads!
+
+    Entries are only computed when first requested, so a missing config only raises if it's actually needed.
+    '''
+    def decorator(func: Callable[..., str]) -> Callable[..., str]:
+        entries: dict[tuple, str] = {}
+        cache_stats = stats.counter(f'keyframes.{func.__name__}')
+
+        @wraps(func)
+        def wrapper(*args):
+            *key_args, info = args
+            # bypass the Info getattribute so that UNSET values can be part of the key
+            key = (*key_args, *(object.__getattribute__(info, field) for field in fields))
+            try:
+                value = entries[key]
+            except KeyError:
+                value = entries[key] = func(*args)
+                if stats.ENABLED:
+                    cache_stats.calls += 1
+                    cache_stats.misses += 1
+                    cache_stats.size = len(entries)
+            else:
+                if stats.ENABLED:
+                    cache_stats.calls += 1
+                    cache_stats.hits += 1
+            return value
+
+        wrapper.cache_clear = entries.clear
+        return wrapper
+
+    return decorator
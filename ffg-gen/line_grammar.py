@@ -0,0 +1,96 @@
+from enum import Enum, auto
+from typing import Any, Callable, Self
+
+from exceptions import LineParseError
+
+'''Shared line classification for all the script parsers.
+
+Each parser describes its syntax as a LineGrammar, which classifies a raw line by its prefix.
+The prefixes are looked up by first character, so classifying a line is a dict lookup and a few startswith.
+
+Syslines and directives are parsed through a KeywordTable, which looks up the constructor by the first word.
+'''
+
+
+class LineKind(Enum):
+    COMMENT = auto()    # comments and empty lines
+    SYSLINE = auto()    # @
+    CHAPTER = auto()    # ===
+    DIRECTIVE = auto()  # !
+    BREAK = auto()      # ---
+    TEXT = auto()       # anything else
+
+
+class LineGrammar:
+    '''Classifies lines by their prefix.
+
+    Args:
+        comments: prefixes that mark a line as a comment. Empty lines are always comments.
+        prefixes: maps each prefix to the kind of line it marks.
+            If multiple prefixes match, the one that comes first wins.
+    '''
+
+    def __init__(self, comments: tuple[str, ...] = (), prefixes: dict[str, LineKind] | None = None):
+        self.prefixes: dict[str, LineKind] = {comment: LineKind.COMMENT for comment in comments}
+        self.prefixes.update(prefixes or {})
+
+        # group the prefixes by first character, keeping the order within each group
+        self.by_first_char: dict[str, list[tuple[str, LineKind]]] = {}
+        for prefix, kind in self.prefixes.items():
+            self.by_first_char.setdefault(prefix[0], []).append((prefix, kind))
+
+    def classify(self, line: str) -> tuple[LineKind, str]:
+        '''Figures out what kind of line this is.
+        Expects the line to already be stripped however the parser wants it.
+
+        returns: the kind of line, and the rest of the line after the prefix
+        '''
+        if len(line) == 0:
+            return LineKind.COMMENT, line
+
+        for prefix, kind in self.by_first_char.get(line[0], ()):
+            if line.startswith(prefix):
+                return kind, line[len(prefix):]
+
+        return LineKind.TEXT, line
+
+
+class KeywordTable:
+    '''Parses commands of the form `[keyword] [args]` by looking up the keyword.
+
+    Args:
+        kind: what kind of command this is, for error messages
+        with_args: maps keywords to a constructor that takes the stripped args
+        without_args: maps keywords to a constructor that takes no args
+    '''
+
+    def __init__(self, kind: str,
+                 with_args: dict[str, Callable[[str], Any]] | None = None,
+                 without_args: dict[str, Callable[[], Any]] | None = None):
+        self.kind = kind
+        self.with_args: dict[str, Callable[[str], Any]] = dict(with_args or {})
+        self.without_args: dict[str, Callable[[], Any]] = dict(without_args or {})
+
+    def extended(self,
+                 with_args: dict[str, Callable[[str], Any]] | None = None,
+                 without_args: dict[str, Callable[[], Any]] | None = None) -> Self:
+        '''Returns a new table that has all of these commands, plus the given ones
+        '''
+        return KeywordTable(self.kind,
+                            self.with_args | (with_args or {}),
+                            self.without_args | (without_args or {}))
+
+    def parse(self, line: str) -> Any:
+        '''Parses the command.
+        Raises a LineParseError if the command isn't recognized.
+
+        args:
+            line - the command with any prefix stripped off already
+        '''
+        match line.split(None, 1):
+            case [keyword, args] if keyword in self.with_args:
+                return self.with_args[keyword](args.strip())
+            case [keyword] if keyword in self.without_args:
+                return self.without_args[keyword]()
+            case _:
+                raise LineParseError(f'Unrecognized {self.kind}: {line}')
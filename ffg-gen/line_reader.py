@@ -0,0 +1,21 @@
+import mmap
+import os
+from typing import Generator
+
+'''Reads input files one line at a time without loading the whole file into memory.
+Used by --stream.
+'''
+
+
+def read_lines(path: str, encoding: str = 'utf-8') -> Generator[str, None, None]:
+    '''Reads the lines of a text file through a memory map.
+    The lines keep their line endings, same as iterating over a file object.
+    '''
+    with open(path, 'rb') as input_file:
+        # empty files can't be memory mapped
+        if os.fstat(input_file.fileno()).st_size == 0:
+            return
+
+        with mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for raw_line in iter(mapped.readline, b''):
+                yield raw_line.decode(encoding)
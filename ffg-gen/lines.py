@@ -1,13 +1,14 @@
 import ast
 from abc import ABC
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any
 
 from configcontext import ConfigContext
 from exceptions import NonExistentPropertyError, LineParseError
+from line_grammar import KeywordTable
 
 
-@dataclass
+@dataclass(slots=True)
 class Line(ABC):
     '''Represents a parsed line from the script.
 
@@ -15,16 +16,19 @@ class Line(ABC):
     Just here so we have a type to group the various line types under 
     to make it easier for type hinting
     '''
+    # line number in the input file, for resolving --from and --to.
+    # Doesn't count towards equality, since inserting a line above would change it.
+    lineno: int | None = field(default=None, kw_only=True, compare=False, repr=False)
 
 
-@dataclass
+@dataclass(slots=True)
 class TextLine(Line):
     '''Represents a line that contains text.
     A TextLine should have a text attr and a duration attr
     '''
 
 
-@dataclass
+@dataclass(slots=True)
 class SysLine(Line):
     '''Parent class for sys lines.
     Sys line stands for System Line.
@@ -49,28 +53,7 @@ class SysLine(Line):
 # Common Syslines
 # ================
 
-def parse_common_sysline(line: str) -> SysLine | None:
-    '''Parses a common sysline.
-    Returns None if the line isn't recognized, so you can do more specific parsing.
-
-    args:
-        line - a sysline with the @ stripped off already
-    returns: 
-        The parsed sysline, or None if the sysline isn't recognized
-    '''
-
-    match line.split(None, 1):
-        case ['set', args]: return SetCharProperty.parseArgs(args.strip())
-        case ['unset', args]: return UnsetCharProperty.parseArgs(args.strip())
-        case ['reset', args]: return ResetCharProperties.parseArgs(args.strip())
-        case ['resetall']: return ResetAllChars()
-        case ['alias', args]: return SetAlias.parseArgs(args.strip())
-        case ['unalias', args]: return UnsetAlias.parseArgs(args.strip())
-        case ['component', args]: return GroupedComponent.parseArgs(args.strip())
-        case _: return None
-
-
-@dataclass
+@dataclass(slots=True)
 class SetCharProperty(SysLine):
     '''Directly modifies the Info of a character.
     The change will stick until a character cache reset happens.
@@ -107,7 +90,7 @@ class SetCharProperty(SysLine):
         context.update_char(new_charInfo)
 
 
-@dataclass
+@dataclass(slots=True)
 class UnsetCharProperty(SysLine):
     '''Unsets the field in the Info of a character.
     The value will be back to what it was when loaded from config
@@ -137,7 +120,7 @@ class UnsetCharProperty(SysLine):
         context.update_char(new_charInfo)
 
 
-@dataclass
+@dataclass(slots=True)
 class ResetCharProperties(SysLine):
     '''Unsets all fields in the Info of a character.
     The value will be back to what it was when loaded from config
@@ -158,7 +141,7 @@ class ResetCharProperties(SysLine):
         context.reset_char(self.name)
 
 
-@dataclass
+@dataclass(slots=True)
 class ResetAllChars(SysLine):
     '''Resets the character cache, causing all set properties to be reset for all characters.
 
@@ -171,7 +154,7 @@ class ResetAllChars(SysLine):
         context.reset_all_char()
 
 
-@dataclass
+@dataclass(slots=True)
 class SetAlias(SysLine):
     '''Sets a local alias for a character. That means the alias can be used in place of the name.
 
@@ -192,7 +175,7 @@ class SetAlias(SysLine):
         context.add_local_alias(self.name, self.alias)
 
 
-@dataclass
+@dataclass(slots=True)
 class UnsetAlias(SysLine):
     '''Unset a local alias for a character.
 
@@ -212,7 +195,7 @@ class UnsetAlias(SysLine):
         context.remove_local_alias(self.alias)
 
 
-@dataclass
+@dataclass(slots=True)
 class GroupedComponent(SysLine):
     '''Used by the group:[group] and groups component to recursively generate components.
     Not used during actual generation processing.
@@ -227,3 +210,21 @@ class GroupedComponent(SysLine):
         match args.split(None, 1):
             case [group, component]: return GroupedComponent(group, component)
             case _: raise LineParseError(f'Invalid args for @component: {args}')
+
+
+COMMON_SYSLINES = KeywordTable(
+    'sysline',
+    with_args={
+        'set': SetCharProperty.parseArgs,
+        'unset': UnsetCharProperty.parseArgs,
+        'reset': ResetCharProperties.parseArgs,
+        'alias': SetAlias.parseArgs,
+        'unalias': UnsetAlias.parseArgs,
+        'component': GroupedComponent.parseArgs,
+    },
+    without_args={
+        'resetall': ResetAllChars,
+    })
+'''Syslines that are shared by all scenes.
+Each scene extends this with its own syslines.
+'''
@@ -1,12 +1,28 @@
 import re
+from dataclasses import dataclass
 from pathlib import Path
 from xml.etree import ElementTree
 from xml.etree.ElementTree import Element
 
 import cli_args
+import mlt_report
+import noop_filters
+import render_cost
+import timings
 from vidpy_extension.ext_composition import ExtComposition, compositions_to_mlt
 
 
+@dataclass
+class Marker:
+    '''A Shotcut timeline marker. Both ends are inclusive'''
+    text: str
+    start: int
+    end: int
+
+
+MARKER_COLOR = '#008000'
+
+
 def createPropertyElement(property: str, value: str) -> Element:
     """Creates xml Element for <property name="{property}">{value}</property>
     """
@@ -15,16 +31,26 @@ def createPropertyElement(property: str, value: str) -> Element:
     return element
 
 
-def fix_and_write_mlt(compositions: list[ExtComposition], file_suffix: str = None):
+def fix_and_write_mlt(compositions: list[ExtComposition], file_suffix: str = None, markers: list[Marker] = None):
     '''One-stop shop that takes care of both fixing and exporting the mlt
 
     Args:
         compositions: a list of ExtCompositions to export to an mlt
         file_suffix: if you want the filename stem to have a suffix
+        markers: Shotcut markers to add to the timeline
     '''
+    # drop the filters that don't do anything before melt ever sees them
+    removed = None
+    if cli_args.ARGS.drop_noop_filters:
+        with timings.phase('optimize'):
+            removed = noop_filters.drop_noop_filters(compositions)
+
     # generate initial mlt and fix it
     xml: Element = compositions_to_mlt(compositions)
-    fixed_xml: Element = fix_mlt(xml)
+    with timings.phase('fix'):
+        fixed_xml: Element = fix_mlt(xml)
+        if markers is not None:
+            fixed_xml = add_markers(fixed_xml, markers)
 
     # figure out the output path
     path: Path
@@ -40,10 +66,23 @@ def fix_and_write_mlt(compositions: list[ExtComposition], file_suffix: str = Non
     path = path.with_stem(path.stem + suffix)
 
     # write the xml
-    with open(path, 'wb') as outfile:
+    with timings.phase('serialize'):
         xml_string = ElementTree.tostring(fixed_xml)
+    with timings.phase('write'), open(path, 'wb') as outfile:
         outfile.write(xml_string)
-        print(f'Finished writing output to {path}')
+    print(f'Finished writing output to {path}')
+
+    if removed is not None:
+        noop_filters.print_removed(removed)
+
+    # the background track comes first, then the compositions in order
+    track_labels = [None] + [getattr(composition, 'component', None) for composition in compositions]
+
+    if cli_args.ARGS.report:
+        mlt_report.report_mlt(fixed_xml, track_labels, path, len(xml_string))
+
+    if cli_args.ARGS.render_cost:
+        render_cost.report_render_cost(fixed_xml, track_labels, path)
 
 
 def fix_mlt(xml: Element) -> Element:
@@ -65,6 +104,34 @@ def make_mlt_editable(xml: Element) -> Element:
     return xml
 
 
+def add_markers(xml: Element, markers: list[Marker]) -> Element:
+    '''Adds the markers to the timeline, the same way Shotcut saves them
+    '''
+    fps: float = mlt_report.fps_of(xml)
+    marker_list = Element('properties', {'name': 'shotcut:markers'})
+
+    for index, marker in enumerate(markers):
+        marker_element = Element('properties', {'name': str(index)})
+        marker_element.append(createPropertyElement('text', marker.text))
+        marker_element.append(createPropertyElement('start', clock_time(marker.start, fps)))
+        marker_element.append(createPropertyElement('end', clock_time(marker.end, fps)))
+        marker_element.append(createPropertyElement('color', MARKER_COLOR))
+        marker_list.append(marker_element)
+
+    xml.find('.//tractor').append(marker_list)
+    return xml
+
+
+def clock_time(frame: int, fps: float) -> str:
+    '''The frame as a HH:MM:SS.mmm timestamp, which is how Shotcut saves marker times
+    '''
+    millis = round(frame * 1000 / fps)
+    seconds, millis = divmod(millis, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f'{hours:02}:{minutes:02}:{seconds:02}.{millis:03}'
+
+
 def fix_filters(xml: Element) -> Element:
     """Add required shotcut-exclusive tags to filters
     """
@@ -115,6 +182,18 @@ def handle_possible_fades(brightness_filter: Element, parent_producer: Element):
     if alpha is not None:
         # we assume that all timestamps that we care about are given as frames,
         # since we specifically made it so our program converts everything to frames
+
+        # a folded fade in and fade out (from --fold-fades) goes 0 -> 1 -> 1 -> 0 and ends at the clip's end.
+        # shotcut's opacity filter can show that as a fade in and fade out on the same filter
+        folded = re.fullmatch(r'0=0;(?P<in_end>\d+)=1;(?P<out_start>\d+)=1;(?P<end>\d+)=0', alpha.text)
+        if folded and folded['end'] == parent_producer.get('out'):
+            animOut = str(int(folded['end']) - int(folded['out_start']))
+            brightness_filter.append(createPropertyElement('shotcut:filter', 'brightnessOpacity'))
+            brightness_filter.append(createPropertyElement('opacity', alpha.text))
+            brightness_filter.append(createPropertyElement('shotcut:animIn', folded['in_end']))
+            brightness_filter.append(createPropertyElement('shotcut:animOut', animOut))
+            return
+
         pattern = re.compile(r'(?P<begin>\d+)=(?P<initial>\d);(?P<end>\d+)=(?P<final>\d)')
         matches: re.Match = pattern.match(alpha.text)
 
@@ -0,0 +1,222 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from xml.etree.ElementTree import Element
+
+'''Complexity report for the generated mlt files, for --report.
+
+Shotcut's load and scrub times mostly depend on how many producers, filters and tracks there are,
+so this counts those for each track and rolls them up by component.
+Everything is counted from the fixed xml tree, so it matches what actually gets written.
+'''
+
+
+@dataclass
+class TrackStats:
+    '''Counts for a set of tracks'''
+    tracks: int = 0
+    producers: int = 0
+    entries: int = 0        # playlist entries, not counting blanks
+    blanks: int = 0
+    transitions: int = 0    # transitions onto these tracks
+    frames: int = 0         # length of the longest track
+    filters: Counter[str] = field(default_factory=Counter)     # by mlt_service
+
+    def add(self, other: 'TrackStats'):
+        self.tracks += other.tracks
+        self.producers += other.producers
+        self.entries += other.entries
+        self.blanks += other.blanks
+        self.transitions += other.transitions
+        self.frames = max(self.frames, other.frames)
+        self.filters.update(other.filters)
+
+
+@dataclass
+class MltReport:
+    path: Path
+    size: int                               # xml size in bytes
+    fps: float
+    frames: int                             # total duration
+    components: dict[str, TrackStats]       # in track order, starting from the background
+    total: TrackStats
+
+
+REPORTS: list[MltReport] = []
+'''Every report made during this run, in order
+'''
+
+BACKGROUND = '(background)'
+UNKNOWN = '(unknown)'
+
+
+# ========
+# Counting
+# ========
+
+def make_report(xml: Element, track_labels: list[str | None], path: Path, size: int) -> MltReport:
+    '''Counts everything in the fixed xml.
+
+    Args:
+        xml: the fixed mlt xml
+        track_labels: the component that made each track, in track order. Includes the background track.
+        path: where the xml got written
+        size: size of the written xml in bytes
+    '''
+    producers: dict[str, Element] = producers_of(xml)
+    tractor: Element = xml.find('.//tractor')
+
+    # count transitions by the track they go onto
+    transitions: Counter[int] = Counter(track for track, _ in transitions_of(tractor))
+
+    components: dict[str, TrackStats] = dict()
+    total = TrackStats()
+
+    for index, playlist in enumerate(playlists_of(xml)):
+        track_stats = count_track(playlist, producers)
+        track_stats.transitions = transitions[index]
+
+        components.setdefault(label_of(index, track_labels), TrackStats()).add(track_stats)
+        total.add(track_stats)
+
+    return MltReport(path, size, fps_of(xml), duration_of(tractor), components, total)
+
+
+def producers_of(xml: Element) -> dict[str, Element]:
+    '''All the top-level producers in the xml, by id
+    '''
+    return {element.get('id'): element for element in xml if element.tag in ('producer', 'chain')}
+
+
+def playlists_of(xml: Element) -> list[Element | None]:
+    '''The playlist of each track in the main tractor, in track order.
+    None for any track that isn't a playlist.
+    '''
+    playlists: dict[str, Element] = {element.get('id'): element for element in xml.iter('playlist')}
+    tractor: Element = xml.find('.//tractor')
+    return [playlists.get(track.get('producer')) for track in tractor.iter('track')]
+
+
+def transitions_of(tractor: Element) -> list[tuple[int, str]]:
+    '''(b_track, mlt_service) of every transition in the tractor
+    '''
+    transitions: list[tuple[int, str]] = []
+    for transition in tractor.iter('transition'):
+        b_track = transition.find("property[@name='b_track']")
+        if b_track is not None and b_track.text is not None:
+            transitions.append((int(b_track.text), service_of(transition)))
+    return transitions
+
+
+def service_of(element: Element) -> str:
+    '''The mlt_service of a filter, transition or producer
+    '''
+    service = element.find("property[@name='mlt_service']")
+    return service.text if service is not None else UNKNOWN
+
+
+def label_of(index: int, track_labels: list[str | None]) -> str:
+    '''The component that made the track at the index
+    '''
+    label = track_labels[index] if index < len(track_labels) else None
+    return label or (BACKGROUND if index == 0 else UNKNOWN)
+
+
+def fps_of(xml: Element) -> float:
+    '''The fps from the profile, or 0 if there isn't one
+    '''
+    profile: Element | None = xml.find('profile')
+    if profile is None or profile.get('frame_rate_den') in (None, '0'):
+        return 0
+    return int(profile.get('frame_rate_num')) / int(profile.get('frame_rate_den'))
+
+
+def duration_of(tractor: Element) -> int:
+    return int(tractor.get('out', -1)) - int(tractor.get('in', 0)) + 1
+
+
+def count_track(playlist: Element | None, producers: dict[str, Element]) -> TrackStats:
+    track_stats = TrackStats(tracks=1)
+    if playlist is None:
+        return track_stats
+
+    used_producers: set[str] = set()
+
+    for item in playlist:
+        match item.tag:
+            case 'blank':
+                track_stats.blanks += 1
+                track_stats.frames += int(item.get('length', 0))
+            case 'entry':
+                track_stats.entries += 1
+                track_stats.frames += int(item.get('out', 0)) - int(item.get('in', 0)) + 1
+                used_producers.add(item.get('producer'))
+
+    track_stats.producers = len(used_producers)
+
+    for producer_id in used_producers:
+        if (producer := producers.get(producer_id)) is None:
+            continue
+        for filter_element in producer.iter('filter'):
+            track_stats.filters[service_of(filter_element)] += 1
+
+    return track_stats
+
+
+# =========
+# Reporting
+# =========
+
+def report_mlt(xml: Element, track_labels: list[str | None], path: Path, size: int):
+    '''Counts everything in the fixed xml and prints the report
+    '''
+    report = make_report(xml, track_labels, path, size)
+    REPORTS.append(report)
+    print_report(report)
+
+
+def format_duration(frames: int, fps: float) -> str:
+    if fps <= 0:
+        return f'{frames} frames'
+
+    minutes, seconds = divmod(frames / fps, 60)
+    return f'{frames} frames ({int(minutes)}:{seconds:05.2f})'
+
+
+def stats_row(label: str, track_stats: TrackStats) -> str:
+    return (f'{label:<28}{track_stats.tracks:>7}{track_stats.producers:>10}{track_stats.entries:>9}'
+            f'{track_stats.blanks:>8}{sum(track_stats.filters.values()):>9}{track_stats.transitions:>13}'
+            f'{track_stats.frames:>9}')
+
+
+def print_report(report: MltReport):
+    print(f'=== Report for {report.path} ===')
+    print(f'{"component":<28}{"tracks":>7}{"producers":>10}{"entries":>9}{"blanks":>8}{"filters":>9}'
+          f'{"transitions":>13}{"frames":>9}')
+
+    for label, track_stats in report.components.items():
+        print(stats_row(label, track_stats))
+    print(stats_row('total', report.total))
+
+    print(f'Duration: {format_duration(report.frames, report.fps)}')
+    print(f'Size: {report.size / 1e6:.2f} MB')
+
+    if len(report.total.filters) > 0:
+        print('Filters by service:')
+        for service, count in report.total.filters.most_common():
+            print(f'  {service:<26}{count:>9}')
+    print()
+
+
+def print_summary():
+    '''Prints a row for each mlt made this run, if there was more than one
+    '''
+    if len(REPORTS) < 2:
+        return
+
+    print('=== Report for all outputs ===')
+    print(f'{"output":<28}{"tracks":>7}{"producers":>10}{"filters":>9}{"transitions":>13}{"frames":>9}{"MB":>8}')
+    for report in REPORTS:
+        print(f'{report.path.name:<28}{report.total.tracks:>7}{report.total.producers:>10}'
+              f'{sum(report.total.filters.values()):>9}{report.total.transitions:>13}{report.frames:>9}'
+              f'{report.size / 1e6:>8.2f}')
@@ -2,21 +2,25 @@ from dataclasses import dataclass, replace
 from typing import Self
 
 import configs
+import stats
 from exceptions import MissingConfigError
 
+_RESOURCE_STATS = stats.counter('named_resources')
 
-@dataclass
+
+@dataclass(frozen=True)
 class MltResource:
     '''Represents a resource that is used by mlt.
 
     This class automatically handles resolving named resources.
+    Immutable, so that filter args containing it can be shared between clips.
     '''
     resource: str
 
     def __post_init__(self):
         # prevent nested Resource classes
         if isinstance(self.resource, MltResource):
-            self.resource = self.resource.resource
+            object.__setattr__(self, 'resource', self.resource.resource)
 
     def __str__(self) -> str:
         return MltResource.follow_if_named(self.resource)
@@ -48,6 +52,13 @@ class MltResource:
         name: str = split[0]
         postfix: str = split[1] if len(split) > 1 else ''
 
+        if stats.ENABLED:
+            _RESOURCE_STATS.calls += 1
+            if name in configs.RESOURCE_NAMES:
+                _RESOURCE_STATS.hits += 1
+            else:
+                _RESOURCE_STATS.misses += 1
+
         # get name
         if name not in configs.RESOURCE_NAMES:
             raise MissingConfigError(f"Named resource '{name}' not defined.")
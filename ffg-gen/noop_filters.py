@@ -0,0 +1,111 @@
+import re
+from collections import Counter
+
+from vidpy import Clip
+
+from geometry import Geometry
+from vidpy_extension.ext_composition import ExtComposition
+
+'''Optimizer pass that drops filters that don't do anything, for --drop-noop-filters.
+
+The generators add some filters unconditionally, even when the config makes them do nothing:
+    brightness      a level or alpha that's 1 the whole time, like a character staying in front with frontBrightness 1
+    affine          a rect that's the full frame and never moves, like an unmoved portrait with the default geometry
+    mask_start      a drop text mask that's already fully revealed on the first frame, like when dropTextEnd is 0
+
+The pass runs on the clips, before they get turned into melt args, so the dropped filters never reach melt.
+'''
+
+# one keyframe in a keyframe string, like "10=1", "0~=0.5" or "10=0 0 1280 960"
+KEYFRAME = re.compile(r'(?:(?P<frame>-?\d+)[^=\d]?=)?(?P<value>.*)')
+
+
+def keyframe_values(keyframes) -> list[tuple[int, str]]:
+    '''Splits a keyframe string into (frame, value) pairs.
+    A plain value with no frame counts as a keyframe at frame 0
+    '''
+    values: list[tuple[int, str]] = []
+    for keyframe in str(keyframes).split(';'):
+        match = KEYFRAME.fullmatch(keyframe.strip())
+        values.append((int(match['frame'] or 0), match['value'].strip()))
+    return values
+
+
+def is_constant(keyframes, value: float) -> bool:
+    '''Whether every keyframe has the given value
+    '''
+    try:
+        return all(float(keyframe) == value for _, keyframe in keyframe_values(keyframes))
+    except ValueError:
+        return False
+
+
+def is_full_frame(rect) -> bool:
+    '''Whether the rect is a single full frame geometry, with full opacity if it has one
+    '''
+    match keyframe_values(rect):
+        case [(0, geometry)]:
+            numbers = geometry.split()
+            opacity = numbers[4] if len(numbers) > 4 else '1'
+            try:
+                return Geometry.parse(geometry) == Geometry(0, 0) and float(opacity.rstrip('%')) in (1, 100)
+            except ValueError:
+                return False
+        case _:
+            return False
+
+
+def is_noop(name: str, args) -> bool:
+    '''Whether the filter with the given args leaves the clip exactly how it was
+    '''
+    match name:
+        case 'brightness':
+            # both default to doing nothing when they aren't set
+            return all(is_constant(args[key], 1) for key in ('level', 'alpha') if key in args)
+
+        case 'affine':
+            # assumes the image is made for the frame, same as a geometry with only x and y does
+            return str(args.get('transition.distort', 0)) == '0' and is_full_frame(args.get('transition.rect', ''))
+
+        case 'mask_start':
+            if args.get('filter') != 'shape' or str(args.get('filter.use_mix')) != '1':
+                return False
+            # the last keyframe decides what every frame after it looks like
+            frame, mix = keyframe_values(args.get('filter.mix', ''))[-1]
+            try:
+                return frame == 0 and float(mix) >= 100
+            except ValueError:
+                return False
+
+        case _:
+            return False
+
+
+def drop_noop_filters(compositions: list[ExtComposition]) -> Counter[str]:
+    '''Removes the no-op filters from every clip in the compositions.
+    Returns how many were removed of each filter
+    '''
+    removed: Counter[str] = Counter()
+
+    for composition in compositions:
+        for clip in composition.clips:
+            if not isinstance(clip, Clip) or len(clip.fxs) == 0:
+                continue
+
+            kept: list[tuple[str, dict]] = []
+            for name, args in clip.fxs:
+                if args and is_noop(name, args):
+                    removed[name] += 1
+                else:
+                    kept.append((name, args))
+
+            if len(kept) < len(clip.fxs):
+                clip.fxs = kept
+
+    return removed
+
+
+def print_removed(removed: Counter[str]):
+    total = sum(removed.values())
+    breakdown = ', '.join(f'{name} {count}' for name, count in removed.most_common())
+    print(f'Dropped {total} no-op filters' + (f' ({breakdown})' if total > 0 else ''))
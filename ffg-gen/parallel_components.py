@@ -0,0 +1,114 @@
+import json
+import time
+from argparse import Namespace
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Generator, Iterable, TYPE_CHECKING
+
+import cli_args
+import configs
+import incremental
+import timings
+from component_plan import ComponentPlan
+
+if TYPE_CHECKING:
+    from lines import Line
+    from vidpy_extension.ext_composition import ExtComposition
+
+'''Generates the components of a chapter in a process pool, for --jobs.
+
+The components only depend on the lines and the configs, so each one can be generated in its own worker.
+The workers send back the finished compositions (which are just pickled clip descriptions),
+and they get put back together in plan order, so the output is the same as generating them one by one.
+
+Each worker gets the lines once when it starts, instead of once for every component.
+The cache stats from --stats only count what happens in the main process.
+'''
+
+
+@dataclass
+class WorkerSetup:
+    '''Everything a worker needs to generate components the same way the main process would
+    '''
+    args: Namespace
+    resource_names: dict[str, str]      # includes every !define from the input file
+    chapter: str | None
+    lines: list['Line']
+    load_scene_configs: Callable[[dict], None]
+    generate: Callable[[str, list['Line']], Iterable['ExtComposition']]
+
+
+_SETUP: WorkerSetup | None = None
+'''The setup of the current worker process
+'''
+
+
+# ======
+# Worker
+# ======
+
+def init_worker(setup: WorkerSetup):
+    '''Loads the cli args and configs in a worker process
+    '''
+    global _SETUP
+
+    cli_args.ARGS = setup.args
+    with open(setup.args.config) as json_file:
+        json_dict = json.load(json_file)
+        configs.load_into_globals(json_dict)
+        setup.load_scene_configs(json_dict)
+
+    configs.RESOURCE_NAMES = dict(setup.resource_names)
+    incremental.CHAPTER = setup.chapter
+
+    _SETUP = setup
+
+
+def generate_component(component: str) -> tuple[list['ExtComposition'], float]:
+    '''Generates a single built-in component in a worker process
+
+    returns: the compositions, and how many seconds it took
+    '''
+    start = time.perf_counter()
+    with timings.component(component):
+        compositions = list(_SETUP.generate(component, _SETUP.lines))
+    return compositions, time.perf_counter() - start
+
+
+# =======
+# Running
+# =======
+
+def run_plan(plan: ComponentPlan, lines: list['Line'], jobs: int,
+             load_scene_configs: Callable[[dict], None],
+             generate: Callable[[str, list['Line']], Iterable['ExtComposition']]
+             ) -> Generator['ExtComposition', None, None]:
+    '''Same as component_plan.run_plan, but generates the steps in a pool of jobs processes.
+    The compositions still come out in plan order.
+
+    Args:
+        load_scene_configs: loads the scene's configs from the config json. Has to be a top-level function.
+        generate: generates a built-in component from the lines. Has to be a top-level function.
+    '''
+    setup = WorkerSetup(cli_args.ARGS, dict(configs.RESOURCE_NAMES), incremental.CHAPTER, lines,
+                        load_scene_configs, generate)
+    num_workers = min(jobs, plan.num_generated)
+
+    with ProcessPoolExecutor(max_workers=num_workers, initializer=init_worker, initargs=(setup,)) as pool:
+        # start everything up front; the results are collected in order below
+        futures: dict[int, Future] = {index: pool.submit(generate_component, step.component)
+                                      for index, step in enumerate(plan.steps) if step.same_as is None}
+
+        generated: dict[int, list['ExtComposition']] = dict()
+
+        for index, step in enumerate(plan.steps):
+            if step.same_as is not None:
+                print(f'Reusing {step.component}')
+                yield from (composition.duplicate() for composition in generated[step.same_as])
+                continue
+
+            compositions, seconds = futures[index].result()
+            timings.add_component(step.component, seconds)
+
+            generated[index] = compositions
+            yield from compositions
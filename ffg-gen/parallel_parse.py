@@ -0,0 +1,100 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator
+
+import configs
+
+'''Helpers for parsing big scripts in parallel, split up at chapter boundaries.
+
+Each scene is in charge of stitching the chunks back together,
+since the state that carries over between chapters is different for each scene.
+'''
+
+
+@dataclass
+class Chunk:
+    '''A run of consecutive lines from the input file, split at a chapter marker
+    '''
+    first_lineno: int       # line number of the first line in the chunk
+    lines: list[str]
+    trailing_marker: bool   # whether the last line is the chapter marker that starts the next chunk
+
+
+@dataclass
+class ChunkResult:
+    '''What a worker sends back after parsing a chunk
+    '''
+    lines: list             # the parsed lines
+    state: Any              # the parse state at the end of the chunk
+    defines: list[tuple[str, str]]  # every !define in the chunk, in order
+
+
+class DefineRecorder(dict):
+    '''Stands in for the resource names in a worker, so we know which !define got run
+    '''
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.defines: list[tuple[str, str]] = []
+
+    def __setitem__(self, name: str, value: str):
+        self.defines.append((name, value))
+        super().__setitem__(name, value)
+
+
+def split_at_chapters(lines: list[str], is_chapter: Callable[[str], bool], num_chunks: int) -> list[Chunk]:
+    '''Splits the lines into about num_chunks chunks of similar size.
+    Chunks only get split right before a chapter marker.
+
+    Every chunk except the last also gets the chapter marker of the next chunk as its last line,
+    so that the parser sees the end of the chapter the same way it would in one go.
+    '''
+    target_size = max(1, len(lines) // max(1, num_chunks))
+
+    starts: list[int] = [0]
+    for index, line in enumerate(lines):
+        if index - starts[-1] >= target_size and is_chapter(line):
+            starts.append(index)
+    starts.append(len(lines))
+
+    chunks = []
+    for start, end in zip(starts, starts[1:]):
+        trailing_marker = end < len(lines)
+        chunks.append(Chunk(start + 1, lines[start:end + 1] if trailing_marker else lines[start:end], trailing_marker))
+
+    return chunks
+
+
+def map_chunks(parse_chunk: Callable[[Chunk], ChunkResult], chunks: list[Chunk], jobs: int,
+               initializer: Callable[..., None], initargs: tuple) -> Iterator[ChunkResult]:
+    '''Parses the chunks in a process pool.
+    The results come back in the same order as the chunks.
+
+    Args:
+        parse_chunk: parses a single chunk. Has to be a top-level function so it can be pickled.
+        initializer: loads the configs in each worker
+    '''
+    with ProcessPoolExecutor(max_workers=jobs, initializer=initializer, initargs=initargs) as pool:
+        yield from pool.map(parse_chunk, chunks)
+
+
+def record_defines(parse: Callable[[], Iterable]) -> tuple[list, list[tuple[str, str]]]:
+    '''Runs the parse in a worker while recording every !define.
+    The resource names get reset afterwards, so the next chunk in the same worker starts clean.
+
+    returns: the parsed lines, and the defines in order
+    '''
+    resource_names = configs.RESOURCE_NAMES
+    configs.RESOURCE_NAMES = DefineRecorder(resource_names)
+    try:
+        parsed = list(parse())
+        return parsed, configs.RESOURCE_NAMES.defines
+    finally:
+        configs.RESOURCE_NAMES = resource_names
+
+
+def apply_defines(defines: list[tuple[str, str]]):
+    '''Replays the !define directives from a worker in the main process
+    '''
+    for name, value in defines:
+        configs.RESOURCE_NAMES[name] = value
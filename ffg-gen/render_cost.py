@@ -0,0 +1,287 @@
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from xml.etree.ElementTree import Element
+
+import mlt_report
+from exceptions import CliError
+
+'''Static render cost estimate for the generated mlt files, for --render-cost.
+
+Walks the fixed xml and adds up a cost for every frame: each clip costs its producer plus all of its filters,
+and each transition costs its weight on every frame that the track it composites has a clip.
+The costs are in made-up units, roughly "compositing one full frame = 1".
+They're only meant for comparing scenes and finding the heavy parts, not for predicting render times.
+
+Give --cost-table a json of {name: cost} to override any of the costs below.
+Filters are keyed by their mlt_service, transitions by "transition:[service]" and producers by "producer:[service]".
+"filter", "transition" and "producer" are the fallbacks for anything that isn't in the table.
+'''
+
+DEFAULT_COSTS: dict[str, float] = {
+    # fallbacks
+    'filter': 1.0,
+    'transition': 1.0,
+    'producer': 1.0,
+
+    # producers
+    'producer:color': 0.1,
+    'producer:qimage': 0.5,
+    'producer:pixbuf': 0.5,
+    'producer:avformat': 2.0,
+
+    # cheap per-pixel filters
+    'brightness': 0.5,
+    'avfilter.vflip': 0.3,
+    'avfilter.hflip': 0.3,
+    'qtcrop': 0.5,
+
+    # text, which gets laid out again on every frame
+    'qtext': 1.5,
+    'dynamictext': 1.5,
+    'mask_start': 1.0,
+
+    # filters that resample or convolve the whole frame
+    'affine': 2.0,
+    'avfilter.hue': 1.0,
+    'lift_gamma_gain': 1.5,
+    'avfilter.gblur': 4.0,
+    'frei0r.bigsh0t_eq_to_stereo': 8.0,
+
+    # transitions
+    'transition:composite': 1.0,
+    'transition:affine': 2.0,
+    'transition:matte': 1.0,
+    'transition:mix': 0.05,
+}
+
+COSTS: dict[str, float] = dict(DEFAULT_COSTS)
+'''The cost table for this run. Loaded once when the run starts, with load_into_globals
+'''
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp', '.svg'}
+
+TOP_RANGES = 5
+'''How many of the most expensive frame ranges to show
+'''
+
+
+@dataclass
+class Segment:
+    '''A range of frames where nothing starts or stops'''
+    start: int
+    end: int                                                        # exclusive
+    cost: float                                                     # per frame
+    active_tracks: int
+    components: dict[str, float] = field(default_factory=dict)      # cost per frame of each component
+
+    @property
+    def frames(self) -> int:
+        return self.end - self.start
+
+
+@dataclass
+class CostProfile:
+    path: Path
+    fps: float
+    frames: int
+    segments: list[Segment]
+    components: dict[str, float]        # total cost of each component, in track order
+
+    @property
+    def total(self) -> float:
+        return sum(segment.cost * segment.frames for segment in self.segments)
+
+
+# ======
+# Costs
+# ======
+
+def load_cost_table(path: str | None) -> dict[str, float]:
+    '''The default costs, with the ones in the json file at the path on top
+    '''
+    costs = dict(DEFAULT_COSTS)
+    if path is None:
+        return costs
+
+    try:
+        with open(path) as json_file:
+            overrides = json.load(json_file)
+    except OSError as e:
+        raise CliError(f'Could not read the cost table {path}: {e.strerror}')
+    except json.JSONDecodeError as e:
+        raise CliError(f'{path} is not valid json: {e}')
+
+    if not isinstance(overrides, dict) or not all(isinstance(cost, (int, float)) for cost in overrides.values()):
+        raise CliError(f'{path} should be a json object of names to numbers')
+
+    costs.update(overrides)
+    return costs
+
+
+def load_into_globals(path: str | None):
+    '''Loads the cost table up front, so that a bad --cost-table fails before anything gets generated
+    '''
+    global COSTS
+    COSTS = load_cost_table(path)
+
+
+def producer_service(producer: Element) -> str:
+    '''The mlt_service of the producer, or a guess from the resource if it isn't set
+    '''
+    if (service := mlt_report.service_of(producer)) != mlt_report.UNKNOWN:
+        return service
+
+    resource = producer.find("property[@name='resource']")
+    resource = (resource.text or '') if resource is not None else ''
+    if resource.startswith('color:'):
+        return 'color'
+    if Path(resource).suffix.lower() in IMAGE_EXTENSIONS:
+        return 'qimage'
+    return 'avformat'
+
+
+def clip_cost(producer: Element, costs: dict[str, float]) -> float:
+    '''Cost per frame of the producer and all of its filters
+    '''
+    cost = costs.get(f'producer:{producer_service(producer)}', costs['producer'])
+    for filter_element in producer.iter('filter'):
+        cost += costs.get(mlt_report.service_of(filter_element), costs['filter'])
+    return cost
+
+
+# =========
+# Profiling
+# =========
+
+def make_profile(xml: Element, track_labels: list[str | None], path: Path, costs: dict[str, float]) -> CostProfile:
+    '''Adds up the cost of every frame in the fixed xml
+
+    Args:
+        xml: the fixed mlt xml
+        track_labels: the component that made each track, in track order. Includes the background track.
+        path: where the xml got written
+        costs: the cost table
+    '''
+    producers: dict[str, Element] = mlt_report.producers_of(xml)
+    tractor: Element = xml.find('.//tractor')
+    frames: int = mlt_report.duration_of(tractor)
+
+    # cost per frame of the transitions onto each track, only while the track has a clip
+    transition_costs: dict[int, float] = dict()
+    for track, service in mlt_report.transitions_of(tractor):
+        transition_costs[track] = transition_costs.get(track, 0) + costs.get(f'transition:{service}', costs['transition'])
+
+    # changes in cost at each frame, as {frame: [(component, cost change, active track change)]}
+    events: dict[int, list[tuple[str, float, int]]] = dict()
+    components: dict[str, float] = dict()
+
+    for index, playlist in enumerate(mlt_report.playlists_of(xml)):
+        label = mlt_report.label_of(index, track_labels)
+        components.setdefault(label, 0)
+        if playlist is None:
+            continue
+
+        position = 0
+        for item in playlist:
+            match item.tag:
+                case 'blank':
+                    position += int(item.get('length', 0))
+                case 'entry':
+                    length = int(item.get('out', 0)) - int(item.get('in', 0)) + 1
+                    cost = transition_costs.get(index, 0)
+                    if (producer := producers.get(item.get('producer'))) is not None:
+                        cost += clip_cost(producer, costs)
+
+                    # clips past the end of the tractor don't get rendered
+                    end = min(position + length, frames)
+                    if end > position:
+                        events.setdefault(position, []).append((label, cost, 1))
+                        events.setdefault(end, []).append((label, -cost, -1))
+                        components[label] += cost * (end - position)
+
+                    position += length
+
+    return CostProfile(path, mlt_report.fps_of(xml), frames, sweep(events, frames), components)
+
+
+def sweep(events: dict[int, list[tuple[str, float, int]]], frames: int) -> list[Segment]:
+    '''Turns the cost changes into segments of constant cost covering the whole timeline
+    '''
+    segments: list[Segment] = []
+    component_costs: dict[str, float] = dict()
+    active_tracks = 0
+    previous = 0
+
+    for frame in sorted(set(events) | {frames}):
+        if frame > previous:
+            # round away the float error from adding and removing the same costs
+            current = {label: round(cost, 6) for label, cost in component_costs.items() if round(cost, 6) > 0}
+            segments.append(Segment(previous, frame, sum(current.values()), active_tracks, current))
+            previous = frame
+
+        for label, cost, tracks in events.get(frame, []):
+            component_costs[label] = component_costs.get(label, 0) + cost
+            active_tracks += tracks
+
+    return merge_segments(segments)
+
+
+def merge_segments(segments: list[Segment]) -> list[Segment]:
+    '''Merges neighbouring segments that cost the same and have the same components
+    '''
+    merged: list[Segment] = []
+    for segment in segments:
+        if len(merged) > 0 and merged[-1].components == segment.components \
+                and merged[-1].active_tracks == segment.active_tracks:
+            merged[-1].end = segment.end
+        else:
+            merged.append(segment)
+    return merged
+
+
+# =========
+# Reporting
+# =========
+
+def report_render_cost(xml: Element, track_labels: list[str | None], path: Path):
+    '''Profiles the fixed xml with the loaded cost table and prints the estimate
+    '''
+    print_profile(make_profile(xml, track_labels, path, COSTS))
+
+
+def format_time(frame: int, fps: float) -> str:
+    if fps <= 0:
+        return str(frame)
+
+    minutes, seconds = divmod(frame / fps, 60)
+    return f'{int(minutes)}:{seconds:05.2f}'
+
+
+def print_profile(profile: CostProfile):
+    print(f'=== Render cost for {profile.path} ===')
+
+    if profile.frames <= 0 or len(profile.segments) == 0:
+        print('Nothing to render.')
+        print()
+        return
+
+    total = profile.total
+    peak = max(profile.segments, key=lambda segment: segment.cost)
+    max_tracks = max(segment.active_tracks for segment in profile.segments)
+    print(f'Estimated cost: {total:,.0f} over {profile.frames} frames '
+          f'(average {total / profile.frames:.1f} per frame, peak {peak.cost:.1f}, up to {max_tracks} active tracks)')
+
+    print(f'{"component":<28}{"cost":>12}{"share":>8}{"per frame":>11}')
+    for label, cost in sorted(profile.components.items(), key=lambda item: item[1], reverse=True):
+        share = cost / total if total > 0 else 0
+        print(f'{label:<28}{cost:>12,.0f}{share:>8.1%}{cost / profile.frames:>11.2f}')
+
+    print('Most expensive ranges:')
+    for segment in sorted(profile.segments, key=lambda segment: segment.cost, reverse=True)[:TOP_RANGES]:
+        heaviest = sorted(segment.components.items(), key=lambda item: item[1], reverse=True)[:3]
+        heaviest = ', '.join(f'{label} {cost:.1f}' for label, cost in heaviest)
+        print(f'  {format_time(segment.start, profile.fps):>9}-{format_time(segment.end, profile.fps):<9}'
+              f' frames {segment.start}-{segment.end - 1}: {segment.cost:.1f} per frame,'
+              f' {segment.active_tracks} tracks ({heaviest})')
+    print()
@@ -0,0 +1,123 @@
+import copy
+from dataclasses import dataclass
+
+import cli_args
+import mlt_fix
+from mlt_fix import Marker
+from vidpy_extension.ext_composition import ExtComposition
+from vidpy_extension.timeline import blank_frames, track_frames
+
+'''Handles the --single-output option, which puts every chapter into the same mlt instead of one mlt per chapter.
+
+The chapters get laid out one after another on the same timeline, and melt only runs once for all of them.
+Each chapter gets a Shotcut marker spanning it, so it's still easy to jump between them.
+
+Tracks are matched up between chapters by the component that made them,
+so a component keeps the same layer all the way through, even if it makes a different number of tracks in each chapter.
+'''
+
+
+@dataclass
+class Chapter:
+    name: str | None
+    compositions: list[ExtComposition]      # in track order, like they'd get written
+    frames: int                             # length of the longest track
+
+
+CHAPTERS: list[Chapter] = []
+'''Every chapter generated so far this run, in order
+'''
+
+
+def add_chapter(name: str | None, compositions: list[ExtComposition]):
+    '''Holds on to the compositions of a chapter until everything gets written.
+    Expects the compositions in track order.
+    '''
+    frames = max((track_frames(composition.clips) for composition in compositions), default=0)
+    CHAPTERS.append(Chapter(name, compositions, frames))
+
+
+def write():
+    '''Writes every chapter that was added into a single mlt
+    '''
+    if len(CHAPTERS) == 0:
+        print("Nothing to generate in any chapter. Skipping...")
+        return
+
+    print(f"Done generating. Now exporting {len(CHAPTERS)} chapter(s) into a single mlt...")
+
+    compositions = combine_chapters(CHAPTERS)
+    mlt_fix.fix_and_write_mlt(compositions, markers=chapter_markers(CHAPTERS))
+
+
+# =========
+# Combining
+# =========
+
+def track_keys(compositions: list[ExtComposition]) -> list[tuple[str | None, int]]:
+    '''Names each track after the component that made it, and how many tracks that component made before it
+    '''
+    counts: dict[str | None, int] = dict()
+    keys = []
+    for composition in compositions:
+        index = counts[composition.component] = counts.get(composition.component, -1) + 1
+        keys.append((composition.component, index))
+    return keys
+
+
+def merge_track_order(chapters: list[Chapter]) -> list[tuple[str | None, int]]:
+    '''The tracks of every chapter in one order.
+    A track that only some chapters have goes right after the track that comes before it in those chapters.
+    '''
+    order: list[tuple[str | None, int]] = []
+    for chapter in chapters:
+        position = 0
+        for key in track_keys(chapter.compositions):
+            if key in order:
+                position = order.index(key) + 1
+            else:
+                order.insert(position, key)
+                position += 1
+    return order
+
+
+def combine_chapters(chapters: list[Chapter]) -> list[ExtComposition]:
+    '''Lays out the chapters one after another, with one composition for each track.
+    Each chapter's tracks get padded to the length of the chapter, so the next one starts after all of it.
+    '''
+    tracks: dict[tuple[str | None, int], list] = {key: [] for key in merge_track_order(chapters)}
+    templates: dict[tuple[str | None, int], ExtComposition] = dict()
+
+    for chapter in chapters:
+        compositions = dict(zip(track_keys(chapter.compositions), chapter.compositions))
+
+        for key, clips in tracks.items():
+            if (composition := compositions.get(key)) is not None:
+                chapter_clips = composition.clips
+                templates.setdefault(key, composition)
+            else:
+                chapter_clips = []
+
+            clips += chapter_clips
+            if (blank := blank_frames(chapter.frames - track_frames(chapter_clips))) is not None:
+                clips.append(blank)
+
+    combined = []
+    for key, clips in tracks.items():
+        composition = copy.copy(templates[key])
+        composition.clips = clips
+        combined.append(composition)
+    return combined
+
+
+def chapter_markers(chapters: list[Chapter]) -> list[Marker]:
+    '''A marker spanning each chapter, in the order they got laid out
+    '''
+    markers = []
+    start = 0
+    for chapter in chapters:
+        if chapter.frames > 0:
+            markers.append(Marker(chapter.name or cli_args.ARGS.input, start, start + chapter.frames - 1))
+        start += chapter.frames
+    return markers
+
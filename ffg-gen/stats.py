@@ -0,0 +1,146 @@
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
+from typing import Callable, Generator
+
+'''Opt-in counters for the caches and lookups that get hit over and over during a run.
+
+Off by default; the instrumented code only checks ENABLED before doing anything,
+so the counters cost next to nothing when nobody's looking.
+Turn them on with --stats, or from python:
+
+    import stats
+    stats.enable()
+    ...  # generate something
+    stats.report()  # {name: {'calls': ..., 'hits': ..., ...}}
+    stats.reset()
+
+What each counter means:
+    [Info].of_name      hits and misses of the cache, and the time spent building infos on a miss
+    cached_chars        ConfigContext.get_char hits and misses, and evictions from @reset and @resetall
+    aliases             hits are steps through an alias, misses are names that aren't aliases (so one per lookup)
+    speaker_index       hits and misses of ConfigContext.char_exists, which remembers both the names that exist and don't
+    named_resources     hits are steps through a !name!, misses are names that weren't defined
+    info_validation     hits are reads of set Info attributes, misses are reads of unset ones
+    keyframes.[name]    hits and misses of the per-info keyframe caches
+'''
+
+ENABLED: bool = False
+
+
+@dataclass
+class Counter:
+    calls: int = 0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    seconds: float = 0
+    size: int | None = None     # current number of entries, for caches that can tell
+
+    _depth: int = field(default=0, repr=False)  # so that recursive calls only get timed once
+
+
+COUNTERS: dict[str, Counter] = dict()
+'''All counters, by name, in the order they were created
+'''
+
+# functools caches to read the hits and misses from, with the cache_info from the last reset
+_caches: dict[str, tuple[Callable, tuple | None]] = dict()
+
+
+def counter(name: str) -> Counter:
+    '''Gets the counter with the given name, creating it if needed.
+    Grab the counter once at import time; counters are never replaced, only reset in place.
+    '''
+    return COUNTERS.setdefault(name, Counter())
+
+
+def register_cache(name: str, cached_func: Callable):
+    '''Reports the hits and misses of a functools cache under the given name.
+    Works with anything that has a cache_info()
+    '''
+    counter(name)
+    _caches[name] = (cached_func, None)
+
+
+@contextmanager
+def timer(target: Counter) -> Generator[None, None, None]:
+    '''Adds the time spent inside the with block to the counter, if stats are enabled.
+    Nested timers on the same counter only count once.
+    '''
+    if not ENABLED:
+        yield
+        return
+
+    target._depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        target._depth -= 1
+        if target._depth == 0:
+            target.seconds += time.perf_counter() - start
+
+
+# ===
+# API
+# ===
+
+def enable():
+    global ENABLED
+    reset()
+    ENABLED = True
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+def reset():
+    '''Zeroes all the counters.
+    The functools caches themselves aren't cleared, only their counts.
+    '''
+    for target in COUNTERS.values():
+        target.calls = target.hits = target.misses = target.evictions = 0
+        target.seconds = 0
+        target.size = None
+
+    for name, (cached_func, _) in _caches.items():
+        _caches[name] = (cached_func, cached_func.cache_info())
+
+
+def report() -> dict[str, dict]:
+    '''Returns the counts of every counter that saw any use, by name
+    '''
+    for name, (cached_func, baseline) in _caches.items():
+        target = COUNTERS[name]
+        info = cached_func.cache_info()
+        target.hits = info.hits - (baseline.hits if baseline is not None else 0)
+        target.misses = info.misses - (baseline.misses if baseline is not None else 0)
+        target.calls = target.hits + target.misses
+        target.size = info.currsize
+
+    return {name: {f.name: getattr(target, f.name) for f in fields(Counter) if not f.name.startswith('_')}
+            for name, target in COUNTERS.items()
+            if target.calls > 0 or target.hits > 0 or target.misses > 0 or target.evictions > 0}
+
+
+def print_summary():
+    '''Prints a table of the counters to stderr
+    '''
+    def out(line: str = ''):
+        print(line, file=sys.stderr)
+
+    out()
+    out(f'{"counter":<40}{"calls":>12}{"hits":>12}{"misses":>10}{"hit rate":>10}'
+        f'{"evictions":>11}{"size":>8}{"seconds":>10}')
+
+    for name, counts in report().items():
+        lookups = counts['hits'] + counts['misses']
+        hit_rate = f'{counts["hits"] / lookups:.1%}' if lookups > 0 else ''
+        size = '' if counts['size'] is None else counts['size']
+        seconds = f'{counts["seconds"]:.4f}' if counts['seconds'] > 0 else ''
+        out(f'{name:<40}{counts["calls"]:>12,}{counts["hits"]:>12,}{counts["misses"]:>10,}{hit_rate:>10}'
+            f'{counts["evictions"]:>11,}{size:>8}{seconds:>10}')
@@ -0,0 +1,23 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+'''Shared setup for the tests.
+
+The modules all live at the top of ffg-gen/, so that folder needs to be importable.
+'''
+
+FFG_GEN = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(FFG_GEN))
+
+
+@pytest.fixture(scope='session')
+def parser():
+    '''The same argument parser ffg-gen.py uses
+    '''
+    spec = importlib.util.spec_from_file_location('ffg_gen_main', FFG_GEN / 'ffg-gen.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.createArgumentParser()
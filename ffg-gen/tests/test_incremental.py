@@ -0,0 +1,193 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import cli_args
+import configs
+import incremental
+from benchmarks import synthetic
+from dialogue_gen import dconfigs, dialogue_gen, line_parse
+
+'''Checks that --incremental always gives the same output as a full rebuild.
+'''
+
+COMPONENTS = ['text', 'header', 'chars', 'nametags']
+CHECKPOINT_INTERVAL = 7
+
+
+# =======
+# Helpers
+# =======
+
+def generate(parser, config: Path, script: Path, cache_dir: Path, incremental_run: bool) -> list[list[str]]:
+    '''Generates every chapter of the script the same way the dialogue scene does.
+    Returns the melt args of each composition, in order, which is everything that goes into the mlt.
+    '''
+    args = ['dialogue', *COMPONENTS, '-j', str(config), '-i', str(script),
+            '--cache-dir', str(cache_dir), '--checkpoint-interval', str(CHECKPOINT_INTERVAL)]
+    if incremental_run:
+        args.append('--incremental')
+    cli_args.ARGS = parser.parse_args(args)
+
+    with open(config) as json_file:
+        json_dict = json.load(json_file)
+        configs.load_into_globals(json_dict)
+        dconfigs.load_into_globals(json_dict)
+
+    with open(script) as script_file:
+        common_lines, chapters = line_parse.parseDialogueFile(script_file)
+
+    tracks = []
+    for chapter_name, lines in chapters.items():
+        incremental.CHAPTER = chapter_name
+        for composition in dialogue_gen.process_components(COMPONENTS, common_lines + lines):
+            tracks.append(composition.single_track_args())
+    return tracks
+
+
+def dialogue_line_indexes(script: list[str], chapter: str) -> list[int]:
+    '''Indexes of the dialogue lines in the chapter
+    '''
+    start = script.index(f'=== {chapter}')
+    end = next((index for index in range(start + 1, len(script)) if script[index].startswith('===')), len(script))
+    return [index for index in range(start + 1, end) if ': ' in script[index] and not script[index].startswith('#')]
+
+
+def edit_middle(script: list[str]) -> list[str]:
+    indexes = dialogue_line_indexes(script, 'chapter0')
+    index = indexes[len(indexes) // 2]
+    name, _ = script[index].split(': ', 1)
+    return script[:index] + [f'{name}: This line got rewritten to be a good bit longer than it was before.'] \
+        + script[index + 1:]
+
+
+def insert_line(script: list[str]) -> list[str]:
+    indexes = dialogue_line_indexes(script, 'chapter0')
+    index = indexes[len(indexes) // 3]
+    return script[:index] + [f'{synthetic.char_names(4)[1]}2: A brand new line.'] + script[index:]
+
+
+def delete_line(script: list[str]) -> list[str]:
+    indexes = dialogue_line_indexes(script, 'chapter1')
+    index = indexes[len(indexes) // 2]
+    return script[:index] + script[index + 1:]
+
+
+@pytest.fixture
+def scene(tmp_path: Path) -> tuple[Path, Path, list[str]]:
+    '''A synthetic config and a two chapter script, written to the temp folder
+    '''
+    config = tmp_path / 'dialogue-gen.json'
+    script = tmp_path / 'dialogue.txt'
+    synthetic.write_config(config, synthetic.dialogue_config())
+    lines = list(synthetic.dialogue_script(120, num_chapters=2))
+    synthetic.write_script(script, lines)
+    return config, script, lines
+
+
+# =====
+# Tests
+# =====
+
+@pytest.mark.parametrize('edit', [edit_middle, insert_line, delete_line])
+def test_edit_matches_full_rebuild(parser, scene, tmp_path: Path, edit):
+    config, script, lines = scene
+    cache_dir = tmp_path / 'cache'
+
+    # fill up the cache
+    first = generate(parser, config, script, cache_dir, incremental_run=True)
+    assert first == generate(parser, config, script, tmp_path / 'unused', incremental_run=False)
+
+    edited = edit(lines)
+    assert edited != lines
+    synthetic.write_script(script, edited)
+
+    assert generate(parser, config, script, cache_dir, incremental_run=True) \
+        == generate(parser, config, script, tmp_path / 'unused', incremental_run=False)
+
+
+def test_repeated_edits_match_full_rebuild(parser, scene, tmp_path: Path):
+    config, script, lines = scene
+    cache_dir = tmp_path / 'cache'
+    generate(parser, config, script, cache_dir, incremental_run=True)
+
+    for edit in (edit_middle, insert_line, delete_line):
+        lines = edit(lines)
+        synthetic.write_script(script, lines)
+
+        assert generate(parser, config, script, cache_dir, incremental_run=True) \
+            == generate(parser, config, script, tmp_path / 'unused', incremental_run=False)
+
+
+# ===========
+# Convergence
+# ===========
+
+PROCESSED: list[str] = []
+'''Every line the LastLineProcessor processed, so the tests can see how much got redone
+'''
+
+
+class LastLineProcessor(incremental.LineProcessor):
+    '''Outputs each line along with the one before it.
+    The only state is the previous line, so the state converges one line after an edit.
+    '''
+
+    def __init__(self):
+        self.previous: str | None = None
+
+    def process(self, line: str) -> list:
+        PROCESSED.append(line)
+        output = (self.previous, line)
+        self.previous = line
+        return [output]
+
+
+def full_outputs(lines: list[str]) -> list:
+    processor = LastLineProcessor()
+    return [output for line in lines for output in processor.process(line)]
+
+
+@pytest.mark.parametrize('edit', [
+    lambda lines: lines[:50] + ['edited'] + lines[51:],
+    lambda lines: lines[:50] + ['inserted'] + lines[50:],
+    lambda lines: lines[:50] + lines[51:],
+])
+def test_run_reuses_unchanged_lines(edit):
+    lines = [f'line {index}' for index in range(200)]
+    record = incremental.run(LastLineProcessor(), lines, None, 10)
+
+    edited = edit(lines)
+    expected = full_outputs(edited)
+
+    PROCESSED.clear()
+    new_record = incremental.run(LastLineProcessor(), edited, record, 10)
+
+    assert new_record.outputs == expected
+    # resumes from the checkpoint at 50, and converges at the next checkpoint after the edit
+    assert len(PROCESSED) <= 2 * 10
+
+
+def test_run_without_changes_reuses_everything():
+    lines = [f'line {index}' for index in range(100)]
+    record = incremental.run(LastLineProcessor(), lines, None, 10)
+
+    PROCESSED.clear()
+    assert incremental.run(LastLineProcessor(), list(lines), record, 10) is record
+    assert PROCESSED == []
+
+
+def test_run_after_earlier_insert_and_delete():
+    '''The checkpoints after an insert or delete get shifted, so a later edit has to resume from the right place
+    '''
+    lines = [f'line {index}' for index in range(200)]
+    record = incremental.run(LastLineProcessor(), lines, None, 10)
+
+    for edit in (lambda lines: lines[:30] + ['inserted', 'inserted again'] + lines[30:],
+                 lambda lines: lines[:140] + ['edited'] + lines[141:],
+                 lambda lines: lines[:20] + lines[23:],
+                 lambda lines: lines[:160] + ['edited again'] + lines[161:]):
+        lines = edit(lines)
+        record = incremental.run(LastLineProcessor(), lines, record, 10)
+        assert record.outputs == full_outputs(lines)
@@ -0,0 +1,246 @@
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Callable, Generator
+
+import cli_args
+import stats
+
+'''Wall-clock timings for each phase of a run, and for each component.
+
+Phases and components that happen more than once (like once per chapter) add up.
+Nothing here does any real work unless one of the options asks for it, apart from reading the clock.
+'''
+
+
+@dataclass
+class MemoryStats:
+    '''What tracemalloc saw during a phase, with --trace-memory
+    '''
+    net_mb: float = 0           # memory still allocated at the end of the phase, minus at the start
+    peak_mb: float = 0          # highest traced memory during the phase
+    top: list[str] = field(default_factory=list)    # biggest net allocations, from the last time the phase ran
+
+
+@dataclass
+class ComponentStats:
+    seconds: float = 0          # not counting the time spent in nested components, like the ones in a macro
+    calls: int = 0
+
+
+PHASES: dict[str, float] = dict()
+'''Total seconds spent in each phase, in the order they first started
+'''
+
+MEMORY: dict[str, MemoryStats] = dict()
+'''Memory stats for each phase. Only filled in with --trace-memory
+'''
+
+COMPONENTS: dict[str, ComponentStats] = dict()
+'''Stats for each component, in the order they first started
+'''
+
+TOTAL: float | None = None
+'''Total seconds for the whole run, once it's finished
+'''
+
+TOP_ALLOCATIONS = 5
+'''How many allocation sites to keep for each phase with --trace-memory
+'''
+
+# the components currently being generated, innermost last, as [name, start, seconds spent in nested components]
+_component_stack: list[list] = []
+
+
+# =========
+# Recording
+# =========
+
+@contextmanager
+def phase(name: str) -> Generator[None, None, None]:
+    '''Adds the time spent inside the with block to the given phase.
+    Phases shouldn't be nested.
+    '''
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        PHASES[name] = PHASES.get(name, 0) + time.perf_counter() - start
+
+        if tracing:
+            record_memory(name, before)
+
+
+def record_memory(name: str, before: tracemalloc.Snapshot):
+    stats = MEMORY.setdefault(name, MemoryStats())
+    _, peak = tracemalloc.get_traced_memory()
+
+    # leave out the snapshots themselves
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    after = tracemalloc.take_snapshot().filter_traces(ignore)
+    differences = after.compare_to(before.filter_traces(ignore), 'lineno')
+
+    stats.net_mb += sum(difference.size_diff for difference in differences) / 1e6
+    stats.peak_mb = max(stats.peak_mb, peak / 1e6)
+    stats.top = [str(difference) for difference in differences[:TOP_ALLOCATIONS] if difference.size_diff > 0]
+
+
+@contextmanager
+def component(name: str) -> Generator[None, None, None]:
+    '''Adds the time spent inside the with block to the given component.
+    Components can be nested (like macros and groups); the time of a nested component
+    only counts towards the innermost one.
+    '''
+    entry = [name, time.perf_counter(), 0]
+    _component_stack.append(entry)
+    try:
+        yield
+    finally:
+        _component_stack.pop()
+        elapsed = time.perf_counter() - entry[1]
+
+        stats = COMPONENTS.setdefault(name, ComponentStats())
+        stats.seconds += elapsed - entry[2]
+        stats.calls += 1
+
+        if len(_component_stack) > 0:
+            _component_stack[-1][2] += elapsed
+
+
+def add_component(name: str, seconds: float):
+    '''Adds time spent on a component somewhere else, like in a worker process
+    '''
+    stats = COMPONENTS.setdefault(name, ComponentStats())
+    stats.seconds += seconds
+    stats.calls += 1
+
+
+def current_component() -> str | None:
+    '''The innermost component that's currently being generated, if any
+    '''
+    return _component_stack[-1][0] if len(_component_stack) > 0 else None
+
+
+def max_rss_mb() -> float | None:
+    '''The peak resident memory of this process so far, in MB.
+    Returns None on platforms without the resource module (ie Windows)
+    '''
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    # ru_maxrss is in KB on Linux, but in bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / 1e6 if sys.platform == 'darwin' else max_rss / 1e3
+
+
+# =======
+# Running
+# =======
+
+def run(func: Callable[[], None]):
+    '''Runs the func, with whatever instrumentation the cli args ask for.
+    Reports the timings once it's done.
+    '''
+    global TOTAL
+
+    args = cli_args.ARGS
+    profile_path: str | None = getattr(args, 'profile', None)
+
+    if getattr(args, 'stats', False):
+        stats.enable()
+
+    if getattr(args, 'trace_memory', False):
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    try:
+        if profile_path is not None:
+            import cProfile
+            profiler = cProfile.Profile()
+            try:
+                profiler.runcall(func)
+            finally:
+                profiler.dump_stats(profile_path)
+                print(f'Saved profile to {profile_path}', file=sys.stderr)
+        else:
+            func()
+    finally:
+        TOTAL = time.perf_counter() - start
+        tracemalloc.stop()
+
+    if (json_path := getattr(args, 'timings_json', None)) is not None:
+        write_json(json_path)
+
+    if getattr(args, 'timings', False):
+        print_summary()
+
+    if stats.ENABLED:
+        stats.print_summary()
+
+
+# =========
+# Reporting
+# =========
+
+def print_summary():
+    '''Prints tables of the phase and component timings to stderr
+    '''
+    def out(line: str = ''):
+        print(line, file=sys.stderr)
+
+    total = TOTAL or sum(PHASES.values())
+    memory_header = f'{"net MB":>10}{"peak MB":>10}' if len(MEMORY) > 0 else ''
+
+    out()
+    out(f'{"phase":<24}{"seconds":>10}{"%":>8}{memory_header}')
+    for name, seconds in PHASES.items():
+        memory = MEMORY.get(name)
+        memory = f'{memory.net_mb:>10.2f}{memory.peak_mb:>10.2f}' if memory is not None else ''
+        out(f'{name:<24}{seconds:>10.3f}{seconds / total:>8.1%}{memory}')
+
+    other = total - sum(PHASES.values())
+    out(f'{"(other)":<24}{other:>10.3f}{other / total:>8.1%}')
+    out(f'{"total":<24}{total:>10.3f}')
+
+    if len(COMPONENTS) > 0:
+        out()
+        out(f'{"component":<24}{"seconds":>10}{"calls":>8}')
+        for name, stats in COMPONENTS.items():
+            out(f'{name:<24}{stats.seconds:>10.3f}{stats.calls:>8}')
+
+    for name, memory in MEMORY.items():
+        if len(memory.top) > 0:
+            out()
+            out(f'Biggest allocations during {name}:')
+            for allocation in memory.top:
+                out(f'  {allocation}')
+
+    rss = max_rss_mb()
+    if rss is not None:
+        out()
+        out(f'Peak RSS: {rss:.1f} MB')
+
+
+def write_json(path: str):
+    '''Writes the phase and component timings and the peak memory to a json file.
+    Also includes the cache stats with --stats
+    '''
+    with open(path, 'w') as json_file:
+        json.dump({
+            'total': TOTAL,
+            'phases': PHASES,
+            'components': {name: asdict(stats) for name, stats in COMPONENTS.items()},
+            'memory': {name: asdict(stats) for name, stats in MEMORY.items()},
+            'max_rss_mb': max_rss_mb(),
+            'stats': stats.report() if stats.ENABLED else None,
+        }, json_file, indent=4)
@@ -1,7 +1,7 @@
 from vidpy import Clip
-from vidpy.utils import Frame
 
 import cli_args
+from frame import Frame
 
 
 class BlankClip(Clip):
@@ -1,14 +1,24 @@
+import copy
 import itertools
 import subprocess
+from pathlib import Path
 from xml.etree.ElementTree import Element, fromstring
 
-from vidpy import Composition, config
+from vidpy import Clip, Composition, config
 
 import cli_args
+import timings
+from filters import FilterArgs
+from . import melt_standin
+from .blankclip import BlankClip
 
 '''Code heavily referenced from vidpy
 '''
 
+SILENT_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp', '.svg'}
+'''Resources with these extensions are images, which never have any audio
+'''
+
 
 class ExtComposition(Composition):
     '''Extended Composition
@@ -17,6 +27,26 @@ class ExtComposition(Composition):
     Much of the code is copied from the superclass's code in vidpy.
     '''
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # the component that made this composition, for reports
+        self.component: str | None = timings.current_component()
+
+    def has_audio(self) -> bool:
+        '''Whether any of the clips could produce audio.
+        Only blanks, colors and images are known to be silent; anything else might be a video with sound.
+        '''
+        return any(may_have_audio(clip) for clip in self.clips)
+
+    def duplicate(self) -> 'ExtComposition':
+        '''A copy of this composition with its own copies of the clips.
+        Later passes change clips in place, so the copy can't share them with the original.
+        '''
+        duplicate = copy.copy(self)
+        duplicate.clips = [copy_clip(clip) for clip in self.clips]
+        return duplicate
+
     def single_track_args(self) -> list[str]:
         '''Generate mlt command line arguments for creating only this track.
         Assumes that self.singletrack true.
@@ -33,7 +63,7 @@ class ExtComposition(Composition):
         # add args and transitions for all clips
         for i, clip in enumerate(self.clips):
             clip.track_number = i + 1
-            args += clip.args(self.singletrack)
+            args += clip_args(clip, self.singletrack)
             args += clip.transition_args(i+1)
 
         # add mask clips
@@ -58,8 +88,8 @@ class ExtComposition(Composition):
             Element: an mlt xml representation of the composition
         '''
 
-        xml = subprocess.check_output(self.args() + ['-consumer', 'xml'])
-        xml = fromstring(xml)
+        # skip the melt binary; run_melt decides which melt to use
+        xml = fromstring(run_melt(self.args()[1:]))
 
         xml = self.autoset_duration(xml)
         xml = self.set_meta(xml)
@@ -67,14 +97,80 @@ class ExtComposition(Composition):
         return xml
 
 
+def copy_clip(clip: Clip) -> Clip:
+    '''A shallow copy of the clip, with its own filter, transition and kwarg containers
+    '''
+    duplicate = copy.copy(clip)
+    duplicate.fxs = list(clip.fxs)
+    duplicate.transitions = list(clip.transitions)
+    duplicate.kwargs = dict(clip.kwargs)
+    return duplicate
+
+
+def may_have_audio(clip: Clip) -> bool:
+    if isinstance(clip, BlankClip):
+        return False
+
+    resource = str(clip.resource)
+    return not resource.startswith('color:') and Path(resource).suffix.lower() not in SILENT_EXTENSIONS
+
+
+def clip_args(clip: Clip, singletrack: bool) -> list[str]:
+    '''Generates the mlt command line arguments for a clip.
+
+    Same as Clip.args, except that FilterArgs use their pre-serialized args.
+    Subclasses like BlankClip have their own args, so those are left alone.
+    '''
+    if type(clip) is not Clip:
+        return clip.args(singletrack)
+
+    args: list[str] = []
+
+    if not singletrack:
+        args += ['-track']
+
+    if clip.offset > 0:
+        args += ['-blank', str(clip.offset)]
+
+    resource = clip.resource
+
+    if clip._speed != 1.0:
+        resource = 'timewarp:{}:{}'.format(clip._speed, resource)
+
+    args += [resource, 'in="{}"'.format(clip.start)]
+
+    if clip.end:
+        args += ['out="{}"'.format(clip.end)]
+
+    for key in clip.kwargs:
+        args += ['{}="{}"'.format(key, clip.kwargs[key])]
+
+    if clip._repeat:
+        args += ['-repeat', str(clip._repeat)]
+
+    for fx, fxargs in clip.fxs:
+        args += ['-attach-clip' if singletrack else '-attach-track', fx]
+        if clip.offset > 0:
+            args += ['in={}'.format(clip.offset)]
+
+        if isinstance(fxargs, FilterArgs):
+            args += fxargs.melt_args()
+        else:
+            args += ['{}="{}"'.format(key, str(fxargs[key])) for key in fxargs]
+
+    return args
+
+
 def compositions_to_mlt(compositions: list[ExtComposition]) -> Element:
     '''Creates a multi-track mlt containing all of the compositions
     '''
     if len(compositions) == 0:
         raise RuntimeError('The generated composition is entirely empty')
 
-    args: list[str] = combine_args(compositions)
-    return args_to_xml(args, compositions[0])
+    with timings.phase('args'):
+        args: list[str] = combine_args(compositions)
+    with timings.phase('melt'):
+        return args_to_xml(args, compositions[0])
 
 
 def flatten(list_of_lists):
@@ -96,10 +192,11 @@ def combine_args(compositions: list[ExtComposition]) -> list[str]:
     # add the combined args for all comps
     args += flatten([composition.single_track_args() for composition in compositions])
 
-    # add composite transitions for all tracks
-    for i in range(1, len(compositions) + 1):
+    # add composite transitions for all tracks, and mix transitions for the tracks that could have audio
+    for i, composition in enumerate(compositions, start=1):
         args += ['-transition', 'composite', 'distort=0', 'a_track=0', f'b_track={i}']
-        args += ['-transition', 'mix', 'a_track=0', f'b_track={i}']
+        if cli_args.ARGS.mix_all_tracks or composition.has_audio():
+            args += ['-transition', 'mix', 'a_track=0', f'b_track={i}']
 
     return args
 
@@ -112,11 +209,28 @@ def args_to_xml(args: list[str], exemplar: Composition = None) -> Element:
         exemplar: A Composition to copy the profile/metadata and duration from, in order to fix the mlt
     '''
 
-    xml = subprocess.check_output([config.MELT_BINARY] + args + ['-consumer', 'xml'])
-    xml = fromstring(xml)
+    xml = fromstring(run_melt(args))
 
     if exemplar is not None:
         xml = exemplar.autoset_duration(xml)
         xml = exemplar.set_meta(xml)
 
     return xml
+
+
+def run_melt(args: list[str]) -> bytes:
+    '''Runs melt on the given command line args and returns the mlt xml it outputs.
+    Uses the melt given by --melt, which can be a path to a melt binary or the built-in stand-in.
+
+    Args:
+        args: the command line args to melt. DO NOT include the call to melt itself
+    '''
+    match getattr(cli_args.ARGS, 'melt', None):
+        case 'standin':
+            return melt_standin.run(args)
+        case None:
+            melt = config.MELT_BINARY
+        case melt_path:
+            melt = melt_path
+
+    return subprocess.check_output([melt] + args + ['-consumer', 'xml'])
@@ -0,0 +1,105 @@
+from xml.etree.ElementTree import Element, SubElement, tostring
+
+'''A stand-in for melt, for benchmarking and testing on machines without melt installed.
+
+Only understands the subset of melt args that this project generates:
+tracks, producers, blanks, attached filters and transitions.
+The output has the same structure as the mlt xml that melt would give back,
+but everything is fixed to a 1920x1080 25fps profile and nothing about the resources gets checked.
+Don't use this for anything you actually want to render!
+'''
+
+PRODUCER_LENGTH = 15000
+'''Default length of a producer that doesn't set in/out, same as melt's default for images
+'''
+
+
+def strip_quotes(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    return value
+
+
+def run(args: list[str]) -> bytes:
+    '''Turns the melt command line args into an mlt xml, like `melt [args] -consumer xml` would.
+
+    Args:
+        args: the command line args to melt. The melt binary itself is skipped if it's included.
+    '''
+    if len(args) > 0 and not args[0].startswith('-'):
+        args = args[1:]
+
+    # each track is a list of either blank lengths or producer elements
+    tracks: list[list[int | Element]] = []
+    producers: list[Element] = []
+    transitions: list[Element] = []
+    num_filters: int = 0
+
+    # the element that any following properties belong to
+    target: Element | None = None
+    producer: Element | None = None
+
+    arg_iter = iter(args)
+    for arg in arg_iter:
+        match arg:
+            case '-consumer':
+                break
+            case '-track':
+                tracks.append([])
+                target = None
+            case '-blank':
+                tracks[-1].append(int(next(arg_iter)) + 1)
+            case '-attach' | '-attach-clip' | '-attach-track':
+                target = SubElement(producer, 'filter', {'id': f'filter{num_filters}'})
+                SubElement(target, 'property', {'name': 'mlt_service'}).text = next(arg_iter)
+                num_filters += 1
+            case '-transition':
+                target = Element('transition', {'id': f'transition{len(transitions)}'})
+                SubElement(target, 'property', {'name': 'mlt_service'}).text = next(arg_iter)
+                transitions.append(target)
+            case prop if '=' in prop and target is not None and not prop.startswith('color:'):
+                name, value = prop.split('=', 1)
+                value = strip_quotes(value)
+                if target.tag == 'producer' and name in ('in', 'out'):
+                    target.set(name, str(int(float(value))))
+                else:
+                    SubElement(target, 'property', {'name': name}).text = value
+            case resource:
+                producer = target = Element('producer', {'id': f'producer{len(producers)}',
+                                                         'in': '0', 'out': str(PRODUCER_LENGTH - 1)})
+                SubElement(producer, 'property', {'name': 'resource'}).text = resource
+                producers.append(producer)
+                tracks[-1].append(producer)
+
+    root = Element('mlt', {'LC_NUMERIC': 'C', 'version': '7', 'root': '', 'producer': 'main_bin'})
+    SubElement(root, 'profile', {'description': 'standin', 'width': '1920', 'height': '1080',
+                                 'frame_rate_num': '25', 'frame_rate_den': '1'})
+
+    for producer in producers:
+        out = producer.get('out')
+        length = Element('property', {'name': 'length'})
+        length.text = str(int(out) + 1)
+        producer.insert(0, length)
+        for filter_element in producer.findall('filter'):
+            filter_element.set('out', out)
+    root.extend(producers)
+
+    total_length = 0
+    for index, items in enumerate(tracks):
+        playlist = SubElement(root, 'playlist', {'id': f'playlist{index}'})
+        track_length = 0
+        for item in items:
+            if isinstance(item, int):
+                SubElement(playlist, 'blank', {'length': str(item)})
+                track_length += item
+            else:
+                SubElement(playlist, 'entry', {'producer': item.get('id'), 'in': item.get('in'), 'out': item.get('out')})
+                track_length += int(item.get('out')) - int(item.get('in')) + 1
+        total_length = max(total_length, track_length)
+
+    tractor = SubElement(root, 'tractor', {'id': 'tractor0', 'in': '0', 'out': str(max(total_length - 1, 0))})
+    for index in range(len(tracks)):
+        SubElement(tractor, 'track', {'producer': f'playlist{index}'})
+    tractor.extend(transitions)
+
+    return tostring(root)
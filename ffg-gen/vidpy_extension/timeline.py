@@ -0,0 +1,140 @@
+from vidpy import Clip
+
+from frame import Frame
+from vidpy_extension.blankclip import BlankClip
+
+'''Helpers for reasoning about where clips land on a single track.
+
+Every clip we generate takes up its duration + 1 frames on the track,
+which is where the 1 frame gap between clips comes from.
+The only exception is a BlankClip with a duration of 0, which doesn't take up any space at all.
+'''
+
+
+def clip_frames(clip: Clip) -> int:
+    '''Returns the number of frames the clip actually takes up on the track
+    '''
+    if isinstance(clip, BlankClip):
+        return int(clip.offset) + 1 if clip.offset > 0 else 0
+    else:
+        return int(clip.end) - int(clip.start) + 1
+
+
+def track_frames(clips: list[Clip]) -> int:
+    '''Returns the number of frames the clips take up when played one after another
+    '''
+    return sum(clip_frames(clip) for clip in clips)
+
+
+def blank_frames(frames: int) -> Clip | None:
+    '''Creates a blank that takes up exactly the given number of frames.
+
+    BlankClip.ofDuration can't take up a single frame, since a blank of duration 0 takes up no space,
+    so we use a 1 frame transparent clip in that case.
+    Returns None if there's no frames to fill.
+    '''
+    if frames <= 0:
+        return None
+    elif frames == 1:
+        return set_out(Clip('color:#00000000', start=Frame(0)), Frame(0))
+    else:
+        return BlankClip.ofDuration(Frame(frames - 1))
+
+
+def set_out(clip: Clip, out: Frame) -> Clip:
+    '''Sets the out point of the clip.
+
+    vidpy skips the out arg entirely if the out point is 0,
+    so we have to pass it through the clip kwargs in that case.
+    '''
+    clip.end = Frame(out)
+    if out == 0:
+        clip.kwargs['out'] = 0
+    return clip
+
+
+def trim_clips(clips: list[Clip], start: int, end: int | None) -> list[Clip]:
+    '''Only keeps the parts of the track that fall within [start, end).
+    Clips that cross the boundaries get trimmed.
+
+    Trimming the start of a clip moves its in point,
+    so any keyframed filters on the clip still line up with a full render.
+
+    Args:
+        clips: the clips in the track, in order
+        start: first frame to keep
+        end: first frame to drop. None means keep everything until the end of the track
+    '''
+    trimmed: list[Clip] = []
+    curr_frame = 0
+
+    for clip in clips:
+        clip_start = curr_frame
+        clip_end = curr_frame + clip_frames(clip)
+        curr_frame = clip_end
+
+        keep_start = max(clip_start, start)
+        keep_end = clip_end if end is None else min(clip_end, end)
+
+        # clip is entirely outside of the range
+        if keep_end <= keep_start:
+            continue
+
+        # clip is entirely inside of the range
+        if keep_start == clip_start and keep_end == clip_end:
+            trimmed.append(clip)
+
+        # clip crosses a boundary
+        elif isinstance(clip, BlankClip):
+            trimmed.append(blank_frames(keep_end - keep_start))
+        else:
+            clip.start = Frame(int(clip.start) + keep_start - clip_start)
+            trimmed.append(set_out(clip, Frame(clip.start + keep_end - keep_start - 1)))
+
+    return trimmed
+
+
+def pack_tracks(slots: list[tuple[int, list[list[Clip] | None]]]) -> list[list[Clip]]:
+    '''Packs clips that play at the same time into as few tracks as possible.
+
+    Each slot is (frames, items), where the items all start when the slot does and take up its frames.
+    An item is the clips for one track, and can start with blanks. None means nothing shows in that spot.
+    Items keep their order within each slot, so the z-order holds;
+    they just move down to fill in the spots that are None.
+
+    Blanks in between the clips on a track get merged, and nothing gets added after the last clip on a track,
+    except for the first track, which keeps the blanks at the end so that the whole thing stays just as long.
+    '''
+    tracks: list[list[Clip]] = []
+    pending: list[int] = []     # frames of blank each track still owes before its next clip
+    elapsed = 0
+
+    for frames, items in slots:
+        items = [item for item in items if item is not None]
+
+        for index, item in enumerate(items):
+            if index == len(tracks):
+                tracks.append([])
+                pending.append(elapsed)
+
+            # leading blanks join the blank that's already owed
+            leading = 0
+            while leading < len(item) and isinstance(item[leading], BlankClip):
+                pending[index] += clip_frames(item[leading])
+                leading += 1
+
+            if (blank := blank_frames(pending[index])) is not None:
+                tracks[index].append(blank)
+            pending[index] = 0
+
+            tracks[index] += item[leading:]
+
+        for index in range(len(items), len(tracks)):
+            pending[index] += frames
+
+        elapsed += frames
+
+    if len(tracks) > 0 and (blank := blank_frames(pending[0])) is not None:
+        tracks[0].append(blank)
+
+    return tracks